@@ -1,102 +1,137 @@
 from flask import Flask, g
-from flask_cors import CORS
 import sqlite3
 import os
 
+from lib.cache import ResponseCache
+from lib.cors import AllowedOrigins
 from lib.db import Db
+from lib.metrics import RequestMetrics
+from lib.migrations import run_migrations
+from lib.profiling import QueryProfiler
+from lib.queries import queries
+from lib.workers import ProcessWriteLock
 
 import routes.words
 import routes.groups
 import routes.study_sessions
 import routes.dashboard
 import routes.study_activities
-
-def get_allowed_origins(app):
-    try:
-        cursor = app.db.cursor()
-        cursor.execute('SELECT url FROM study_activities')
-        urls = cursor.fetchall()
-        # Convert URLs to origins (e.g., https://example.com/app -> https://example.com)
-        origins = set()
-        for url in urls:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url['url'])
-                origin = f"{parsed.scheme}://{parsed.netloc}"
-                origins.add(origin)
-            except:
-                continue
-        return list(origins) if origins else ["*"]
-    except:
-        return ["*"]  # Fallback to allow all origins if there's an error
+import routes.metrics
 
 def get_db(app):
-    if 'db' not in g:
-        g.db = sqlite3.connect(app.config['DATABASE'])
-        g.db.row_factory = sqlite3.Row
-    return g.db
+    return app.db.get()
 
 def init_db(app):
     with app.app_context():
         db = get_db(app)
-        with app.open_resource('schema.sql', mode='r') as f:
-            db.executescript(f.read())
-        db.commit()
+        # Recreate the schema and test data unless serving an existing database
+        if app.config['RESET_DB']:
+            with app.open_resource('schema.sql', mode='r') as f:
+                db.executescript(f.read())
+            db.commit()
+        run_migrations(db)
 
 def create_app(test_config=None):
     app = Flask(__name__)
     
-    if test_config is None:
-        app.config.from_mapping(
-            DATABASE='words.db'
-        )
-    else:
+    app.config.from_mapping(
+        DATABASE='words.db',
+        RESET_DB=True,
+        DB_PROFILE='wal',
+        DB_POOL_SIZE=5,
+        DB_POOL_TIMEOUT=10.0,
+        DB_EXPORT_POOL_SIZE=2,
+        DB_CACHED_STATEMENTS=256,
+        SQL_PROFILING=True,
+        SLOW_QUERY_MS=100,
+        # Bearer token for POST /metrics/reset, which is refused while unset
+        METRICS_RESET_TOKEN=None,
+        ASGI_MAX_PENDING=1000,
+        MAX_CONTENT_LENGTH=16 * 1024 * 1024,
+        IMPORT_MAX_CONTENT_LENGTH=1024 * 1024 * 1024,
+        WRITE_LOCK_FILE=None,
+        WRITE_LOCK_TIMEOUT=10.0,
+        WORKER_METRICS_DIR=None,
+        RESPONSE_CACHE_SIZE=512,
+        RESPONSE_CACHE_MAX_BYTES=8 * 1024 * 1024,
+        RESPONSE_CACHE_TTL=60,
+        CORS_ORIGINS_TTL=60,
+        # Allowed besides the study activity origins: the React frontend's dev server
+        CORS_EXTRA_ORIGINS=['http://localhost:5173', 'http://127.0.0.1:5173']
+    )
+    if test_config is not None:
         app.config.update(test_config)
     
-    # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    app.db = Db(
+        database=app.config['DATABASE'],
+        profile=app.config['DB_PROFILE'],
+        pool_size=app.config['DB_POOL_SIZE'],
+        pool_timeout=app.config['DB_POOL_TIMEOUT'],
+        cached_statements=app.config['DB_CACHED_STATEMENTS'],
+        # Streamed exports run on connections of their own, see lib/export.py
+        export_pool_size=app.config['DB_EXPORT_POOL_SIZE'],
+        # Per-query timings for /metrics and the slow query log
+        profiler=QueryProfiler(app.config['SLOW_QUERY_MS']) if app.config['SQL_PROFILING'] else None
+    )
     
-    # Get allowed origins from study_activities table
-    allowed_origins = get_allowed_origins(app)
+    # Read every named query under sql/ once instead of per request
+    queries.load()
     
-    # In development, add localhost to allowed origins
-    if app.debug:
-        allowed_origins.extend(["http://localhost:8080", "http://127.0.0.1:8080"])
+    # Read-heavy endpoints are cached until a write endpoint bumps one of their tables
+    app.cache = ResponseCache(
+        max_entries=app.config['RESPONSE_CACHE_SIZE'],
+        max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+    
+    # Latency, size and status counters for every request, exported at /metrics
+    app.request_metrics = RequestMetrics()
+    app.request_metrics.init_app(app)
+    
+    # Serialize write requests when several worker processes share the database
+    app.write_lock = None
+    if app.config['WRITE_LOCK_FILE']:
+        app.write_lock = ProcessWriteLock(app.config['WRITE_LOCK_FILE'], app.config['WRITE_LOCK_TIMEOUT'])
+        app.write_lock.init_app(app)
+    
+    # Set by serve.py in each worker process
+    app.worker_stats = None
     
-    # Configure CORS with combined origins
-    CORS(app, resources={
-        r"/*": {
-            "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
-        }
-    })
-
     # Ensure the instance folder exists
     try:
         os.makedirs(app.instance_path)
     except OSError:
         pass
         
-    # Initialize database schema
-    init_db(app)
-    
-    # Close database connection
+    # Return the request's connection to the pool
     @app.teardown_appcontext
     def close_db(exception):
-        if 'db' in g:
-            g.db.close()
+        app.db.close()
 
+    # Initialize database schema
+    init_db(app)
+    
+    # CORS origins come from the study activity URLs, so they are read once the
+    # schema exists and re-read whenever study_activities changes
+    extra_origins = list(app.config['CORS_EXTRA_ORIGINS'])
+    if app.debug:
+        extra_origins += ["http://localhost:8080", "http://127.0.0.1:8080"]
+    app.cors = AllowedOrigins(app, extra_origins=extra_origins, ttl=app.config['CORS_ORIGINS_TTL'])
+    app.cors.init_app(app)
+    with app.app_context():
+        app.cors.refresh()
+    
     # load routes -----------
     routes.words.load(app)
     routes.groups.load(app)
     routes.study_sessions.load(app)
     routes.dashboard.load(app)
     routes.study_activities.load(app)
+    routes.metrics.load(app)
     
     return app
 
-app = create_app()
-
 if __name__ == '__main__':
+    # Built here rather than at import, so importing create_app never resets words.db
+    app = create_app()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+ASGI entry point.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+from app import create_app
+from lib.asgi import AsgiApp
+
+app = create_app()
+
+# One worker thread per pooled connection, so no request waits for the pool
+application = AsgiApp(
+    app,
+    max_workers=app.config['DB_POOL_SIZE'],
+    max_pending=app.config['ASGI_MAX_PENDING']
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(application, host='127.0.0.1', port=5000, timeout_keep_alive=75)
@@ -0,0 +1,183 @@
+"""
+Throughput and latency of the WSGI and ASGI serving paths under many connections.
+
+Each server runs in its own process on the same generated database:
+  wsgi  werkzeug's threaded server, one thread per connection, which it
+        closes after every response (no keep-alive)
+  asgi  uvicorn with lib.asgi.AsgiApp, a bounded pool of DB_POOL_SIZE threads
+
+Every client holds one keep-alive connection and waits --think ms between
+requests, like a browser tab, so most connections are idle at any moment.
+
+    python benchmarks/bench_asgi.py --connections 10 100 1000 --seconds 10 --think 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+POOL_SIZE = 8
+
+def build(path, words, sessions, reviews):
+    from lib.db import connect
+    from lib.migrations import run_migrations
+    from lib.synthetic import generate
+    connection = connect(path)
+    with open(os.path.join(BASE_DIR, 'schema.sql')) as f:
+        connection.executescript(f.read())
+    run_migrations(connection)
+    summary = generate(connection, words=words, groups=20, sessions=sessions, reviews=reviews)
+    connection.close()
+    return summary
+
+def serve(mode, database, port):
+    import logging
+    from app import create_app
+    app = create_app({'DATABASE': database, 'RESET_DB': False, 'DB_POOL_SIZE': POOL_SIZE, 'SLOW_QUERY_MS': None})
+    if mode == 'wsgi':
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+    else:
+        import uvicorn
+        from lib.asgi import AsgiApp
+        application = AsgiApp(app, max_workers=POOL_SIZE, max_pending=app.config['ASGI_MAX_PENDING'])
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+def paths(rng, sizes):
+    return rng.choice([
+        '/groups',
+        f"/groups/{rng.randint(1, sizes['groups'])}",
+        f"/words/{rng.randint(1, sizes['words'])}",
+        f"/words?page={rng.randint(1, 20)}",
+        '/dashboard/stats',
+        f"/api/study-sessions/{rng.randint(1, sizes['sessions'])}"
+    ])
+
+async def request(reader, writer, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection' and value.strip().lower() == 'close':
+            keep_alive = False
+    await reader.readexactly(length)
+    if not status_line.startswith(b'HTTP/1.1 2'):
+        raise ValueError(status_line)
+    return keep_alive
+
+async def client(index, port, sizes, deadline, think, timeout, latencies, errors):
+    rng = random.Random(index)
+    reader = writer = None
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            keep_alive = await asyncio.wait_for(request(reader, writer, paths(rng, sizes)), timeout)
+            latencies.append(time.perf_counter() - started)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            errors.append(1)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+        await asyncio.sleep(think / 1000 * rng.uniform(0.5, 1.5))
+    if writer is not None:
+        writer.close()
+
+async def drive(port, sizes, connections, seconds, think, timeout):
+    latencies, errors = [], []
+    deadline = time.monotonic() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i, port, sizes, deadline, think, timeout, latencies, errors) for i in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 2) if latencies else None
+    return {
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': pick(0.50),
+        'p99_ms': pick(0.99),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        'errors': len(errors)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--think', type=float, default=50, help='idle ms between requests on a connection')
+    parser.add_argument('--timeout', type=float, default=5, help='seconds before a request counts as an error')
+    parser.add_argument('--words', type=int, default=50000)
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=200000)
+    parser.add_argument('--modes', nargs='+', default=['wsgi', 'asgi'])
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--serve', nargs=3, metavar=('MODE', 'DATABASE', 'PORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        mode, database, port = args.serve
+        serve(mode, database, int(port))
+        return
+
+    workdir = tempfile.mkdtemp(prefix='bench-asgi-')
+    database = os.path.join(workdir, 'bench.db')
+    sizes = build(database, args.words, args.sessions, args.reviews)
+
+    results = {}
+    print(f"{'mode':<6}{'conns':>7}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for mode in args.modes:
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode, database, str(port)])
+        try:
+            wait_for(port)
+            for connections in args.connections:
+                result = asyncio.run(drive(port, sizes, connections, args.seconds, args.think, args.timeout))
+                results.setdefault(mode, {})[connections] = result
+                print(f"{mode:<6}{connections:>7}{result['rps']:>10}{result['p50_ms']!s:>10}{result['p99_ms']!s:>10}{result['errors']:>8}", flush=True)
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'dataset': sizes, 'think_ms': args.think, 'seconds': args.seconds, 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
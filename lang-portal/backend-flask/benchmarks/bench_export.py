@@ -0,0 +1,97 @@
+"""
+Time to first byte, total time and peak memory of the streaming exports.
+
+Compares /api/study-sessions/review-items/export with the same rows built
+into one list and serialized by a single jsonify call, which is how
+/groups/<id>/words/raw used to answer. Peak memory is measured with
+tracemalloc in a separate pass, since tracing slows everything down.
+
+    python benchmarks/bench_export.py --reviews 2000000
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import jsonify
+
+from app import create_app
+from lib.db import connect
+from lib.migrations import run_migrations
+from lib.queries import queries
+from lib.synthetic import generate
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def build(path, reviews):
+    connection = connect(path)
+    with open(os.path.join(BASE_DIR, 'schema.sql')) as f:
+        connection.executescript(f.read())
+    run_migrations(connection)
+    generate(connection, words=50000, groups=50, sessions=max(1, reviews // 25), reviews=reviews)
+    connection.close()
+
+def buffered(app):
+    # The whole result as dicts, then one JSON document
+    with app.test_request_context():
+        cursor = app.db.cursor()
+        queries.execute(cursor, 'study_sessions/export_review_items', (0,))
+        rows = [dict(row) for row in cursor.fetchall()]
+        body = jsonify({'review_items': rows}).get_data()
+        app.db.close()
+    yield body
+
+def streamed(app, client):
+    response = client.get('/api/study-sessions/review-items/export', buffered=False)
+    try:
+        yield from response.response
+    finally:
+        response.close()
+
+def measure(chunks):
+    started = time.perf_counter()
+    first, size = None, 0
+    for chunk in chunks:
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    return first * 1000, time.perf_counter() - started, size
+
+def peak_memory(chunks):
+    tracemalloc.start()
+    for _ in chunks:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=2000000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    build(path, args.reviews)
+    app = create_app({'DATABASE': path, 'RESET_DB': False, 'SQL_PROFILING': False})
+    client = app.test_client()
+
+    print(f"{'variant':>10}{'ttfb ms':>12}{'total s':>10}{'MB sent':>10}{'peak MB':>10}")
+    for name, run in (('stream', lambda: streamed(app, client)), ('jsonify', lambda: buffered(app))):
+        gc.collect()
+        ttfb, total, size = measure(run())
+        peak = peak_memory(run())
+        print(f"{name:>10}{ttfb:>12.1f}{total:>10.2f}{size / 1024 / 1024:>10.1f}{peak:>10.1f}")
+
+    app.db.dispose()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
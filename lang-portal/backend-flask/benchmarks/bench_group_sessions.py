@@ -0,0 +1,113 @@
+"""
+Latency of the /groups/<id>/study_sessions listing as sessions per group grow.
+
+Compares the previous query (two correlated subqueries per row plus one
+datetime() round trip per session without reviews) with the current one
+that reads study_session_stats.
+
+    python benchmarks/bench_group_sessions.py --sizes 100 1000 10000 100000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.db import connect
+from lib.migrations import run_migrations
+from lib.sessions import session_end_time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+REVIEWS_PER_SESSION = 8
+
+def build(path, sessions):
+    connection = connect(path)
+    with open(os.path.join(BASE_DIR, 'schema.sql')) as f:
+        connection.executescript(f.read())
+    connection.executemany(
+        'INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, ?)',
+        ((f'2025-01-01 00:00:{i % 60:02d}',) for i in range(sessions))
+    )
+    # Every other session has reviews, so half the rows need the end-time fallback
+    connection.executemany(
+        'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)',
+        ((r, s, r % 3 != 0, '2025-01-01 01:00:00')
+         for s in range(1, sessions + 1, 2) for r in range(REVIEWS_PER_SESSION))
+    )
+    connection.commit()
+    run_migrations(connection)
+    return connection
+
+def old_listing(cursor, sort_column, order):
+    cursor.execute(f'''
+        SELECT s.id, s.group_id, s.study_activity_id, s.created_at as start_time,
+          (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = s.id) as last_activity_time,
+          a.name as activity_name, g.name as group_name,
+          (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = s.id) as review_count
+        FROM study_sessions s
+        JOIN study_activities a ON s.study_activity_id = a.id
+        JOIN groups g ON s.group_id = g.id
+        WHERE s.group_id = ?
+        ORDER BY {sort_column} {order}
+        LIMIT 10 OFFSET 0
+    ''', (1,))
+    rows = cursor.fetchall()
+    for row in rows:
+        if not row['last_activity_time']:
+            cursor.execute('SELECT datetime(?, "+30 minutes")', (row['start_time'],)).fetchone()
+    return rows
+
+def new_listing(cursor, sort_column, order):
+    cursor.execute(f'''
+        SELECT s.id, s.group_id, s.study_activity_id, s.created_at as start_time,
+          st.last_review_at as last_activity_time,
+          a.name as activity_name, g.name as group_name,
+          COALESCE(st.review_count, 0) as review_count
+        FROM study_sessions s
+        JOIN study_activities a ON s.study_activity_id = a.id
+        JOIN groups g ON s.group_id = g.id
+        LEFT JOIN study_session_stats st ON st.study_session_id = s.id
+        WHERE s.group_id = ?
+        ORDER BY {sort_column} {order}
+        LIMIT 10 OFFSET 0
+    ''', (1,))
+    rows = cursor.fetchall()
+    for row in rows:
+        session_end_time(row['start_time'], row['last_activity_time'])
+    return rows
+
+def median_ms(fn, cursor, sort_column, order, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(cursor, sort_column, order)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>10}  {'sort':<16}{'old ms':>10}{'new ms':>10}")
+    for size in args.sizes:
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        connection = build(path, size)
+        cursor = connection.cursor()
+        for label, sort_column, order in [('startTime', 'created_at', 'desc'), ('reviewItemsCount', 'review_count', 'desc')]:
+            old = median_ms(old_listing, cursor, sort_column, order, args.repeat)
+            new = median_ms(new_listing, cursor, sort_column, order, args.repeat)
+            print(f"{size:>10}  {label:<16}{old:>10.2f}{new:>10.2f}")
+        connection.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Throughput of the bulk word import behind POST /words/import.
+
+Builds a database of generated words, then imports a CSV where half of the
+rows repeat stored words with different case and spacing and half are new.
+The first import also keys every generated word (they were written without
+a word_key); the second run repeats the same file, so every row is known.
+
+    python benchmarks/bench_import.py --words 1000000 --rows 200000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.db import connect
+from lib.migrations import run_migrations
+from lib.synthetic import generate
+from lib.word_import import import_words, key_words, read_items
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def build(path, words):
+    connection = connect(path)
+    with open(os.path.join(BASE_DIR, 'schema.sql')) as f:
+        connection.executescript(f.read())
+    run_migrations(connection)
+    generate(connection, words=words, groups=50, sessions=0, reviews=0)
+    return connection
+
+def write_upload(connection, path, rows, seed):
+    rng = random.Random(seed)
+    cursor = connection.cursor()
+    cursor.execute('SELECT french, english FROM words ORDER BY random() LIMIT ?', (rows // 2,))
+    known = [(f' {row[0].upper()} ', row[1].title()) for row in cursor.fetchall()]
+    new = [(f'nouveau{i}', f'new{i}') for i in range(rows - len(known))]
+    words = known + new
+    rng.shuffle(words)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['french', 'english', 'parts', 'group'])
+        for french, english in words:
+            writer.writerow([french, english, '[]', 'Imported'])
+
+def run(connection, path, on_conflict):
+    with open(path, newline='') as f:
+        return import_words(connection.cursor(), read_items(f, 'csv'), on_conflict=on_conflict)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    upload = path + '.csv'
+    connection = build(path, args.words)
+    write_upload(connection, upload, args.rows, args.seed)
+
+    print(f"{'run':>12}{'seconds':>10}{'rows/sec':>12}{'inserted':>10}{'known':>10}{'attached':>10}")
+    for name, on_conflict in (('first', 'update'), ('repeat', 'update'), ('skip', 'skip')):
+        summary = run(connection, upload, on_conflict)
+        known = summary['updated'] + summary['unchanged']
+        print(f"{name:>12}{summary['seconds']:>10.2f}{summary['rows_per_second']:>12}"
+              f"{summary['inserted']:>10}{known:>10}{summary['attached']:>10}")
+
+    # What the first run spent keying the generated words, measured on its own
+    connection.execute('UPDATE words SET word_key = NULL')
+    connection.commit()
+    cursor = connection.cursor()
+    started = time.perf_counter()
+    keyed = key_words(cursor)
+    connection.commit()
+    print(f"keying {keyed} words without a key: {time.perf_counter() - started:.2f}s")
+
+    connection.close()
+    for file in (upload, path, path + '-wal', path + '-shm'):
+        if os.path.exists(file):
+            os.remove(file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Concurrent read/write throughput for each connection profile.
+
+Readers run the dashboard success-rate aggregate while one writer inserts
+review items and commits after each, the same pattern as the review endpoint.
+
+    python benchmarks/bench_pragmas.py --readers 4 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.db import CONNECTION_PROFILES, connect
+
+def seed(path, profile, items):
+    connection = connect(path, profile)
+    with open(os.path.join(os.path.dirname(__file__), '..', 'schema.sql')) as f:
+        connection.executescript(f.read())
+    connection.executemany(
+        'INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)',
+        ((i % 500 + 1, i % 3 != 0) for i in range(items))
+    )
+    connection.execute('INSERT INTO study_sessions (id, group_id, study_activity_id) VALUES (1, 1, 1)')
+    connection.commit()
+    connection.close()
+
+def run(profile, readers, seconds, items):
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    seed(path, profile, items)
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'writes': 0, 'busy': 0}
+    lock = threading.Lock()
+
+    def reader():
+        connection = connect(path, profile)
+        done = 0
+        while not stop.is_set():
+            connection.execute('''
+                SELECT SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*)
+                FROM word_review_items wri
+                JOIN study_sessions ss ON wri.study_session_id = ss.id
+            ''').fetchone()
+            done += 1
+        connection.close()
+        with lock:
+            counts['reads'] += done
+
+    def writer():
+        connection = connect(path, profile)
+        done = busy = 0
+        while not stop.is_set():
+            try:
+                connection.execute(
+                    'INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, 1)',
+                    (done % 500 + 1,)
+                )
+                connection.commit()
+                done += 1
+            except Exception:
+                connection.rollback()
+                busy += 1
+        connection.close()
+        with lock:
+            counts['writes'] += done
+            counts['busy'] += busy
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    return {
+        'profile': profile,
+        'reads_per_sec': counts['reads'] / seconds,
+        'writes_per_sec': counts['writes'] / seconds,
+        'busy_errors': counts['busy']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--items', type=int, default=100000, help='review items seeded before the run')
+    args = parser.parse_args()
+
+    print(f"{'profile':<10}{'reads/s':>12}{'writes/s':>12}{'busy':>8}")
+    for profile in CONNECTION_PROFILES:
+        result = run(profile, args.readers, args.seconds, args.items)
+        print(f"{result['profile']:<10}{result['reads_per_sec']:>12.1f}"
+              f"{result['writes_per_sec']:>12.1f}{result['busy_errors']:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Latency of word search: the FTS5 index behind /words/search against LIKE scans.
+
+The LIKE variant is what a search without the index has to do: a
+'%term%' scan over french, english and parts for the page plus another
+for the total. It is also neither accent- nor case-insensitive for
+non-ASCII letters. Terms are prefixes of generated words, so every
+query has matches.
+
+    python benchmarks/bench_search.py --words 1000000 --queries 50
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.db import connect
+from lib.migrations import run_migrations
+from lib.queries import queries
+from lib.search import match_expression
+from lib.synthetic import generate
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+PER_PAGE = 20
+
+def build(path, words):
+    connection = connect(path)
+    with open(os.path.join(BASE_DIR, 'schema.sql')) as f:
+        connection.executescript(f.read())
+    run_migrations(connection)
+    started = time.perf_counter()
+    generate(connection, words=words, groups=50, sessions=0, reviews=0)
+    return connection, time.perf_counter() - started
+
+def like_search(cursor, term):
+    pattern = f'%{term}%'
+    cursor.execute('''
+        SELECT w.id, w.french, w.english,
+            COALESCE(r.correct_count, 0) AS correct_count,
+            COALESCE(r.wrong_count, 0) AS wrong_count
+        FROM words w
+        LEFT JOIN word_reviews r ON r.word_id = w.id
+        WHERE w.french LIKE ? OR w.english LIKE ? OR w.parts LIKE ?
+        ORDER BY w.id
+        LIMIT ?
+    ''', (pattern, pattern, pattern, PER_PAGE))
+    rows = cursor.fetchall()
+    cursor.execute('SELECT COUNT(*) FROM words WHERE french LIKE ? OR english LIKE ? OR parts LIKE ?',
+                   (pattern, pattern, pattern))
+    return len(rows), cursor.fetchone()[0]
+
+def fts_search(cursor, term):
+    match = match_expression(term)
+    queries.execute(cursor, 'words/search', (match, PER_PAGE, 0))
+    rows = cursor.fetchall()
+    queries.execute(cursor, 'words/search_count', (match,))
+    return len(rows), cursor.fetchone()[0]
+
+def measure(fn, cursor, terms):
+    timings, totals = [], []
+    for term in terms:
+        started = time.perf_counter()
+        _, total = fn(cursor, term)
+        timings.append((time.perf_counter() - started) * 1000)
+        totals.append(total)
+    timings.sort()
+    return statistics.median(timings), timings[min(int(0.99 * len(timings)), len(timings) - 1)], statistics.mean(totals)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    connection, build_seconds = build(path, args.words)
+    cursor = connection.cursor()
+    cursor.execute('SELECT COUNT(*) FROM words_fts')
+    print(f"{cursor.fetchone()[0]} words indexed in {build_seconds:.1f}s (load, indexes and FTS)")
+
+    rng = random.Random(args.seed)
+    print(f"{'prefix':>8}{'like p50':>12}{'like p99':>12}{'fts p50':>12}{'fts p99':>12}{'matches':>10}")
+    for length in (3, 5, 8):
+        terms = []
+        while len(terms) < args.queries:
+            cursor.execute('SELECT french FROM words WHERE id = ?', (rng.randint(1, args.words),))
+            word = cursor.fetchone()[0]
+            if len(word) >= length:
+                terms.append(word[:length])
+        like_p50, like_p99, _ = measure(like_search, cursor, terms)
+        fts_p50, fts_p99, fts_matches = measure(fts_search, cursor, terms)
+        print(f"{length:>8}{like_p50:>12.2f}{like_p99:>12.2f}{fts_p50:>12.2f}{fts_p99:>12.2f}{fts_matches:>10.0f}")
+
+    connection.close()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""
+Load test for every lang-portal API endpoint.
+
+Generates a synthetic dataset with lib/synthetic.py, serves the app on a
+local threaded server and drives each endpoint with concurrent keep-alive clients. Throughput and
+latency percentiles per endpoint are written to a JSON file that can be
+compared with a run from another commit.
+
+    python benchmarks/loadtest.py --words 100000 --sessions 50000 --reviews 1000000 --clients 16 --seconds 20 --output after.json
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --seconds 10   # an already running server
+    python benchmarks/loadtest.py --compare before.json after.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.synthetic import ENGLISH_SYLLABLES, generate, group_of, word_in_group
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Endpoints the load test leaves out, and why. Every other route is driven.
+EXCLUDED = {
+    'reset_study_sessions': 'would empty the dataset mid-run',
+    'reset_metrics': 'would clear the counters being observed',
+    'static': 'served by the web server in production, not the app'
+}
+
+# Rows at the end of each table streamed by one export request
+EXPORT_TAIL = 1000
+
+# name -> (method, path, body) built from a random generator and the dataset sizes
+def endpoints(sizes):
+    words, groups, sessions = sizes['words'], sizes['groups'], sizes['sessions']
+    reviews = sizes.get('reviews', 0)
+    activities = sizes.get('activities', 1)
+    def review(rng, batch=None):
+        session = rng.randint(1, sessions)
+        item = {'word_id': word_in_group(rng, group_of(session, groups), words, groups), 'correct': rng.random() < 0.7}
+        if batch is None:
+            return ('POST', f'/api/study-sessions/{session}/review', item)
+        return ('POST', f'/api/study-sessions/{session}/reviews', {'reviews': [item] * batch})
+    def export(path, rows):
+        return lambda rng: ('GET', f"{path}?format={rng.choice(('ndjson', 'csv'))}&after_id={max(rows - EXPORT_TAIL, 0)}", None)
+    def import_words(rng):
+        # A small fixed vocabulary, so repeated runs mostly match words already imported
+        upload = [{'french': f'essai{i}', 'english': f'trial{i}'} for i in rng.sample(range(1000), 10)]
+        return ('POST', '/words/import?on_conflict=skip&group=Load%20test', upload)
+    return {
+        'words': lambda rng: ('GET', f'/words?page={rng.randint(1, 20)}', None),
+        'words_cursor': lambda rng: ('GET', '/words?cursor=&sort_by=english', None),
+        'word': lambda rng: ('GET', f'/words/{rng.randint(1, words)}', None),
+        'words_search': lambda rng: ('GET', f'/words/search?q={rng.choice(ENGLISH_SYLLABLES)}', None),
+        'words_export': export('/words/export', words),
+        'words_import': import_words,
+        'groups': lambda rng: ('GET', '/groups', None),
+        'group': lambda rng: ('GET', f'/groups/{rng.randint(1, groups)}', None),
+        'group_words': lambda rng: ('GET', f'/groups/{rng.randint(1, groups)}/words?page={rng.randint(1, 5)}', None),
+        'group_words_raw': lambda rng: ('GET', f'/groups/{rng.randint(1, groups)}/words/raw', None),
+        'group_sessions': lambda rng: ('GET', f'/groups/{rng.randint(1, groups)}/study_sessions', None),
+        'groups_export': export('/groups/export', groups),
+        'study_activities': lambda rng: ('GET', '/api/study-activities', None),
+        'study_activity': lambda rng: ('GET', f'/api/study-activities/{rng.randint(1, activities)}', None),
+        'study_activity_sessions': lambda rng: ('GET', f'/api/study-activities/{rng.randint(1, activities)}/sessions', None),
+        'study_activity_launch': lambda rng: ('GET', f'/api/study-activities/{rng.randint(1, activities)}/launch', None),
+        'study_sessions': lambda rng: ('GET', f'/api/study-sessions?page={rng.randint(1, 20)}', None),
+        'study_session': lambda rng: ('GET', f'/api/study-sessions/{rng.randint(1, sessions)}', None),
+        'study_session_next': lambda rng: ('GET', f'/api/study-sessions/{rng.randint(1, sessions)}/next', None),
+        'study_sessions_export': export('/api/study-sessions/export', sessions),
+        'review_items_export': export('/api/study-sessions/review-items/export', reviews),
+        'create_study_session': lambda rng: ('POST', '/api/study-sessions', {
+            'group_id': rng.randint(1, groups), 'study_activity_id': rng.randint(1, activities)
+        }),
+        'create_review': review,
+        'create_reviews': lambda rng: review(rng, batch=10),
+        'dashboard_recent_session': lambda rng: ('GET', '/dashboard/recent-session', None),
+        'dashboard_stats': lambda rng: ('GET', '/dashboard/stats', None),
+        'metrics': lambda rng: ('GET', '/metrics', None),
+    }
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0
+    }
+
+def drive(url, scenarios, clients, seconds, seed):
+    target = urlparse(url)
+    results = {name: ([], [0]) for name in scenarios}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(index):
+        rng = random.Random(seed + index)
+        names = sorted(scenarios)
+        local = {name: ([], 0) for name in names}
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        while not stop.is_set():
+            name = rng.choice(names)
+            method, path, body = scenarios[name](rng)
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                # Every request is valid for the generated data, so 4xx counts as a failure too
+                failed = response.status >= 400
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+                failed = True
+            elapsed = time.perf_counter() - started
+            latencies, errors = local[name]
+            if failed:
+                local[name] = (latencies, errors + 1)
+            else:
+                latencies.append(elapsed)
+        connection.close()
+        with lock:
+            for name, (latencies, errors) in local.items():
+                results[name][0].extend(latencies)
+                results[name][1][0] += errors
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {name: summarize(latencies, errors[0], elapsed) for name, (latencies, errors) in results.items()}
+    everything = [latency for latencies, _ in results.values() for latency in latencies]
+    total = summarize(everything, sum(errors[0] for _, errors in results.values()), elapsed)
+    return report, total
+
+def start_server(args, workdir):
+    # create_app() resets the schema of its database, so it gets a scratch one
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    app = create_app({
+        'DATABASE': os.path.join(workdir, 'loadtest.db'),
+        'DB_POOL_SIZE': args.clients,
+        'RESPONSE_CACHE_TTL': 0 if args.no_cache else 60
+    })
+    with app.app_context():
+        sizes = generate(app.db.get(), args.words, args.groups, args.sessions, args.reviews, args.seed)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', sizes
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'endpoint':<26}{'rps':>20}{'p50 ms':>22}{'p99 ms':>22}")
+    rows = sorted(set(before['endpoints']) & set(after['endpoints'])) + ['total']
+    for name in rows:
+        old = before['total'] if name == 'total' else before['endpoints'][name]
+        new = after['total'] if name == 'total' else after['endpoints'][name]
+        cells = []
+        for key in ('rps', 'p50_ms', 'p99_ms'):
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            cells.append(f'{old[key]:>8} -> {new[key]:<8}{change:+.0f}%'.rjust(22))
+        print(f'{name:<26}' + ''.join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help='drive an already running server instead of starting one')
+    parser.add_argument('--words', type=int, default=10000)
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--sessions', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--only', nargs='+', help='endpoint names to drive (default: all)')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache')
+    parser.add_argument('--output', default='loadtest.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    output = os.path.abspath(args.output)
+    server = None
+    if args.url:
+        url = args.url
+        sizes = {'words': args.words, 'groups': args.groups, 'sessions': args.sessions, 'reviews': args.reviews}
+    else:
+        workdir = tempfile.mkdtemp(prefix='loadtest-')
+        print(f'Building dataset in {workdir} ...')
+        server, url, sizes = start_server(args, workdir)
+
+    scenarios = endpoints(sizes)
+    if args.only:
+        scenarios = {name: scenarios[name] for name in args.only}
+    print(f'Driving {len(scenarios)} endpoints at {url} with {args.clients} clients for {args.seconds}s')
+    report, total = drive(url, scenarios, args.clients, args.seconds, args.seed)
+    if server is not None:
+        server.shutdown()
+
+    result = {
+        'meta': {
+            'commit': git_commit(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'clients': args.clients,
+            'seconds': args.seconds,
+            'cache': not args.no_cache,
+            'dataset': sizes
+        },
+        'endpoints': report,
+        'total': total
+    }
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    print(f"{'endpoint':<26}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in sorted(report.items()) + [('total', total)]:
+        print(f"{name:<26}{stats['rps']:>10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+    print(f'Wrote {output}')
+
+if __name__ == '__main__':
+    main()
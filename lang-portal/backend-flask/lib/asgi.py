@@ -0,0 +1,233 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+# Serves the Flask (WSGI) app from an ASGI server. The event loop owns the
+# sockets, so thousands of idle keep-alive connections cost no threads; only
+# requests being processed take one of `max_workers` threads, which is sized
+# to the database pool so a worker never waits for a connection.
+#
+# Request bodies up to `buffer_size` are read on the loop before dispatch, so
+# a slow client never holds a thread. Larger ones are dispatched once that
+# much has arrived and the app reads the rest as it comes in, so an upload is
+# never held whole. `max_body_size` caps both (None leaves it to the app,
+# e.g. Flask's MAX_CONTENT_LENGTH, which a view can raise for itself).
+
+class AsgiApp:
+  def __init__(self, wsgi_app, max_workers=5, max_pending=1000, max_body_size=None, buffer_size=64 * 1024):
+    self.wsgi_app = wsgi_app
+    self.max_workers = max_workers
+    self.max_pending = max_pending
+    self.max_body_size = max_body_size
+    self.buffer_size = buffer_size
+    self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-worker')
+    self.pending = 0  # requests queued for or running on the pool; only touched by the loop thread
+    self.rejected = 0
+    self.closing = False
+    self._drained = None
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] == 'lifespan':
+      await self._lifespan(receive, send)
+    elif scope['type'] == 'http':
+      await self._http(scope, receive, send)
+    else:
+      raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+  async def _lifespan(self, receive, send):
+    while True:
+      message = await receive()
+      if message['type'] == 'lifespan.startup':
+        await send({'type': 'lifespan.startup.complete'})
+      elif message['type'] == 'lifespan.shutdown':
+        # Refuse new requests, let those in flight (streams included) finish on
+        # the pool, then wait for its threads without blocking the loop
+        self.closing = True
+        if self.pending:
+          self._drained = asyncio.Event()
+          await self._drained.wait()
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+        await send({'type': 'lifespan.shutdown.complete'})
+        return
+
+  async def _http(self, scope, receive, send):
+    # Shed load before reading the body once the queue is as long as allowed
+    if self.pending >= self.max_pending:
+      self.rejected += 1
+      await self._plain_response(send, 503, b'Server busy', [(b'retry-after', b'1')])
+      return
+
+    declared = content_length(scope)
+    if self.max_body_size is not None and declared is not None and declared > self.max_body_size:
+      await self._plain_response(send, 413, b'Request body too large')
+      return
+
+    body = bytearray()
+    more_body = True
+    while more_body and len(body) <= self.buffer_size:
+      message = await receive()
+      if message['type'] == 'http.disconnect':
+        return
+      body += message.get('body', b'')
+      more_body = message.get('more_body', False)
+      if self.max_body_size is not None and len(body) > self.max_body_size:
+        await self._plain_response(send, 413, b'Request body too large')
+        return
+
+    # Checked once the body is in, so nothing is queued after shutdown began
+    if self.closing:
+      await self._plain_response(send, 503, b'Server shutting down', [(b'connection', b'close')])
+      return
+
+    loop = asyncio.get_running_loop()
+    if more_body:
+      stream = io.BufferedReader(_RequestBody(bytes(body), receive, loop, self.max_body_size))
+    else:
+      stream = io.BytesIO(bytes(body))
+    self.pending += 1
+    try:
+      status, headers, chunks = await loop.run_in_executor(
+        self.executor, self._run, build_environ(scope, stream, len(body) if not more_body else None)
+      )
+      await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+      if isinstance(chunks, (list, tuple)):
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+        return
+      # Streamed responses are produced on the pool one chunk at a time
+      try:
+        while True:
+          chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+          if chunk is None:
+            break
+          if chunk:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+      finally:
+        if hasattr(chunks, 'close'):
+          await loop.run_in_executor(self.executor, chunks.close)
+    finally:
+      self.pending -= 1
+      if self._drained is not None and not self.pending:
+        self._drained.set()
+
+  def _run(self, environ):
+    response = {}
+    def start_response(status, headers, exc_info=None):
+      response['status'] = int(status.split(' ', 1)[0])
+      response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    result = self.wsgi_app(environ, start_response)
+    chunks = iter(result)
+    # Pulling the first chunk makes sure start_response has been called
+    first = next(chunks, None)
+    if any(name == b'content-length' for name, _ in response['headers']):
+      # Buffered response: collect it here instead of one pool round trip per chunk
+      try:
+        body = ([first] if first is not None else []) + list(chunks)
+      finally:
+        if hasattr(result, 'close'):
+          result.close()
+      return response['status'], response['headers'], body
+    return response['status'], response['headers'], _Chained(first, chunks, result)
+
+  async def _plain_response(self, send, status, body, headers=()):
+    await send({
+      'type': 'http.response.start',
+      'status': status,
+      'headers': [(b'content-type', b'text/plain'), (b'content-length', str(len(body)).encode())] + list(headers)
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+class _RequestBody(io.RawIOBase):
+  # wsgi.input for a body still arriving: the worker thread pulls the rest
+  # from the ASGI receive channel, one message at a time
+  def __init__(self, received, receive, loop, max_body_size=None):
+    self._chunk = memoryview(received)
+    self._receive = receive
+    self._loop = loop
+    self._max_body_size = max_body_size
+    self._size = len(received)
+    self._more = True
+
+  def readable(self):
+    return True
+
+  def readinto(self, buffer):
+    while not self._chunk and self._more:
+      message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+      if message['type'] == 'http.disconnect':
+        raise ClientDisconnected()
+      self._chunk = memoryview(message.get('body', b''))
+      self._more = message.get('more_body', False)
+      self._size += len(self._chunk)
+      if self._max_body_size is not None and self._size > self._max_body_size:
+        raise RequestEntityTooLarge()
+    size = min(len(buffer), len(self._chunk))
+    buffer[:size] = self._chunk[:size]
+    self._chunk = self._chunk[size:]
+    return size
+
+class _Chained:
+  # Iterator over an already started WSGI iterable that still closes the original
+  def __init__(self, first, rest, result):
+    self._first = first
+    self._rest = rest
+    self._result = result
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    if self._first is not None:
+      first, self._first = self._first, None
+      return first
+    return next(self._rest)
+
+  def close(self):
+    if hasattr(self._result, 'close'):
+      self._result.close()
+
+def content_length(scope):
+  for name, value in scope.get('headers', []):
+    if name.lower() == b'content-length':
+      try:
+        return int(value)
+      except ValueError:
+        return None
+  return None
+
+def build_environ(scope, body, body_size=None):
+  # body: a readable stream; body_size: its length when it has all arrived
+  server = scope.get('server') or ('localhost', 80)
+  client = scope.get('client') or ('', 0)
+  environ = {
+    'REQUEST_METHOD': scope['method'],
+    'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+    # WSGI carries the path as latin-1 decoded bytes
+    'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+    'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+    'SERVER_NAME': server[0],
+    'SERVER_PORT': str(server[1]),
+    'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+    'REMOTE_ADDR': client[0],
+    'REMOTE_PORT': str(client[1]),
+    'wsgi.version': (1, 0),
+    'wsgi.url_scheme': scope.get('scheme', 'http'),
+    'wsgi.input': body,
+    # The body ends where the client's does, so the app may read one sent without a Content-Length
+    'wsgi.input_terminated': True,
+    'wsgi.errors': sys.stderr,
+    'wsgi.multithread': True,
+    'wsgi.multiprocess': False,
+    'wsgi.run_once': False
+  }
+  for name, value in scope.get('headers', []):
+    name = name.decode('latin-1').upper().replace('-', '_')
+    value = value.decode('latin-1')
+    key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+    environ[key] = f'{environ[key]},{value}' if key in environ else value
+  if 'CONTENT_LENGTH' not in environ and body_size:
+    environ['CONTENT_LENGTH'] = str(body_size)
+  return environ
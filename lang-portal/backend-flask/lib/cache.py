@@ -0,0 +1,145 @@
+import ctypes
+import functools
+import hashlib
+import multiprocessing
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import Response, make_response, request
+
+class TableVersions:
+  # Per-table counters bumped by write endpoints. Cache keys include the
+  # versions of the tables a response was built from, so a bump makes every
+  # dependent entry unreachable without having to find and delete it.
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._versions = {}
+
+  def get(self, tables):
+    with self._lock:
+      return tuple(self._versions.get(table, 0) for table in tables)
+
+  def bump(self, *tables):
+    with self._lock:
+      for table in tables:
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+class SharedTableVersions(TableVersions):
+  # Counters in shared memory, created before the server forks its workers, so a
+  # write handled by one worker process invalidates the cache of every worker.
+  # Tables hash into a fixed number of slots; a collision only costs an extra miss.
+  SLOTS = 256
+
+  def __init__(self):
+    self._lock = multiprocessing.Lock()
+    self._counters = multiprocessing.RawArray(ctypes.c_uint64, self.SLOTS)
+
+  def _slot(self, table):
+    return zlib.crc32(table.encode('utf-8')) % self.SLOTS
+
+  def get(self, tables):
+    return tuple(self._counters[self._slot(table)] for table in tables)
+
+  def bump(self, *tables):
+    with self._lock:
+      for table in tables:
+        self._counters[self._slot(table)] += 1
+
+class ResponseCache:
+  def __init__(self, max_entries=512, max_bytes=8 * 1024 * 1024, ttl=60):
+    self.max_entries = max_entries
+    self.max_bytes = max_bytes
+    self.ttl = ttl
+    self.versions = TableVersions()
+
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()  # key -> (body, mimetype, etag, expires_at)
+    self._bytes = 0
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def invalidate(self, *tables):
+    self.versions.bump(*tables)
+
+  def share_versions(self):
+    # Call before forking worker processes; cached entries stay per process
+    self.versions = SharedTableVersions()
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._bytes = 0
+
+  def get(self, key):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[3] < time.monotonic():
+        if entry is not None:
+          self._remove(key)
+        self.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry
+
+  def put(self, key, body, mimetype):
+    if len(body) > self.max_bytes:
+      return None
+    entry = (body, mimetype, hashlib.sha1(body).hexdigest(), time.monotonic() + self.ttl)
+    with self._lock:
+      if key in self._entries:
+        self._remove(key)
+      self._entries[key] = entry
+      self._bytes += len(body)
+      # Evict least recently used entries until both bounds hold
+      while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+        self._remove(next(iter(self._entries)))
+        self.evictions += 1
+    return entry
+
+  def stats(self):
+    with self._lock:
+      return {
+        'entries': len(self._entries),
+        'bytes': self._bytes,
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions
+      }
+
+  def _remove(self, key):
+    body = self._entries.pop(key)[0]
+    self._bytes -= len(body)
+
+  def cached(self, *tables):
+    # Cache successful GET responses of a view until one of `tables` is written
+    def decorator(view):
+      @functools.wraps(view)
+      def wrapper(*args, **kwargs):
+        if self.ttl <= 0 or request.method != 'GET':
+          return view(*args, **kwargs)
+
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), tables, self.versions.get(tables))
+        entry = self.get(key)
+        status = 'HIT'
+        if entry is None:
+          response = make_response(view(*args, **kwargs))
+          if response.status_code != 200 or response.direct_passthrough:
+            return response
+          entry = self.put(key, response.get_data(), response.mimetype)
+          if entry is None:
+            return response
+          status = 'MISS'
+
+        body, mimetype, etag, _ = entry
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['X-Cache'] = status
+        # Answers If-None-Match with an empty 304
+        return response.make_conditional(request)
+      return wrapper
+    return decorator
@@ -0,0 +1,100 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from flask import make_response, request
+
+from lib.queries import queries
+
+ACL_ORIGIN = 'Access-Control-Allow-Origin'
+
+def origin_of(url):
+  # https://Example.com:443/app -> https://example.com, the form browsers send
+  parts = urlsplit(url.strip())
+  if not parts.scheme or not parts.hostname:
+    return None
+  scheme = parts.scheme.lower()
+  host = parts.hostname.lower()
+  if ':' in host:
+    host = f'[{host}]'
+  if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+    host = f'{host}:{parts.port}'
+  return f'{scheme}://{host}'
+
+class AllowedOrigins:
+  # The origins of every study activity URL, read once and kept as a frozenset
+  # so matching a request is one set lookup. The set is rebuilt when the
+  # response cache's version of study_activities changes (the same bump that
+  # invalidates cached responses), or after `ttl` seconds for edits made
+  # outside the API.
+  TABLES = ('study_activities',)
+
+  def __init__(self, app, extra_origins=(), methods=('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'),
+               allow_headers=('Content-Type', 'Authorization'), ttl=60):
+    self.app = app
+    self.extra_origins = frozenset(origin_of(origin) for origin in extra_origins)
+    self.ttl = ttl
+    self.origins = frozenset()
+    self.allow_all = True
+    self.refreshes = 0
+    self._version = None
+    self._loaded_at = 0.0
+    self._lock = threading.Lock()
+    # Preflight answers only differ by the echoed origin, so the rest is built once
+    self._preflight_headers = {
+      'Access-Control-Allow-Methods': ', '.join(methods),
+      'Access-Control-Allow-Headers': ', '.join(allow_headers)
+    }
+
+  def load(self):
+    try:
+      cursor = self.app.db.cursor()
+      queries.execute(cursor, 'study_activities/activity_urls')
+      found = {origin_of(row['url']) for row in cursor.fetchall() if row['url']}
+    except Exception:
+      found = set()  # Fall back to allowing every origin, as before
+    found.discard(None)
+    return frozenset(found)
+
+  def refresh(self):
+    version = self.app.cache.versions.get(self.TABLES)
+    origins = self.load()
+    with self._lock:
+      self.origins = origins | self.extra_origins if origins else frozenset()
+      self.allow_all = not origins
+      self._version = version
+      self._loaded_at = time.monotonic()
+      self.refreshes += 1
+
+  def _current(self):
+    if (self._version != self.app.cache.versions.get(self.TABLES)
+        or time.monotonic() - self._loaded_at > self.ttl):
+      self.refresh()
+
+  def allowed(self, origin):
+    self._current()
+    return self.allow_all or origin in self.origins
+
+  def init_app(self, app):
+    app.before_request(self._preflight)
+    app.after_request(self._add_headers)
+
+  def _preflight(self):
+    origin = request.headers.get('Origin')
+    if (request.method != 'OPTIONS' or origin is None
+        or 'Access-Control-Request-Method' not in request.headers or not self.allowed(origin)):
+      return None
+    response = make_response('', 200)
+    response.headers.update(self._preflight_headers)
+    response.headers[ACL_ORIGIN] = origin
+    response.vary.add('Origin')
+    return response
+
+  def _add_headers(self, response):
+    origin = request.headers.get('Origin')
+    # The only CORS policy: routes set no headers of their own
+    if origin is None or not self.allowed(origin):
+      return response
+    response.headers[ACL_ORIGIN] = origin
+    response.vary.add('Origin')
+    return response
@@ -1,19 +1,70 @@
 import sqlite3
 import json
+import time
+import weakref
 from flask import g, current_app
 
+from lib.groups import restore_count_triggers, suspend_count_triggers
+from lib.json_stream import iter_json_array
+from lib.migrations import run_migrations
+from lib.pool import ConnectionPool
+from lib.profiling import ProfiledCursor
+from lib.queries import queries
+from lib.search import reindex_words, suspend_index_triggers
+
+# Named PRAGMA profiles applied to every new connection
+CONNECTION_PROFILES = {
+  # SQLite defaults: rollback journal, synchronous=FULL, 2 MB page cache
+  'default': {},
+  # Readers no longer block on writers and commits skip the per-transaction fsync
+  'wal': {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,      # negative means KiB, so 64 MB
+    'mmap_size': 268435456,    # 256 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000       # ms to wait on a locked database
+  }
+}
+
+def connect(database, profile='wal', check_same_thread=True, cached_statements=256):
+  if profile not in CONNECTION_PROFILES:
+    raise ValueError(f"Unknown connection profile: {profile}")
+
+  connection = sqlite3.connect(
+    database,
+    detect_types=sqlite3.PARSE_DECLTYPES,
+    check_same_thread=check_same_thread,
+    # Prepared statements kept per connection, keyed by SQL text (sqlite3 defaults to 128)
+    cached_statements=cached_statements
+  )
+  connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+  for pragma, value in CONNECTION_PROFILES[profile].items():
+    connection.execute(f'PRAGMA {pragma} = {value}')
+  return connection
+
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', profile='wal', pool_size=5, pool_timeout=10.0, cached_statements=256, profiler=None,
+               export_pool_size=2):
     self.database = database
+    self.profile = profile
+    self.cached_statements = cached_statements
+    self.profiler = profiler  # QueryProfiler timing every statement run through cursor()
     self.connection = None
+    self.pool = ConnectionPool(self.connect, size=pool_size, timeout=pool_timeout)
+    # A streamed export holds its connection until the client has read the
+    # whole body, so exports get a few connections of their own and a slow
+    # reader never takes one from the requests. No waiting: a full pool is a 503.
+    self.export_pool = ConnectionPool(self.connect, size=export_pool_size, timeout=0)
+
+  def connect(self):
+    # Pooled connections move between worker threads, one holder at a time
+    return connect(self.database, self.profile, check_same_thread=False, cached_statements=self.cached_statements)
 
   def get(self):
+    # Check a connection out of the pool once per app context
     if 'db' not in g:
-      g.db = sqlite3.connect(
-        self.database,
-        detect_types=sqlite3.PARSE_DECLTYPES
-      )
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      g.db = self.pool.acquire()
     return g.db
 
   def commit(self):
@@ -22,23 +73,47 @@ class Db:
   def cursor(self):
     # Ensure the connection is valid before getting a cursor
     connection = self.get()
+    if self.profiler is not None:
+      cursor = ProfiledCursor(connection.cursor(), self.profiler)
+      # Flushed at teardown, so no sample waits for the garbage collector
+      g.setdefault('profiled_cursors', weakref.WeakSet()).add(cursor)
+      return cursor
     return connection.cursor()
 
+  def export_cursor(self):
+    # A cursor on an export connection, outside g: the streamed body releases
+    # it to export_pool once it is finished or closed
+    cursor = self.export_pool.acquire().cursor()
+    if self.profiler is not None:
+      return ProfiledCursor(cursor, self.profiler)
+    return cursor
+
   def close(self):
+    # Return the connection to the pool instead of closing it
+    for cursor in list(g.pop('profiled_cursors', ())):
+      cursor.flush()
     db = g.pop('db', None)
     if db is not None:
-      db.close()
+      self.pool.release(db)
+
+  def dispose(self):
+    self.pool.close()
+    self.export_pool.close()
 
-  # Function to load SQL from a file
+  # Function to load SQL from a file, read once by the query registry
   def sql(self, filepath):
-    with open('sql/' + filepath, 'r') as file:
-      return file.read()
+    return queries.get(filepath)
 
   # Function to load the words from a JSON file
   def load_json(self, filepath):
     with open(filepath, 'r') as file:
       return json.load(file)
 
+  # Stream the items of a JSON array file without loading all of it
+  def iter_json(self, filepath):
+    with open(filepath, 'r', encoding='utf-8') as file:
+      yield from iter_json_array(file)
+
   def setup_tables(self,cursor):
     # Create the necessary tables
     cursor.execute(self.sql('setup/create_table_words.sql'))
@@ -63,60 +138,72 @@ class Db:
     self.get().commit()
 
   def import_study_activities_json(self,cursor,data_json_path):
-    study_actvities = self.load_json(data_json_path)
-    for activity in study_actvities:
-      cursor.execute('''
-      INSERT INTO study_activities (name,url,preview_url) VALUES (?,?,?)
-      ''', (activity['name'],activity['url'],activity['preview_url'],))
+    study_actvities = self.iter_json(data_json_path)
+    cursor.executemany('''
+    INSERT INTO study_activities (name,url,preview_url) VALUES (?,?,?)
+    ''', ((activity['name'],activity['url'],activity['preview_url']) for activity in study_actvities))
     self.get().commit()
 
   def import_word_json(self,cursor,group_name,data_json_path):
-      # Insert a new group
-      cursor.execute('''
-        INSERT INTO groups (name) VALUES (?)
-      ''', (group_name,))
-      self.get().commit()
-
-      # Get the ID of the group
-      cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-      core_verbs_group_id = cursor.fetchone()[0]
-
-      # Insert some sample words (verbs) from JSON file and associate with the group
-      words = self.load_json(data_json_path)
-
-      for word in words:
-        # Insert the word into the words table
+      started = time.perf_counter()
+      connection = self.get()
+
+      # Load the whole file in one write transaction so a failure leaves no partial group
+      if connection.in_transaction:
+        connection.commit()
+      cursor.execute('BEGIN IMMEDIATE')
+      try:
+        # Insert a new group
         cursor.execute('''
-          INSERT INTO words (french, english, parts) VALUES (?, ?, ?, ?)
-        ''', (word['french'], word['english'], json.dumps(word['parts'])))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
+          INSERT INTO groups (name) VALUES (?)
+        ''', (group_name,))
+        group_id = cursor.lastrowid
+
+        # Every word inserted below gets an id above the current maximum
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM words')
+        last_existing_id = cursor.fetchone()[0]
+        # The search index is filled once after the load instead of per row
+        trigger_sql = suspend_index_triggers(cursor)
+
+        # Stream the words from the JSON file straight into a single executemany
+        words = self.iter_json(data_json_path)
+        cursor.executemany('''
+          INSERT INTO words (french, english, parts) VALUES (?, ?, ?)
+        ''', ((word['french'], word['english'], json.dumps(word['parts'])) for word in words))
+        words_count = cursor.rowcount
+        reindex_words(cursor, trigger_sql, after_id=last_existing_id)
+
+        # Associate all of the new words with the group in one statement,
+        # without the per-row counter triggers
+        count_trigger_sql = suspend_count_triggers(cursor)
+        cursor.execute('''
+          INSERT INTO word_groups (word_id, group_id)
+          SELECT id, ? FROM words WHERE id > ?
+        ''', (group_id, last_existing_id))
 
-        # Insert the word-group relationship into word_groups table
+        # We already know how many words went in, no need to count them again
         cursor.execute('''
-          INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, core_verbs_group_id))
-      self.get().commit()
-
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
+          UPDATE groups SET words_count = ? WHERE id = ?
+        ''', (words_count, group_id))
+        restore_count_triggers(cursor, count_trigger_sql)
 
-      self.get().commit()
+        connection.commit()
+      except Exception:
+        connection.rollback()
+        raise
 
-      print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
+      elapsed = time.perf_counter() - started
+      rate = words_count / elapsed if elapsed > 0 else 0
+      print(f"Successfully added {words_count} words to the '{group_name}' group "
+            f"in {elapsed:.2f}s ({rate:.0f} rows/sec).")
+      return words_count
 
   # Initialize the database with sample data
   def init(self, app):
     with app.app_context():
       cursor = self.cursor()
       self.setup_tables(cursor)
+      run_migrations(self.get())
       self.import_word_json(
         cursor=cursor,
         group_name='Core Verbs',
@@ -135,11 +222,11 @@ class Db:
 
 def get_db():
     if 'db' not in g:
-        g.db = sqlite3.connect(
+        g.db = connect(
             current_app.config['DATABASE'],
-            detect_types=sqlite3.PARSE_DECLTYPES
+            current_app.config.get('DB_PROFILE', 'wal'),
+            cached_statements=current_app.config.get('DB_CACHED_STATEMENTS', 256)
         )
-        g.db.row_factory = sqlite3.Row
 
     return g.db
 
@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+
+from flask import Response, current_app, jsonify
+
+from lib.pool import PoolExhausted
+from lib.queries import queries
+
+# Streaming exports. The query is executed before the response is returned,
+# so a bad query still becomes an ordinary error response, and its rows are
+# then stepped through EXPORT_CHUNK_ROWS at a time while the body is sent.
+# Only one chunk is held in memory however large the table is, and the first
+# bytes go out as soon as SQLite produces the first rows. Export queries read
+# in primary key order so SQLite never has to sort the whole result first.
+#
+# The query runs on a connection from Db.export_pool rather than the request
+# pool: the body holds it for as long as the client takes to read, and a few
+# slow readers must not leave the other requests without connections. The
+# body releases it once it is finished or closed. When every export
+# connection is busy the export is refused with a 503 straight away. The body
+# runs without a request context (and under lib/asgi on whichever pool thread
+# sends the next chunk), so it only touches the cursor. The export is a
+# single SELECT, so it sees one consistent snapshot.
+
+EXPORT_CHUNK_ROWS = 1000
+
+FORMATS = {
+  'ndjson': 'application/x-ndjson',
+  'csv': 'text/csv; charset=utf-8'
+}
+
+def columns_of(cursor):
+  return [column[0] for column in cursor.description]
+
+def iter_chunks(cursor, chunk_size=EXPORT_CHUNK_ROWS):
+  while True:
+    rows = cursor.fetchmany(chunk_size)
+    if not rows:
+      return
+    yield rows
+
+# One encoder for every row; json.dumps() with options builds a new one per call
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+def _decoder(json_columns):
+  # Columns stored as JSON text are nested in the output rather than quoted
+  def decode(column, value):
+    if column in json_columns and value is not None:
+      try:
+        return json.loads(value)
+      except ValueError:
+        return value
+    return value
+  return decode
+
+def ndjson_chunks(cursor, json_columns=(), chunk_size=EXPORT_CHUNK_ROWS):
+  # One JSON object per line
+  columns = columns_of(cursor)
+  decode = _decoder(json_columns)
+  for rows in iter_chunks(cursor, chunk_size):
+    if json_columns:
+      rows = [{column: decode(column, value) for column, value in zip(columns, row)} for row in rows]
+    else:
+      rows = [dict(zip(columns, row)) for row in rows]
+    yield ('\n'.join(map(_dumps, rows)) + '\n').encode('utf-8')
+
+def csv_chunks(cursor, chunk_size=EXPORT_CHUNK_ROWS):
+  # Header line, then the rows as they come
+  buffer = io.StringIO()
+  writer = csv.writer(buffer, lineterminator='\n')
+  writer.writerow(columns_of(cursor))
+  for rows in iter_chunks(cursor, chunk_size):
+    writer.writerows(rows)
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+  if buffer.tell():
+    yield buffer.getvalue().encode('utf-8')
+
+def export_format(args):
+  # None when ?format= names something we cannot produce
+  name = args.get('format', 'ndjson').lower()
+  return name if name in FORMATS else None
+
+def streamed(db, connection, chunks):
+  # Generator body that owns its export connection until it is done
+  def body():
+    try:
+      yield None
+      yield from chunks
+    finally:
+      db.export_pool.release(connection)
+
+  # Run up to the try, so closing the body before the first chunk still releases
+  body = body()
+  next(body)
+  return body
+
+def export_response(query, params, name, format, json_columns=()):
+  # query: the name of an export query, run with params on an export connection
+  db = current_app.db
+  try:
+    cursor = db.export_cursor()
+  except PoolExhausted:
+    return jsonify({"error": "Too many exports in progress"}), 503, {'Retry-After': '1'}
+  try:
+    queries.execute(cursor, query, params)
+  except Exception:
+    db.export_pool.release(cursor.connection)
+    raise
+
+  if format == 'csv':
+    chunks = csv_chunks(cursor)
+  else:
+    chunks = ndjson_chunks(cursor, json_columns)
+  response = Response(streamed(db, cursor.connection, chunks), content_type=FORMATS[format])
+  response.headers['Content-Disposition'] = f'attachment; filename="{name}.{format}"'
+  return response
@@ -0,0 +1,46 @@
+# groups.words_count is a counter cache of the word_groups rows of each group.
+# The word_groups_count_* triggers (migration 008) keep it exact on every
+# insert, delete and move. Offline loaders and large imports suspend them, the
+# way FTS triggers are suspended in lib/search.py, and recount the groups they
+# touched once. Dropping a trigger changes the schema and invalidates every
+# prepared statement, so it is not worth it for a few rows.
+
+def suspend_count_triggers(cursor):
+  # Must run inside the loader's write transaction
+  cursor.execute('''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name = 'word_groups' AND name LIKE 'word_groups_count_%'
+  ''')
+  triggers = cursor.fetchall()
+  for trigger in triggers:
+    cursor.execute(f'DROP TRIGGER "{trigger["name"]}"')
+  return [trigger['sql'] for trigger in triggers]
+
+def recount_groups(cursor, group_ids_sql=None):
+  # Set words_count from word_groups, for every group or those group_ids_sql selects
+  where = f'WHERE id IN ({group_ids_sql})' if group_ids_sql else ''
+  cursor.execute(f'''
+    UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id)
+    {where}
+  ''')
+  return cursor.rowcount
+
+def restore_count_triggers(cursor, trigger_sql, group_ids_sql=None):
+  # Recount the groups the loader touched while the triggers were off (unless
+  # it set their counts itself), then put the triggers back
+  if group_ids_sql:
+    recount_groups(cursor, group_ids_sql)
+  for sql in trigger_sql:
+    cursor.execute(sql)
+
+def rebuild_group_counts(cursor):
+  return recount_groups(cursor)
+
+def check_group_counts(cursor):
+  # Groups whose stored count differs from their word_groups rows
+  cursor.execute('''
+    SELECT id, words_count, (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id) AS actual
+    FROM groups
+    WHERE words_count IS NOT (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id)
+  ''')
+  return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
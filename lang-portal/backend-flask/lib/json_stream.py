@@ -0,0 +1,71 @@
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+# What may still follow a number cut at the end of the buffer, e.g. '1' of '1.5e3'
+_number_tail = re.compile(r'[0-9.eE+-]*')
+
+def iter_json_array(file, chunk_size=65536):
+  # Yield the items of a top-level JSON array one at a time.
+  # Only the current chunk and the item being decoded are held in memory.
+  buffer = ''
+  position = 0
+  eof = False
+  started = False
+
+  def fill():
+    nonlocal buffer, position, eof
+    chunk = file.read(chunk_size)
+    if not chunk:
+      eof = True
+      return False
+    # Drop everything already consumed before growing the buffer
+    buffer = buffer[position:] + chunk
+    position = 0
+    return True
+
+  def skip_whitespace():
+    nonlocal position
+    while True:
+      while position < len(buffer) and buffer[position] in _whitespace:
+        position += 1
+      if position < len(buffer) or not fill():
+        return
+
+  skip_whitespace()
+  if position >= len(buffer) or buffer[position] != '[':
+    raise ValueError("Expected a JSON array")
+  position += 1
+
+  while True:
+    skip_whitespace()
+    if position >= len(buffer):
+      raise ValueError("Unterminated JSON array")
+
+    char = buffer[position]
+    if char == ']':
+      return
+    if started:
+      if char != ',':
+        raise ValueError(f"Expected ',' or ']' at offset {position}")
+      position += 1
+      skip_whitespace()
+
+    # Decode the next item, reading more input until it is complete
+    while True:
+      try:
+        item, end = _decoder.raw_decode(buffer, position)
+      except json.JSONDecodeError:
+        if not eof and fill():
+          continue
+        raise
+      # A number decoded up to or just short of the end of the buffer ('1' of
+      # '1.5', '2' of '2e3') may continue in the next chunk: decode it again
+      if not eof and _number_tail.fullmatch(buffer, end) and fill():
+        continue
+      break
+
+    position = end
+    started = True
+    yield item
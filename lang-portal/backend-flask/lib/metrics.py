@@ -0,0 +1,166 @@
+import bisect
+import math
+import threading
+import time
+
+from flask import request
+
+# Fixed-bucket histograms and Prometheus text exposition helpers.
+# Observing is a bisect and two additions; callers hold their own lock.
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class Histogram:
+  def __init__(self, buckets=DURATION_BUCKETS):
+    self.buckets = tuple(buckets)
+    self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+  def quantile(self, q):
+    # Linear interpolation inside the bucket holding the q-th observation,
+    # the same estimate Prometheus' histogram_quantile() makes
+    if self.count == 0:
+      return 0.0
+    rank = q * self.count
+    seen = 0
+    for i, bucket_count in enumerate(self.counts):
+      if seen + bucket_count >= rank and bucket_count:
+        if i == len(self.buckets):
+          return self.buckets[-1]
+        lower = self.buckets[i - 1] if i else 0.0
+        return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+      seen += bucket_count
+    return self.buckets[-1]
+
+def _escape(value):
+  return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(labels):
+  if not labels:
+    return ''
+  return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+def _number(value):
+  if isinstance(value, float) and math.isinf(value):
+    return '+Inf'
+  return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_metric(name, kind, help_text, samples):
+  # samples: iterable of (labels, value) where labels is a tuple of (key, value) pairs
+  lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+  for labels, value in samples:
+    lines.append(f'{name}{format_labels(labels)} {_number(value)}')
+  return lines
+
+def render_histogram(name, help_text, series):
+  # series: iterable of (labels, Histogram)
+  lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+  for labels, histogram in series:
+    cumulative = 0
+    for bound, bucket_count in zip(histogram.buckets + (math.inf,), histogram.counts):
+      cumulative += bucket_count
+      lines.append(f'{name}_bucket{format_labels(labels + (("le", _number(float(bound))),))} {cumulative}')
+    lines.append(f'{name}_sum{format_labels(labels)} {_number(histogram.sum)}')
+    lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+  return lines
+
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608)
+QUANTILES = (0.5, 0.95, 0.99)
+
+class RequestMetrics:
+  # Per-endpoint request latency, response size and status counters, plus the
+  # number of requests currently being served
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.in_flight = 0
+    self.reset()
+
+  def reset(self):
+    # Requests being served right now still finish, so in_flight is kept
+    with self._lock:
+      self._latency = {}   # endpoint -> Histogram of seconds
+      self._sizes = {}     # endpoint -> Histogram of response bytes
+      self._statuses = {}  # (endpoint, method, status) -> count
+
+  def init_app(self, app):
+    app.before_request(self._before_request)
+    app.after_request(self._after_request)
+    app.teardown_request(self._teardown_request)
+
+  def _before_request(self):
+    request.environ['lang_portal.started'] = time.perf_counter()
+    with self._lock:
+      self.in_flight += 1
+
+  def _after_request(self, response):
+    started = request.environ.get('lang_portal.started')
+    if started is None:
+      return response
+    endpoint = request.endpoint or 'unmatched'
+    elapsed = time.perf_counter() - started
+    # Streamed responses have no length up front and are left out of the sizes
+    size = None if response.is_streamed else response.content_length
+    with self._lock:
+      latency = self._latency.get(endpoint)
+      if latency is None:
+        latency = self._latency[endpoint] = Histogram()
+      latency.observe(elapsed)
+      if size is not None:
+        sizes = self._sizes.get(endpoint)
+        if sizes is None:
+          sizes = self._sizes[endpoint] = Histogram(SIZE_BUCKETS)
+        sizes.observe(size)
+      key = (endpoint, request.method, response.status_code)
+      self._statuses[key] = self._statuses.get(key, 0) + 1
+    return response
+
+  def _teardown_request(self, exception=None):
+    # Runs even when the view raised, so in_flight never drifts upwards
+    if request.environ.pop('lang_portal.started', None) is not None:
+      with self._lock:
+        self.in_flight -= 1
+
+  def totals(self):
+    # (completed requests, 5xx responses) since the last reset
+    with self._lock:
+      requests = sum(self._statuses.values())
+      errors = sum(count for (_, _, status), count in self._statuses.items() if status >= 500)
+    return requests, errors
+
+  def percentiles(self, endpoint):
+    with self._lock:
+      latency = self._latency.get(endpoint)
+      return {q: latency.quantile(q) if latency else 0.0 for q in QUANTILES}
+
+  def render(self):
+    with self._lock:
+      latency = sorted(self._latency.items())
+      lines = render_histogram(
+        'http_request_duration_seconds', 'Request latency by endpoint',
+        [((('endpoint', endpoint),), histogram) for endpoint, histogram in latency]
+      )
+      lines += render_metric(
+        'http_request_duration_quantile_seconds', 'gauge', 'Latency percentiles estimated from the histogram buckets',
+        [((('endpoint', endpoint), ('quantile', str(q))), histogram.quantile(q))
+         for endpoint, histogram in latency for q in QUANTILES]
+      )
+      lines += render_histogram(
+        'http_response_size_bytes', 'Response body size by endpoint',
+        [((('endpoint', endpoint),), histogram) for endpoint, histogram in sorted(self._sizes.items())]
+      )
+      lines += render_metric(
+        'http_requests_total', 'counter', 'Completed requests by endpoint, method and status',
+        [((('endpoint', endpoint), ('method', method), ('status', status)), count)
+         for (endpoint, method, status), count in sorted(self._statuses.items())]
+      )
+      lines += render_metric(
+        'http_requests_in_flight', 'gauge', 'Requests currently being served',
+        [((), self.in_flight)]
+      )
+    return lines
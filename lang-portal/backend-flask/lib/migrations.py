@@ -0,0 +1,65 @@
+import os
+
+from lib.schedule import rebuild_schedule
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'migrations')
+
+# Backfills derive data with Python code that must stay the only copy of its
+# rules (006: the schedule, from lib/schedule). That code follows the current
+# schema, so a backfill runs once every pending migration is applied, never
+# in the middle of them. It is recorded as 'backfill:<version>' in its own
+# transaction, so one that failed runs again next time.
+BACKFILLS = {
+  '006_word_schedule': rebuild_schedule
+}
+
+def pending_migrations(connection, migrations_dir=MIGRATIONS_DIR):
+  connection.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version TEXT PRIMARY KEY,
+      applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+  ''')
+  applied = {row[0] for row in connection.execute('SELECT version FROM schema_migrations')}
+  files = sorted(f for f in os.listdir(migrations_dir) if f.endswith('.sql'))
+  return [f for f in files if f[:-len('.sql')] not in applied]
+
+def run_migrations(connection, migrations_dir=MIGRATIONS_DIR, backfills=BACKFILLS):
+  # Apply every migration not yet recorded in schema_migrations, in filename order
+  applied = []
+  for migration_file in pending_migrations(connection, migrations_dir):
+    version = migration_file[:-len('.sql')]
+    with open(os.path.join(migrations_dir, migration_file)) as f:
+      migration_sql = f.read()
+
+    # The migration and its bookkeeping row commit together or not at all
+    connection.commit()
+    try:
+      connection.executescript('BEGIN;\n' + migration_sql)
+      connection.execute('INSERT INTO schema_migrations (version) VALUES (?)', (version,))
+      connection.commit()
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+    applied.append(version)
+
+  run_backfills(connection, backfills)
+  return applied
+
+def run_backfills(connection, backfills=BACKFILLS):
+  # Backfills of applied migrations that have not run yet, against the current schema
+  recorded = {row[0] for row in connection.execute('SELECT version FROM schema_migrations')}
+  for version, backfill in backfills.items():
+    if version not in recorded or f'backfill:{version}' in recorded:
+      continue
+    connection.commit()
+    try:
+      connection.execute('BEGIN')
+      backfill(connection.cursor())
+      connection.execute('INSERT INTO schema_migrations (version) VALUES (?)', (f'backfill:{version}',))
+      connection.commit()
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
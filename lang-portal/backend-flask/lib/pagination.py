@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+
+# Keyset (cursor) pagination helpers.
+# A cursor is an opaque token holding the sort of the listing it came from
+# plus the (sort value, id) of the last row returned, so the next page can
+# seek straight past it with an index range scan instead of OFFSET.
+
+def encode_cursor(sort_by, order, values):
+  payload = json.dumps({'s': sort_by, 'o': order, 'v': values}, separators=(',', ':'))
+  return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort_by, order):
+  # An empty cursor asks for the first page
+  if not token:
+    return None
+  try:
+    padded = token + '=' * (-len(token) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+  except (binascii.Error, UnicodeError, ValueError):
+    raise ValueError("Malformed cursor")
+  if not isinstance(payload, dict) or not isinstance(payload.get('v'), list) or len(payload['v']) != 2:
+    raise ValueError("Malformed cursor")
+  # Both values are bound as SQL parameters: a scalar sort value and an integer id
+  value, last_id = payload['v']
+  if isinstance(value, bool) or not isinstance(value, (str, int, float, type(None))):
+    raise ValueError("Malformed cursor")
+  if isinstance(last_id, bool) or not isinstance(last_id, int):
+    raise ValueError("Malformed cursor")
+  # A cursor only makes sense for the ordering it was issued for
+  if payload.get('s') != sort_by or payload.get('o') != order:
+    raise ValueError("Cursor does not match the requested sort")
+  return payload['v']
+
+def keyset_condition(sort_column, id_column, order):
+  comparison = '>' if order == 'asc' else '<'
+  return f'({sort_column}, {id_column}) {comparison} (?, ?)'
+
+def next_cursor(rows, per_page, sort_by, order):
+  # Callers fetch per_page + 1 rows; the extra row only signals another page
+  if len(rows) <= per_page:
+    return None
+  last = rows[per_page - 1]
+  return encode_cursor(sort_by, order, [last[sort_by], last['id']])
+
+def wants_total(args):
+  return args.get('include_total', 'false').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+
+class PoolExhausted(Exception):
+  pass
+
+class ConnectionPool:
+  def __init__(self, connect, size=5, timeout=10.0, health_check_interval=30.0):
+    self.connect = connect
+    self.size = size
+    self.timeout = timeout
+    self.health_check_interval = health_check_interval
+
+    self._lock = threading.Lock()
+    self._available = threading.Condition(self._lock)
+    self._idle = deque()       # (connection, returned_at) ready for checkout
+    self._checked_out = {}     # id(connection) -> thread ident holding it
+    self._opened = 0
+
+    # Pool-level metrics
+    self.checkouts = 0
+    self.exhausted = 0
+    self.wait_time = 0.0
+    self.health_check_failures = 0
+
+  def acquire(self):
+    started = time.perf_counter()
+    deadline = started + self.timeout
+    waited = False
+    with self._available:
+      while True:
+        if self._idle:
+          connection, returned_at = self._idle.pop()
+          break
+        if self._opened < self.size:
+          # Reserve the slot now, open the connection outside the lock
+          self._opened += 1
+          connection = None
+          break
+        if not waited:
+          waited = True
+          self.exhausted += 1
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0 or not self._available.wait(remaining):
+          self.wait_time += time.perf_counter() - started
+          raise PoolExhausted(f"No database connection available after {self.timeout}s")
+
+    if connection is None:
+      connection = self._open()
+    elif time.monotonic() - returned_at > self.health_check_interval and not self._healthy(connection):
+      # Replace a dead connection while keeping its slot reserved
+      with self._lock:
+        self.health_check_failures += 1
+      self._close_quietly(connection)
+      connection = self._open()
+
+    with self._lock:
+      self._checked_out[id(connection)] = threading.get_ident()
+      self.checkouts += 1
+      self.wait_time += time.perf_counter() - started
+    return connection
+
+  def release(self, connection):
+    with self._lock:
+      owned = self._checked_out.pop(id(connection), None) is not None
+    if not owned:
+      # Not one of ours (e.g. opened directly by a script), just close it
+      connection.close()
+      return
+
+    try:
+      # Never hand an open transaction to the next request
+      if connection.in_transaction:
+        connection.rollback()
+    except sqlite3.Error:
+      self._discard(connection)
+      return
+
+    with self._available:
+      self._idle.append((connection, time.monotonic()))
+      self._available.notify()
+
+  def close(self):
+    with self._lock:
+      idle = [connection for connection, _ in self._idle]
+      self._idle.clear()
+      self._opened -= len(idle)
+    for connection in idle:
+      connection.close()
+
+  def stats(self):
+    with self._lock:
+      return {
+        'size': self.size,
+        'open': self._opened,
+        'idle': len(self._idle),
+        'in_use': len(self._checked_out),
+        'checkouts': self.checkouts,
+        'exhausted': self.exhausted,
+        'wait_time': self.wait_time,
+        'health_check_failures': self.health_check_failures
+      }
+
+  def _open(self):
+    try:
+      return self.connect()
+    except Exception:
+      with self._available:
+        self._opened -= 1
+        self._available.notify()
+      raise
+
+  def _healthy(self, connection):
+    try:
+      connection.execute('SELECT 1').fetchone()
+      return True
+    except sqlite3.Error:
+      return False
+
+  def _close_quietly(self, connection):
+    try:
+      connection.close()
+    except sqlite3.Error:
+      pass
+
+  def _discard(self, connection):
+    self._close_quietly(connection)
+    with self._available:
+      self._opened -= 1
+      self._available.notify()
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from flask import has_request_context, request
+
+from lib.metrics import Histogram, render_histogram, render_metric
+from lib.queries import queries
+
+logger = logging.getLogger('lang_portal.slow_queries')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# Not the digits of a numbered parameter such as ?1
+_NUMBER_LITERAL = re.compile(r'(?<!\?)\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+_NUMBERED_PARAMETER = re.compile(r'\?(\d+)')
+
+def normalize_sql(sql):
+  # Literals and IN (...) lists of any length collapse to one shape
+  sql = _STRING_LITERAL.sub('?', sql)
+  sql = _NUMBER_LITERAL.sub('?', sql)
+  sql = _PLACEHOLDER_LIST.sub('(?)', sql)
+  return _WHITESPACE.sub(' ', sql).strip().rstrip(';')
+
+def fingerprint(sql):
+  return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:12]
+
+class QueryProfiler:
+  # Aggregates per (fingerprint, endpoint): a duration histogram and the rows
+  # returned. Statements slower than slow_query_ms are logged with their plan.
+  def __init__(self, slow_query_ms=100):
+    self.slow_query_ms = slow_query_ms
+    self._lock = threading.Lock()
+    self._durations = {}   # (fingerprint, endpoint) -> Histogram
+    self._rows = {}        # (fingerprint, endpoint) -> rows returned
+    self._statements = {}  # fingerprint -> normalized statement
+    self._names = {}       # fingerprint -> name in the query registry ('' for inline SQL)
+    self.slow_queries = 0
+
+  def is_slow(self, elapsed):
+    return self.slow_query_ms is not None and elapsed * 1000 >= self.slow_query_ms
+
+  def record(self, sql, elapsed, rows, endpoint, plan=None):
+    # plan: EXPLAIN QUERY PLAN text captured by the caller while it still held
+    # the connection; the sample itself may be recorded later, from any thread
+    key_fingerprint = fingerprint(sql)
+    key = (key_fingerprint, endpoint)
+    with self._lock:
+      if key_fingerprint not in self._statements:
+        self._statements[key_fingerprint] = normalize_sql(sql)
+        self._names[key_fingerprint] = queries.name_of(sql) or ''
+      histogram = self._durations.get(key)
+      if histogram is None:
+        histogram = self._durations[key] = Histogram()
+      histogram.observe(elapsed)
+      self._rows[key] = self._rows.get(key, 0) + rows
+
+    if self.is_slow(elapsed):
+      with self._lock:
+        self.slow_queries += 1
+      logger.warning(
+        'Slow query (%.1f ms, %d rows, endpoint %s) %s\n%s',
+        elapsed * 1000, rows, endpoint, self._statements[key_fingerprint],
+        '  (no plan captured)' if plan is None else plan
+      )
+
+  def explain(self, connection, sql, params):
+    if not params:
+      # executemany() consumed its parameters; the plan does not depend on the values
+      numbered = [int(index) for index in _NUMBERED_PARAMETER.findall(sql)]
+      params = (None,) * (max(numbered) if numbered else sql.count('?'))
+    try:
+      plan = connection.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except Exception as e:
+      return f'  (no plan: {e})'
+    return '\n'.join(f'  {row[3]}' for row in plan)
+
+  def stats(self):
+    with self._lock:
+      return {
+        key: {'calls': histogram.count, 'total_ms': histogram.sum * 1000, 'rows': self._rows[key]}
+        for key, histogram in self._durations.items()
+      }
+
+  def reset(self):
+    with self._lock:
+      self._durations.clear()
+      self._rows.clear()
+      self._statements.clear()
+      self._names.clear()
+      self.slow_queries = 0
+
+  def render(self):
+    with self._lock:
+      series = sorted(self._durations.items())
+      lines = render_metric(
+        'sql_statement_info', 'gauge', 'Normalized text and sql/ query name of each query fingerprint',
+        [((('fingerprint', key), ('query', self._names[key]), ('statement', statement)), 1)
+         for key, statement in sorted(self._statements.items())]
+      )
+      lines += render_histogram(
+        'sql_query_duration_seconds', 'Time spent executing and fetching each query',
+        [((('fingerprint', key), ('endpoint', endpoint)), histogram) for (key, endpoint), histogram in series]
+      )
+      lines += render_metric(
+        'sql_query_rows_total', 'counter', 'Rows returned by each query',
+        [((('fingerprint', key), ('endpoint', endpoint)), self._rows[(key, endpoint)]) for (key, endpoint), _ in series]
+      )
+      lines += render_metric(
+        'sql_slow_queries_total', 'counter', 'Queries slower than the slow query threshold',
+        [((), self.slow_queries)]
+      )
+    return lines
+
+class ProfiledCursor:
+  # Wraps a sqlite3 cursor. A statement is timed from execute() until its
+  # results are exhausted, the next statement starts, flush() is called (at
+  # request teardown) or the cursor goes away, so time spent stepping through
+  # rows in fetch*() is included. The plan of a slow statement is read as soon
+  # as it turns slow, on the thread using the cursor: by the time the sample
+  # is recorded the connection may be back in the pool.
+  def __init__(self, cursor, profiler):
+    self._cursor = cursor
+    self._profiler = profiler
+    self._pending = None  # [sql, params, elapsed, rows, endpoint, plan]
+
+  def __getattr__(self, name):
+    return getattr(self._cursor, name)
+
+  def _start(self, sql, params, run):
+    self.flush()
+    endpoint = request.endpoint if has_request_context() else None
+    started = time.perf_counter()
+    try:
+      run()
+    finally:
+      self._pending = [sql, params, time.perf_counter() - started, 0, endpoint or 'none', None]
+      self._explain_if_slow()
+
+  def _explain_if_slow(self):
+    pending = self._pending
+    if pending[5] is None and self._profiler.is_slow(pending[2]):
+      pending[5] = self._profiler.explain(self._cursor.connection, pending[0], pending[1])
+
+  def flush(self):
+    # Record the statement in progress, if any. Never touches the connection.
+    pending, self._pending = self._pending, None
+    if pending is not None:
+      sql, _, elapsed, rows, endpoint, plan = pending
+      self._profiler.record(sql, elapsed, rows, endpoint, plan)
+
+  def _fetched(self, started, rows, exhausted):
+    if self._pending is not None:
+      self._pending[2] += time.perf_counter() - started
+      self._pending[3] += rows
+      self._explain_if_slow()
+      if exhausted:
+        self.flush()
+
+  def execute(self, sql, params=()):
+    self._start(sql, params, lambda: self._cursor.execute(sql, params))
+    return self
+
+  def executemany(self, sql, seq_of_params):
+    self._start(sql, (), lambda: self._cursor.executemany(sql, seq_of_params))
+    return self
+
+  def fetchone(self):
+    started = time.perf_counter()
+    row = self._cursor.fetchone()
+    self._fetched(started, row is not None, row is None)
+    return row
+
+  def fetchmany(self, size=None):
+    started = time.perf_counter()
+    rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+    self._fetched(started, len(rows), not rows)
+    return rows
+
+  def fetchall(self):
+    started = time.perf_counter()
+    rows = self._cursor.fetchall()
+    self._fetched(started, len(rows), True)
+    return rows
+
+  def __iter__(self):
+    while True:
+      row = self.fetchone()
+      if row is None:
+        return
+      yield row
+
+  def close(self):
+    self.flush()
+    self._cursor.close()
+
+  def __del__(self):
+    try:
+      self.flush()
+    except Exception:
+      pass
@@ -0,0 +1,54 @@
+import os
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+
+class QueryRegistry:
+  # Named SQL loaded from sql/**/*.sql once, keyed by path without the extension
+  # (e.g. 'words/get_word'). Statement text is identical on every call, so each
+  # pooled connection's sqlite3 statement cache keeps it prepared.
+  def __init__(self, sql_dir=SQL_DIR):
+    self.sql_dir = sql_dir
+    self._queries = None
+    self._names = {}  # statement text -> name
+
+  def load(self):
+    queries = {}
+    for root, _, files in os.walk(self.sql_dir):
+      for filename in files:
+        if not filename.endswith('.sql'):
+          continue
+        path = os.path.join(root, filename)
+        name = os.path.relpath(path, self.sql_dir)[:-len('.sql')].replace(os.sep, '/')
+        with open(path, 'r', encoding='utf-8') as f:
+          queries[name] = f.read()
+    self._queries = queries
+    self._names = {sql: name for name, sql in queries.items()}
+    return self
+
+  def names(self):
+    if self._queries is None:
+      self.load()
+    return sorted(self._queries)
+
+  def get(self, name):
+    if self._queries is None:
+      self.load()
+    if name.endswith('.sql'):
+      name = name[:-len('.sql')]
+    try:
+      return self._queries[name]
+    except KeyError:
+      raise KeyError(f"Unknown query: {name}")
+
+  def name_of(self, sql):
+    # The name of a registry statement, None for SQL written inline
+    if self._queries is None:
+      self.load()
+    return self._names.get(sql)
+
+  def execute(self, cursor, name, params=()):
+    # Timed, like every statement, by lib/profiling through the cursor
+    return cursor.execute(self.get(name), params)
+
+# Shared by the app, the route modules and the maintenance helpers in lib/
+queries = QueryRegistry()
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from lib.schedule import update_schedule
+from lib.sessions import update_session_stats
+from lib.stats import record_review_totals
+
+def review_timestamp():
+  # Same format and clock as SQLite's datetime('now')
+  return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def update_word_counters(cursor, reviews):
+  # reviews: iterable of (word_id, correct, created_at) just written to word_review_items.
+  # Must run in the same transaction as the inserts so the counters never drift.
+  cursor.executemany('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT (word_id) DO UPDATE SET
+      correct_count = correct_count + excluded.correct_count,
+      wrong_count = wrong_count + excluded.wrong_count,
+      last_reviewed = MAX(last_reviewed, excluded.last_reviewed)
+  ''', ((word_id, 1 if correct else 0, 0 if correct else 1, created_at)
+        for word_id, correct, created_at in reviews))
+
+def rebuild_word_counters(cursor):
+  # Recompute every counter from the raw review history in one pass
+  cursor.execute('DELETE FROM word_reviews')
+  cursor.execute('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    SELECT
+      word_id,
+      SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+      SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+      MAX(created_at)
+    FROM word_review_items
+    GROUP BY word_id
+  ''')
+  return cursor.rowcount
+
+def _counters(cursor, word_ids):
+  placeholders = ', '.join('?' for _ in word_ids)
+  cursor.execute(f'''
+    SELECT word_id, correct_count, wrong_count
+    FROM word_reviews
+    WHERE word_id IN ({placeholders})
+  ''', word_ids)
+  return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+def record_reviews(cursor, session_id, reviews):
+  # Update everything derived from review items just inserted in the current transaction
+  reviews = list(reviews)
+  if not reviews:
+    return
+  word_ids = list({word_id for word_id, _, _ in reviews})
+
+  before = _counters(cursor, word_ids)
+  update_word_counters(cursor, reviews)
+  after = _counters(cursor, word_ids)
+  record_review_totals(cursor, reviews, before, after)
+  update_session_stats(cursor, session_id, reviews)
+  update_schedule(cursor, reviews)
@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta
+
+# Spaced-repetition schedule (SM-2 with pass/fail grading).
+# word_schedule holds each reviewed word's state and next due time;
+# word_due_queue copies the due time onto every (group, word) membership so
+# "most due words of a group" is a range scan of one index. Both are derived
+# from word_review_items: record_reviews() keeps them current and
+# rebuild_schedule() recomputes them.
+#
+# A correct answer extends the streak: due again after 1 day, then 6 days,
+# then each interval times the word's ease, up to MAX_INTERVAL_DAYS. A wrong
+# answer resets the streak, lowers the ease and makes the word due in 1 day.
+# Ease only drops on a lapse, so it is a function of the lapse count.
+# Words never reviewed are due from the moment they join a group.
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+EASE_PENALTY = 0.2
+FIRST_INTERVAL_DAYS = 1.0
+SECOND_INTERVAL_DAYS = 6.0
+LAPSE_INTERVAL_DAYS = 1.0
+MAX_INTERVAL_DAYS = 365.0
+
+def ease_for(lapses):
+  return max(MIN_EASE, INITIAL_EASE - EASE_PENALTY * lapses)
+
+def next_interval(streak, ease, previous_interval):
+  if streak == 0:
+    return LAPSE_INTERVAL_DAYS
+  if streak == 1:
+    return FIRST_INTERVAL_DAYS
+  if streak == 2:
+    return SECOND_INTERVAL_DAYS
+  return min(previous_interval * ease, MAX_INTERVAL_DAYS)
+
+def due_time(reviewed_at, interval_days):
+  # Whole seconds, truncated the same way as the SQL rebuild
+  due = datetime.fromisoformat(reviewed_at) + timedelta(seconds=int(interval_days * 86400))
+  return due.strftime('%Y-%m-%d %H:%M:%S')
+
+def review(state, correct, reviewed_at):
+  # state: (streak, lapses, interval_days) or None for a word never reviewed
+  streak, lapses, interval_days = state or (0, 0, 0.0)
+  if correct:
+    streak += 1
+  else:
+    streak, lapses = 0, lapses + 1
+  ease = ease_for(lapses)
+  interval_days = next_interval(streak, ease, interval_days)
+  return (streak, lapses, interval_days), ease, due_time(reviewed_at, interval_days)
+
+def update_schedule(cursor, reviews):
+  # reviews: (word_id, correct, created_at) just inserted, in insertion order.
+  # Must run in the same transaction as the inserts.
+  word_ids = list({word_id for word_id, _, _ in reviews})
+  placeholders = ', '.join('?' for _ in word_ids)
+  cursor.execute(f'''
+    SELECT word_id, streak, lapses, interval_days FROM word_schedule WHERE word_id IN ({placeholders})
+  ''', word_ids)
+  states = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+
+  rows = {}
+  for word_id, correct, created_at in reviews:
+    states[word_id], ease, due_at = review(states.get(word_id), correct, created_at)
+    streak, lapses, interval_days = states[word_id]
+    rows[word_id] = (word_id, streak, lapses, ease, interval_days, created_at, due_at)
+
+  cursor.executemany('''
+    INSERT INTO word_schedule (word_id, streak, lapses, ease, interval_days, reviewed_at, due_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (word_id) DO UPDATE SET
+      streak = excluded.streak,
+      lapses = excluded.lapses,
+      ease = excluded.ease,
+      interval_days = excluded.interval_days,
+      reviewed_at = excluded.reviewed_at,
+      due_at = excluded.due_at
+  ''', list(rows.values()))
+  cursor.executemany('UPDATE word_due_queue SET due_at = ? WHERE word_id = ?',
+                     [(row[6], row[0]) for row in rows.values()])
+
+# Closed form of review() replayed over each word's history: the streak is the
+# number of reviews after the last wrong one, and intervals past the second
+# grow by the ease per step (repeated multiplication, as above, for each ease a
+# lapse count can give).
+SCHEDULE_SQL = f'''
+  WITH RECURSIVE
+  history AS (
+    SELECT
+      word_id,
+      MAX(id) AS last_id,
+      SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END) AS lapses,
+      COALESCE(MAX(CASE WHEN correct = 0 THEN id END), 0) AS last_wrong_id
+    FROM word_review_items
+    GROUP BY word_id
+  ),
+  states AS (
+    SELECT
+      h.word_id,
+      (SELECT COUNT(*) FROM word_review_items i WHERE i.word_id = h.word_id AND i.id > h.last_wrong_id) AS streak,
+      h.lapses,
+      MAX({MIN_EASE}, {INITIAL_EASE} - {EASE_PENALTY} * h.lapses) AS ease,
+      (SELECT created_at FROM word_review_items WHERE id = h.last_id) AS reviewed_at
+    FROM history h
+  ),
+  lapse_counts (lapses) AS (
+    SELECT 0
+    UNION ALL
+    SELECT lapses + 1 FROM lapse_counts WHERE {INITIAL_EASE} - {EASE_PENALTY} * lapses > {MIN_EASE}
+  ),
+  growth (ease, streak, interval_days) AS (
+    SELECT DISTINCT MAX({MIN_EASE}, {INITIAL_EASE} - {EASE_PENALTY} * lapses), 2, {SECOND_INTERVAL_DAYS} FROM lapse_counts
+    UNION ALL
+    SELECT ease, streak + 1, MIN(interval_days * ease, {MAX_INTERVAL_DAYS}) FROM growth
+    WHERE interval_days < {MAX_INTERVAL_DAYS}
+  ),
+  intervals AS (
+    SELECT
+      s.*,
+      CASE
+        WHEN s.streak = 0 THEN {LAPSE_INTERVAL_DAYS}
+        WHEN s.streak = 1 THEN {FIRST_INTERVAL_DAYS}
+        ELSE COALESCE(g.interval_days, {MAX_INTERVAL_DAYS})
+      END AS interval_days
+    FROM states s
+    LEFT JOIN growth g ON g.ease = s.ease AND g.streak = s.streak
+  )
+  SELECT
+    word_id, streak, lapses, ease, interval_days, reviewed_at,
+    datetime(reviewed_at, '+' || CAST(interval_days * 86400 AS INTEGER) || ' seconds')
+  FROM intervals
+'''
+
+def rebuild_schedule(cursor, now=None):
+  # Recompute every word's schedule from the review history, then the queue.
+  # now: when words never reviewed fall due, as 'YYYY-MM-DD HH:MM:SS' UTC
+  # (default: the current time)
+  cursor.execute('DELETE FROM word_schedule')
+  cursor.execute(f'''
+    INSERT INTO word_schedule (word_id, streak, lapses, ease, interval_days, reviewed_at, due_at)
+    {SCHEDULE_SQL}
+  ''')
+  count = cursor.rowcount
+  cursor.execute('DELETE FROM word_due_queue')
+  cursor.execute('''
+    INSERT OR IGNORE INTO word_due_queue (group_id, word_id, due_at)
+    SELECT wg.group_id, wg.word_id, COALESCE(s.due_at, ?, datetime('now'))
+    FROM word_groups wg
+    LEFT JOIN word_schedule s ON s.word_id = wg.word_id
+  ''', (now,))
+  return count
+
+def check_schedule(cursor):
+  # Words whose stored schedule differs from a full recomputation
+  cursor.execute('SELECT word_id, streak, lapses, interval_days, due_at FROM word_schedule')
+  stored = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+  cursor.execute(SCHEDULE_SQL)
+  actual = {row[0]: (row[1], row[2], row[4], row[6]) for row in cursor.fetchall()}
+  return {word_id: (stored.get(word_id), actual.get(word_id))
+          for word_id in stored.keys() | actual.keys() if stored.get(word_id) != actual.get(word_id)}
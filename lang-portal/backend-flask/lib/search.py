@@ -0,0 +1,63 @@
+import re
+
+# Turns user input into an FTS5 MATCH expression for words_fts. Only word
+# characters survive, each term is quoted so FTS5 operators and column
+# filters typed by the user are matched as text, and terms are ANDed.
+# Case and accents are folded by the index's tokenizer, not here.
+
+MAX_TERMS = 8
+TERM = re.compile(r'\w+', re.UNICODE)
+
+def match_expression(text, prefix=True):
+  terms = TERM.findall(text or '')[:MAX_TERMS]
+  if not terms:
+    return None
+  star = '*' if prefix else ''
+  return ' '.join(f'"{term}"{star}' for term in terms)
+
+# Text of every string in the parts JSON, in document order
+FLATTEN_PARTS = '''
+  CASE WHEN json_valid(words.parts)
+    THEN (SELECT group_concat(value, ' ') FROM json_tree(words.parts) WHERE type = 'text')
+    ELSE words.parts END
+'''
+
+def suspend_index_triggers(cursor):
+  # Row triggers make FTS5 flush its pending terms on every insert, several
+  # times slower than one bulk insert. Bulk loaders drop the triggers inside
+  # their write transaction and call reindex_words() before committing.
+  cursor.execute('''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name = 'words' AND name LIKE 'words_fts_%'
+  ''')
+  triggers = cursor.fetchall()
+  for trigger in triggers:
+    cursor.execute(f'DROP TRIGGER "{trigger["name"]}"')
+  return [trigger['sql'] for trigger in triggers]
+
+def index_words(cursor, after_id=0):
+  cursor.execute(f'''
+    INSERT INTO words_fts (rowid, french, english, parts)
+    SELECT id, french, english, {FLATTEN_PARTS}
+    FROM words WHERE id > ?
+  ''', (after_id,))
+
+def reindex_word_ids(cursor, ids_sql):
+  # Refresh the entries of existing words updated while the triggers were off
+  cursor.execute(f'DELETE FROM words_fts WHERE rowid IN ({ids_sql})')
+  cursor.execute(f'''
+    INSERT INTO words_fts (rowid, french, english, parts)
+    SELECT id, french, english, {FLATTEN_PARTS}
+    FROM words WHERE id IN ({ids_sql})
+  ''')
+
+def rebuild_search_index(cursor):
+  cursor.execute('DELETE FROM words_fts')
+  index_words(cursor)
+
+def reindex_words(cursor, trigger_sql, after_id=0):
+  # Index the words loaded while the triggers were off, then put the triggers back
+  if trigger_sql:
+    index_words(cursor, after_id)
+  for sql in trigger_sql:
+    cursor.execute(sql)
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+# Sessions without any reviews are shown as lasting this long
+DEFAULT_SESSION_LENGTH = timedelta(minutes=30)
+
+def session_end_time(start_time, last_review_at):
+  # Computed here rather than with a datetime(?, '+30 minutes') query per row
+  if last_review_at:
+    return last_review_at
+  try:
+    start = datetime.fromisoformat(start_time)
+  except (TypeError, ValueError):
+    return None
+  return (start + DEFAULT_SESSION_LENGTH).strftime('%Y-%m-%d %H:%M:%S')
+
+def update_session_stats(cursor, session_id, reviews):
+  # reviews: (word_id, correct, created_at) just inserted for this session
+  correct = sum(1 for _, is_correct, _ in reviews if is_correct)
+  timestamps = [created_at for _, _, created_at in reviews]
+  cursor.execute('''
+    INSERT INTO study_session_stats (
+      study_session_id, review_count, correct_count, wrong_count, first_review_at, last_review_at
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (study_session_id) DO UPDATE SET
+      review_count = review_count + excluded.review_count,
+      correct_count = correct_count + excluded.correct_count,
+      wrong_count = wrong_count + excluded.wrong_count,
+      first_review_at = MIN(COALESCE(first_review_at, excluded.first_review_at), excluded.first_review_at),
+      last_review_at = MAX(COALESCE(last_review_at, excluded.last_review_at), excluded.last_review_at)
+  ''', (session_id, len(reviews), correct, len(reviews) - correct, min(timestamps), max(timestamps)))
+
+def session_duration(start_time, end_time):
+  try:
+    return int((datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)).total_seconds())
+  except (TypeError, ValueError):
+    return None
+
+def session_summary(session):
+  # Timing and result fields shared by every study-session listing.
+  # Expects created_at plus the study_session_stats columns (review_items_count,
+  # correct_count, wrong_count, last_review_at) on the row.
+  end_time = session_end_time(session['created_at'], session['last_review_at'])
+  return {
+    'start_time': session['created_at'],
+    'end_time': end_time,
+    'duration_seconds': session_duration(session['created_at'], end_time),
+    'review_items_count': session['review_items_count'],
+    'correct_count': session['correct_count'],
+    'wrong_count': session['wrong_count']
+  }
+
+def rebuild_session_stats(cursor):
+  # Recompute every session summary from the raw review history in one pass
+  cursor.execute('DELETE FROM study_session_stats')
+  cursor.execute('''
+    INSERT INTO study_session_stats (
+      study_session_id, review_count, correct_count, wrong_count, first_review_at, last_review_at
+    )
+    SELECT
+      study_session_id,
+      COUNT(*),
+      SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+      SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+      MIN(created_at),
+      MAX(created_at)
+    FROM word_review_items
+    GROUP BY study_session_id
+  ''')
+  return cursor.rowcount
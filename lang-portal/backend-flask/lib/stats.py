@@ -0,0 +1,116 @@
+from datetime import date
+
+from lib.queries import queries
+
+# Incrementally maintained dashboard statistics.
+# dashboard_stats holds running totals and study_days one row per (day, group)
+# with sessions, so /dashboard/stats never has to aggregate the review history.
+
+STATS_FIELDS = [
+  'total_vocabulary',
+  'total_words_studied',
+  'mastered_words',
+  'review_count',
+  'correct_count',
+  'total_sessions',
+  'streak_days'
+]
+
+MASTERY_MIN_ATTEMPTS = 5
+MASTERY_MIN_SUCCESS_RATE = 0.8
+
+def is_mastered(correct_count, wrong_count):
+  attempts = correct_count + wrong_count
+  return attempts >= MASTERY_MIN_ATTEMPTS and correct_count * 1.0 / attempts >= MASTERY_MIN_SUCCESS_RATE
+
+def _streak_link(day, previous_day):
+  # The streak counts the first study day and every day directly after another one
+  if previous_day is None:
+    return 1
+  return 1 if (date.fromisoformat(day) - date.fromisoformat(previous_day)).days == 1 else 0
+
+def record_session(cursor, group_id, created_at):
+  study_date = created_at[:10]
+
+  # A new study day can only change the streak links of itself and the day after it
+  cursor.execute('SELECT 1 FROM study_days WHERE study_date = ? LIMIT 1', (study_date,))
+  if cursor.fetchone() is None:
+    cursor.execute('SELECT MAX(study_date) FROM study_days WHERE study_date < ?', (study_date,))
+    previous_day = cursor.fetchone()[0]
+    cursor.execute('SELECT MIN(study_date) FROM study_days WHERE study_date > ?', (study_date,))
+    next_day = cursor.fetchone()[0]
+
+    streak_delta = _streak_link(study_date, previous_day)
+    if next_day is not None:
+      streak_delta += _streak_link(next_day, study_date) - _streak_link(next_day, previous_day)
+  else:
+    streak_delta = 0
+
+  cursor.execute('''
+    INSERT INTO study_days (study_date, group_id, sessions_count) VALUES (?, ?, 1)
+    ON CONFLICT (study_date, group_id) DO UPDATE SET sessions_count = sessions_count + 1
+  ''', (study_date, group_id))
+  cursor.execute('''
+    UPDATE dashboard_stats
+    SET total_sessions = total_sessions + 1,
+        streak_days = streak_days + ?
+    WHERE id = 1
+  ''', (streak_delta,))
+
+def record_review_totals(cursor, reviews, before, after):
+  # before/after map word_id -> (correct_count, wrong_count) around the counter update
+  newly_studied = sum(1 for word_id in after if word_id not in before)
+  mastered_delta = sum(
+    int(is_mastered(*after[word_id])) - int(is_mastered(*before.get(word_id, (0, 0))))
+    for word_id in after
+  )
+  correct = sum(1 for _, is_correct, _ in reviews if is_correct)
+
+  cursor.execute('''
+    UPDATE dashboard_stats
+    SET total_words_studied = total_words_studied + ?,
+        mastered_words = mastered_words + ?,
+        review_count = review_count + ?,
+        correct_count = correct_count + ?
+    WHERE id = 1
+  ''', (newly_studied, mastered_delta, len(reviews), correct))
+
+def reset_history(cursor):
+  # Everything but the vocabulary is derived from the study history
+  cursor.execute('DELETE FROM study_days')
+  cursor.execute('''
+    UPDATE dashboard_stats
+    SET total_words_studied = 0, mastered_words = 0, review_count = 0,
+        correct_count = 0, total_sessions = 0, streak_days = 0
+    WHERE id = 1
+  ''')
+
+def read_stats(cursor):
+  cursor.execute(f"SELECT {', '.join(STATS_FIELDS)} FROM dashboard_stats WHERE id = 1")
+  row = cursor.fetchone()
+  return dict(zip(STATS_FIELDS, row)) if row else dict.fromkeys(STATS_FIELDS, 0)
+
+def compute_stats(cursor):
+  queries.execute(cursor, 'stats/dashboard_stats')
+  return dict(zip(STATS_FIELDS, cursor.fetchone()))
+
+def rebuild_stats(cursor):
+  cursor.execute('DELETE FROM study_days')
+  cursor.execute('''
+    INSERT INTO study_days (study_date, group_id, sessions_count)
+    SELECT date(created_at), group_id, COUNT(*)
+    FROM study_sessions
+    GROUP BY date(created_at), group_id
+  ''')
+  stats = compute_stats(cursor)
+  cursor.execute(f'''
+    INSERT OR REPLACE INTO dashboard_stats (id, {', '.join(STATS_FIELDS)})
+    VALUES (1, {', '.join('?' for _ in STATS_FIELDS)})
+  ''', [stats[field] for field in STATS_FIELDS])
+  return stats
+
+def check_stats(cursor):
+  # Compare the incremental values with a full recomputation; returns the fields that drifted
+  stored = read_stats(cursor)
+  actual = compute_stats(cursor)
+  return {field: (stored[field], actual[field]) for field in STATS_FIELDS if stored[field] != actual[field]}
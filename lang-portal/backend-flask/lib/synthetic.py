@@ -0,0 +1,197 @@
+import json
+import random
+import time
+
+from lib.reviews import rebuild_word_counters
+from lib.schedule import rebuild_schedule
+from lib.search import rebuild_search_index
+from lib.sessions import rebuild_session_stats
+from lib.stats import rebuild_stats
+
+# Deterministic synthetic data at production scale for performance tests and
+# query-plan checks. The same seed always produces the same database.
+#
+# Layout, so load tests can address rows without querying:
+#   word i belongs to group (i - 1) % groups + 1 (plus, for some words, one more group)
+#   session i belongs to group (i - 1) % groups + 1
+#   sessions and their review items are written in chronological order
+
+FRENCH_SYLLABLES = [
+  'ba', 'bé', 'bon', 'ca', 'cha', 'ché', 'ço', 'da', 'dé', 'di', 'du', 'é', 'fa', 'fê', 'fi',
+  'ga', 'geo', 'gi', 'la', 'lè', 'li', 'lon', 'lu', 'ma', 'mé', 'mi', 'mou', 'na', 'né', 'ni',
+  'oi', 'on', 'pa', 'pé', 'pi', 'pon', 'qua', 'ra', 'ré', 'ri', 'rou', 'sa', 'sé', 'si', 'son',
+  'ta', 'té', 'ti', 'tou', 'va', 'vé', 'vi', 'voi', 'zé'
+]
+ENGLISH_SYLLABLES = [
+  'an', 'ble', 'bor', 'cal', 'dor', 'el', 'en', 'fer', 'gan', 'hol', 'in', 'ja', 'ken', 'lin',
+  'mar', 'nel', 'or', 'per', 'quin', 'ros', 'sen', 'ter', 'un', 'ver', 'wil', 'yan', 'zel'
+]
+GROUP_THEMES = [
+  'Verbes', 'Adjectifs', 'La cuisine', 'Les voyages', 'La maison', 'Le travail', 'La famille',
+  'Les animaux', 'Le corps', 'Les couleurs', 'La ville', 'Les loisirs', 'Le temps', 'Les vêtements'
+]
+ACTIVITIES = [
+  ('Typing Tutor', 'http://localhost:8080'),
+  ('Flashcards', 'http://localhost:8081'),
+  ('Listening Quiz', 'http://localhost:8082')
+]
+
+BATCH_SIZE = 50000
+# Tables bulk-loaded here; their indexes and triggers are dropped during the
+# load, and the indexes and trigger-maintained tables are rebuilt once
+LOADED_TABLES = ('words', 'word_groups', 'study_sessions', 'word_review_items')
+
+def group_of(row_id, groups):
+  return (row_id - 1) % groups + 1
+
+def word_in_group(rng, group_id, words, groups):
+  # Earlier words of a group are reviewed more often, like a learner's core vocabulary
+  per_group = max((words - group_id) // groups + 1, 1)
+  return group_id + groups * int(per_group * rng.random() ** 2)
+
+def _spell(index, syllables, min_length=2):
+  # Unique by construction: the digits of index in base len(syllables)
+  parts = []
+  index += len(syllables) ** (min_length - 1)
+  while index:
+    index, digit = divmod(index, len(syllables))
+    parts.append(syllables[digit])
+  return parts[::-1]
+
+def _batched(rows, size=BATCH_SIZE):
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) == size:
+      yield batch
+      batch = []
+  if batch:
+    yield batch
+
+def _insert(cursor, sql, rows):
+  count = 0
+  for batch in _batched(rows):
+    cursor.executemany(sql, batch)
+    count += len(batch)
+  return count
+
+def _drop_schema_objects(cursor, kind):
+  cursor.execute(f'''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = ? AND sql IS NOT NULL
+      AND tbl_name IN ({', '.join('?' for _ in LOADED_TABLES)})
+  ''', (kind, *LOADED_TABLES))
+  objects = cursor.fetchall()
+  for item in objects:
+    cursor.execute(f'DROP {kind.upper()} "{item["name"]}"')
+  return [item['sql'] for item in objects]
+
+def generate(connection, words=100000, groups=50, sessions=20000, reviews=500000, seed=42, days=365, end=None):
+  # History covers `days` up to `end` (unix seconds, default: today 00:00 UTC),
+  # so the same seed and end give byte-identical data
+  if words < groups:
+    raise ValueError('Need at least one word per group')
+  rng = random.Random(seed)
+  french_syllables = rng.sample(FRENCH_SYLLABLES, len(FRENCH_SYLLABLES))
+  english_syllables = rng.sample(ENGLISH_SYLLABLES, len(ENGLISH_SYLLABLES))
+  started = time.perf_counter()
+  cursor = connection.cursor()
+  cursor.execute('BEGIN IMMEDIATE')
+  try:
+    trigger_sql = _drop_schema_objects(cursor, 'trigger')
+    for table in ('word_review_items', 'study_sessions', 'word_groups', 'words', 'groups', 'study_activities'):
+      cursor.execute(f'DELETE FROM {table}')
+    index_sql = _drop_schema_objects(cursor, 'index')
+
+    _insert(cursor, 'INSERT INTO study_activities (id, name, url, preview_url) VALUES (?, ?, ?, ?)', (
+      (i, name, url, f"/assets/study_activities/{name.lower().replace(' ', '_')}.png")
+      for i, (name, url) in enumerate(ACTIVITIES, start=1)
+    ))
+    _insert(cursor, 'INSERT INTO groups (id, name, words_count) VALUES (?, ?, 0)', (
+      (i, GROUP_THEMES[(i - 1) % len(GROUP_THEMES)] + (f' {(i - 1) // len(GROUP_THEMES) + 1}' if i > len(GROUP_THEMES) else ''))
+      for i in range(1, groups + 1)
+    ))
+
+    def word_rows():
+      for i in range(1, words + 1):
+        parts = _spell(i, french_syllables)
+        yield (i, ''.join(parts), ''.join(_spell(i, english_syllables)), json.dumps([{'french': part} for part in parts]))
+    _insert(cursor, 'INSERT INTO words (id, french, english, parts) VALUES (?, ?, ?, ?)', word_rows())
+
+    def membership_rows():
+      for i in range(1, words + 1):
+        primary = group_of(i, groups)
+        yield (i, primary)
+        # About one word in five is shared with another group
+        if groups > 1 and rng.random() < 0.2:
+          yield (i, primary % groups + 1)
+    memberships = _insert(cursor, 'INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', membership_rows())
+    cursor.execute('UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id)')
+
+    # Session start times walk forward with exponential gaps, so ids follow time
+    # the way autoincrement ids do. SQLite's datetime() formats the unix seconds.
+    if end is None:
+      end = int(time.time()) // 86400 * 86400
+    mean_gap = days * 86400.0 / (max(sessions, 1) + 1)
+    clock = end - days * 86400
+    session_starts = []
+    def session_rows():
+      nonlocal clock
+      for i in range(1, sessions + 1):
+        clock += rng.expovariate(1 / mean_gap)
+        session_starts.append(int(clock))
+        yield (i, group_of(i, groups), rng.randint(1, len(ACTIVITIES)), int(clock))
+    _insert(cursor, '''
+      INSERT INTO study_sessions (id, group_id, study_activity_id, created_at)
+      VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+    ''', session_rows())
+
+    # Reviews are spread evenly over the sessions, a few seconds apart; each
+    # word has a fixed difficulty so mastery varies realistically across words
+    def review_rows():
+      session = None
+      for r in range(reviews if sessions else 0):
+        current = r * sessions // reviews + 1
+        if current != session:
+          session = current
+          reviewed_at = session_starts[session - 1]
+        reviewed_at += 3 + int(rng.random() * 18)
+        word_id = word_in_group(rng, group_of(session, groups), words, groups)
+        ease = 0.45 + (word_id * 2654435761 % 1000) / 2000.0
+        yield (word_id, session, rng.random() < ease, reviewed_at)
+    review_count = _insert(cursor, '''
+      INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+      VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+    ''', review_rows())
+
+    loaded = time.perf_counter()
+    for sql in index_sql:
+      cursor.execute(sql)
+    rebuild_search_index(cursor)
+    # Words never reviewed fall due at `end`, not whenever this runs
+    rebuild_schedule(cursor, now=time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(end)))
+    for sql in trigger_sql:
+      cursor.execute(sql)
+    rebuild_word_counters(cursor)
+    rebuild_session_stats(cursor)
+    stats = rebuild_stats(cursor)
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
+
+  finished = time.perf_counter()
+  rows = words + memberships + sessions + review_count + groups
+  return {
+    'words': words,
+    'groups': groups,
+    'memberships': memberships,
+    'sessions': sessions,
+    'reviews': review_count,
+    'activities': len(ACTIVITIES),
+    'seed': seed,
+    'load_seconds': round(loaded - started, 2),
+    'index_seconds': round(finished - loaded, 2),
+    'rows_per_second': round(rows / (finished - started)),
+    'mastered_words': stats['mastered_words']
+  }
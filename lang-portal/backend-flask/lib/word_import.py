@@ -0,0 +1,304 @@
+import csv
+import json
+import time
+import unicodedata
+from itertools import islice
+
+from lib.groups import restore_count_triggers, suspend_count_triggers
+from lib.json_stream import iter_json_array
+from lib.search import reindex_word_ids, reindex_words, suspend_index_triggers
+
+# Bulk vocabulary import for POST /words/import and `invoke import-words`.
+#
+# The upload is parsed as it is read and staged into temp tables, one batch of
+# STAGE_BATCH rows at a time, before any write lock is taken. Staging is keyed
+# by word_key, so a repeat inside the upload is treated like a word already
+# stored: the first spelling and position are kept and the last parts win.
+# The merge then runs in one write transaction: existing words are matched on
+# the unique words.word_key index, every staged word goes through a single
+# INSERT ... ON CONFLICT, and the words are attached to their groups.
+#
+# Large imports drop the FTS and group counter triggers for the merge and
+# rebuild what they maintain once at the end. Dropping and re-creating a
+# trigger changes the schema, which invalidates every prepared statement on
+# every connection of every worker, so smaller imports run with the triggers
+# in place.
+
+STAGE_BATCH = 5000
+SUSPEND_TRIGGERS_ROWS = 20000  # staged rows from which the triggers are dropped for the merge
+MAX_ERRORS = 20
+FORMATS = ('json', 'ndjson', 'csv')
+CONFLICT_MODES = ('update', 'skip')  # on a known word: replace its parts, or leave it alone
+EMPTY_PARTS = '[]'
+
+def normalize(text):
+  # Case and runs of whitespace do not make a different word; accents do
+  return unicodedata.normalize('NFC', ' '.join(text.split()).casefold())
+
+def word_key(french, english):
+  return normalize(french) + '\x1f' + normalize(english)
+
+def format_for(filename=None, mimetype=None):
+  # Upload format from a file extension or the request's Content-Type
+  if filename and '.' in filename:
+    extension = filename.rsplit('.', 1)[1].lower()
+    if extension in FORMATS:
+      return extension
+  return {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv'
+  }.get(mimetype)
+
+def read_items(file, format):
+  # Yields (item, error) for every record of a text file in the given format
+  if format == 'json':
+    try:
+      yield from ((item, None) for item in iter_json_array(file))
+    except ValueError as e:
+      raise ValueError(f"Invalid JSON: {e}")
+  elif format == 'ndjson':
+    for line in file:
+      if not line.strip():
+        continue
+      try:
+        yield json.loads(line), None
+      except ValueError as e:
+        yield None, f"Invalid JSON: {e}"
+  elif format == 'csv':
+    try:
+      yield from ((row, None) for row in csv.DictReader(file))
+    except csv.Error as e:
+      raise ValueError(f"Invalid CSV: {e}")
+  else:
+    raise ValueError(f"Unknown import format: {format}")
+
+def clean_item(item):
+  # Returns ((french, english, parts, group), None) or (None, error)
+  if not isinstance(item, dict):
+    return None, 'Expected an object'
+  french, english = item.get('french'), item.get('english')
+  if not isinstance(french, str) or not isinstance(english, str) or not french.strip() or not english.strip():
+    return None, 'Missing french or english'
+
+  parts = item.get('parts')
+  if parts in (None, '', EMPTY_PARTS) or parts == []:
+    parts_json = EMPTY_PARTS
+  else:
+    if isinstance(parts, str):
+      # CSV cells carry parts as JSON text
+      try:
+        parts = json.loads(parts)
+      except ValueError:
+        return None, 'parts must be JSON'
+    if not isinstance(parts, (list, dict)):
+      return None, 'parts must be a list or an object'
+    # Stored the way the other writers store it, so unchanged parts compare equal
+    parts_json = json.dumps(parts)
+
+  group = item.get('group')
+  if group is not None and not isinstance(group, str):
+    return None, 'group must be a string'
+  return (french.strip(), english.strip(), parts_json, (group or '').strip() or None), None
+
+def create_staging_tables(cursor):
+  cursor.execute('DROP TABLE IF EXISTS temp.import_words')
+  cursor.execute('''
+    CREATE TEMP TABLE import_words (
+      word_key TEXT PRIMARY KEY,
+      line INTEGER NOT NULL,  -- Position in the upload, so new words keep its order
+      french TEXT NOT NULL,
+      english TEXT NOT NULL,
+      parts TEXT NOT NULL,
+      word_id INTEGER,  -- Matching word already stored, set by the merge
+      changed INTEGER NOT NULL DEFAULT 0  -- That word's parts differ from the upload
+    )
+  ''')
+  cursor.execute('DROP TABLE IF EXISTS temp.import_groups')
+  cursor.execute('''
+    CREATE TEMP TABLE import_groups (
+      word_key TEXT NOT NULL,
+      group_name TEXT NOT NULL,
+      PRIMARY KEY (group_name, word_key)
+    )
+  ''')
+  cursor.execute('DROP TABLE IF EXISTS temp.import_group_ids')
+  cursor.execute('CREATE TEMP TABLE import_group_ids (group_id INTEGER PRIMARY KEY, group_name TEXT NOT NULL)')
+
+def drop_staging_tables(cursor):
+  for table in ('import_words', 'import_groups', 'import_group_ids'):
+    cursor.execute(f'DROP TABLE IF EXISTS temp.{table}')
+
+def stage_items(cursor, items, group_name=None):
+  # items: (item, error) pairs from read_items(). Only STAGE_BATCH rows are held at once.
+  summary = {'received': 0, 'rejected': 0, 'errors': []}
+
+  def rows():
+    for line, (item, error) in enumerate(items, 1):
+      summary['received'] += 1
+      if error is None:
+        cleaned, error = clean_item(item)
+      if error is not None:
+        summary['rejected'] += 1
+        if len(summary['errors']) < MAX_ERRORS:
+          summary['errors'].append({'line': line, 'error': error})
+        continue
+      french, english, parts, group = cleaned
+      yield word_key(french, english), line, french, english, parts, group or group_name
+
+  rows = rows()
+  while True:
+    batch = list(islice(rows, STAGE_BATCH))
+    if not batch:
+      break
+    cursor.executemany('''
+      INSERT INTO temp.import_words (word_key, line, french, english, parts)
+      VALUES (?, ?, ?, ?, ?)
+      ON CONFLICT (word_key) DO UPDATE SET parts = excluded.parts
+    ''', (row[:5] for row in batch))
+    cursor.executemany('''
+      INSERT OR IGNORE INTO temp.import_groups (word_key, group_name) VALUES (?, ?)
+    ''', ((row[0], row[5]) for row in batch if row[5]))
+  return summary
+
+def key_words(cursor):
+  # Give a key to every word written without one. When several share a key,
+  # the oldest keeps it and the others get one made unique by their id, so
+  # they are matched by nothing and never revisited.
+  keyed, last_id = 0, 0
+  while True:
+    cursor.execute('''
+      SELECT id, french, english FROM words
+      WHERE word_key IS NULL AND id > ?
+      ORDER BY id LIMIT ?
+    ''', (last_id, STAGE_BATCH))
+    rows = cursor.fetchall()
+    if not rows:
+      return keyed
+    cursor.executemany('''
+      UPDATE words SET word_key = CASE
+        WHEN EXISTS (SELECT 1 FROM words WHERE word_key = ?1) THEN ?1 || char(31) || id
+        ELSE ?1 END
+      WHERE id = ?2
+    ''', ((word_key(row['french'], row['english']), row['id']) for row in rows))
+    keyed += len(rows)
+    last_id = rows[-1]['id']
+
+def merge_staged_words(cursor, on_conflict='update', suspend_triggers=True):
+  # Upsert every staged word. Must run inside the import's write transaction.
+  cursor.execute('''
+    UPDATE temp.import_words SET word_id = w.id, changed = w.parts IS NOT import_words.parts
+    FROM words w
+    WHERE w.word_key = import_words.word_key
+  ''')
+  cursor.execute('SELECT COUNT(*), COUNT(word_id), COALESCE(SUM(changed), 0) FROM temp.import_words')
+  staged, existing, changed = cursor.fetchone()
+
+  cursor.execute('SELECT COALESCE(MAX(id), 0) FROM words')
+  last_existing_id = cursor.fetchone()[0]
+  trigger_sql = suspend_index_triggers(cursor) if suspend_triggers else None
+
+  # Unchanged words are left out rather than sent through the conflict path,
+  # which would still use up an AUTOINCREMENT id for each of them
+  if on_conflict == 'update':
+    rows, on_conflict_sql = 'word_id IS NULL OR changed', 'DO UPDATE SET parts = excluded.parts'
+  else:
+    rows, on_conflict_sql = 'word_id IS NULL', 'DO NOTHING'
+  cursor.execute(f'''
+    INSERT INTO words (french, english, parts, word_key)
+    SELECT french, english, parts, word_key FROM temp.import_words WHERE {rows}
+    ORDER BY line
+    ON CONFLICT (word_key) WHERE word_key IS NOT NULL {on_conflict_sql}
+  ''')
+
+  updated = changed if on_conflict == 'update' else 0
+  if trigger_sql is not None:
+    if updated:
+      reindex_word_ids(cursor, 'SELECT word_id FROM temp.import_words WHERE changed')
+    reindex_words(cursor, trigger_sql, after_id=last_existing_id)
+  return {'inserted': staged - existing, 'updated': updated, 'unchanged': existing - updated}
+
+def attach_groups(cursor, suspend_triggers=True):
+  # Add the staged memberships, creating groups named for the first time
+  cursor.execute('SELECT DISTINCT group_name FROM temp.import_groups')
+  for (name,) in cursor.fetchall():
+    cursor.execute('SELECT id FROM groups WHERE name = ? ORDER BY id LIMIT 1', (name,))
+    group = cursor.fetchone()
+    if group is None:
+      cursor.execute('INSERT INTO groups (name) VALUES (?)', (name,))
+      group_id = cursor.lastrowid
+    else:
+      group_id = group[0]
+    cursor.execute('INSERT INTO temp.import_group_ids (group_id, group_name) VALUES (?, ?)', (group_id, name))
+
+  trigger_sql = suspend_count_triggers(cursor) if suspend_triggers else None
+  cursor.execute('''
+    INSERT INTO word_groups (word_id, group_id)
+    SELECT w.id, g.group_id
+    FROM temp.import_groups ig
+    JOIN temp.import_group_ids g ON g.group_name = ig.group_name
+    JOIN words w ON w.word_key = ig.word_key
+    WHERE NOT EXISTS (
+      SELECT 1 FROM word_groups wg WHERE wg.group_id = g.group_id AND wg.word_id = w.id
+    )
+  ''')
+  attached = cursor.rowcount
+
+  if trigger_sql is not None:
+    # Each touched group is counted once, after all of its new words are in
+    restore_count_triggers(cursor, trigger_sql, 'SELECT group_id FROM temp.import_group_ids')
+  cursor.execute('''
+    SELECT id, name, words_count FROM groups
+    WHERE id IN (SELECT group_id FROM temp.import_group_ids)
+    ORDER BY id
+  ''')
+  groups = [{'id': row[0], 'name': row[1], 'words_count': row[2]} for row in cursor.fetchall()]
+  return attached, groups
+
+def import_words(cursor, items, group_name=None, on_conflict='update', write_lock=None):
+  # items: (item, error) pairs, e.g. read_items(file, format). A ValueError
+  # while reading (a malformed upload) aborts the import before anything is written.
+  # write_lock (a ProcessWriteLock) is held for the merge only, not while staging.
+  if on_conflict not in CONFLICT_MODES:
+    raise ValueError(f"Unknown conflict mode: {on_conflict}")
+  started = time.perf_counter()
+  connection = cursor.connection
+  if connection.in_transaction:
+    connection.commit()
+
+  # Stage on disk rather than in memory however the connection is configured;
+  # changing temp_store drops temp tables, so it happens before they exist
+  cursor.execute('PRAGMA temp_store')
+  temp_store = cursor.fetchone()[0]
+  cursor.execute('PRAGMA temp_store = FILE')
+  try:
+    create_staging_tables(cursor)
+    summary = stage_items(cursor, items, group_name)
+    connection.commit()
+    suspend_triggers = summary['received'] - summary['rejected'] >= SUSPEND_TRIGGERS_ROWS
+
+    if write_lock is not None:
+      write_lock.acquire()
+    try:
+      cursor.execute('BEGIN IMMEDIATE')
+      key_words(cursor)
+      summary.update(merge_staged_words(cursor, on_conflict, suspend_triggers))
+      summary['attached'], summary['groups'] = attach_groups(cursor, suspend_triggers)
+      connection.commit()
+    except Exception:
+      connection.rollback()
+      raise
+    finally:
+      if write_lock is not None:
+        write_lock.release()
+  finally:
+    if connection.in_transaction:
+      connection.rollback()
+    drop_staging_tables(cursor)
+    cursor.execute(f'PRAGMA temp_store = {int(temp_store)}')
+
+  elapsed = time.perf_counter() - started
+  summary['seconds'] = round(elapsed, 3)
+  summary['rows_per_second'] = int(summary['received'] / elapsed) if elapsed > 0 else 0
+  return summary
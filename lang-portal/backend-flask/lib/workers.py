@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+
+from flask import current_app, jsonify, request
+
+from lib.metrics import render_metric
+
+try:
+  import fcntl
+except ImportError:
+  # Windows: no flock(), and no forked workers (serve.py) to exclude either,
+  # so the lock only serializes the threads of this process
+  fcntl = None
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+class WriteLockTimeout(Exception):
+  pass
+
+def holds_write_lock_itself(view):
+  # Marks a view that takes app.write_lock around its writes only, instead of
+  # for the whole request (e.g. while a large upload is still being received)
+  view.holds_write_lock_itself = True
+  return view
+
+class ProcessWriteLock:
+  # Serializes write requests across threads and worker processes, so SQLite
+  # never has two writers polling its busy handler for the same lock. Readers
+  # are not affected (WAL lets them run next to the one writer).
+  def __init__(self, path, timeout=10.0):
+    self.path = path
+    self.timeout = timeout
+    self._thread_lock = threading.Lock()
+    self._file = None
+    self._pid = None
+    self.acquired = 0
+    self.wait_time = 0.0
+    self.timeouts = 0
+
+  def _lock_file(self):
+    # flock() is held per open file, so every process opens its own after the fork
+    if self._pid != os.getpid():
+      self._file = open(self.path, 'a+')
+      self._pid = os.getpid()
+    return self._file
+
+  def acquire(self):
+    started = time.perf_counter()
+    deadline = started + self.timeout
+    if not self._thread_lock.acquire(timeout=self.timeout):
+      self.timeouts += 1
+      raise WriteLockTimeout(f"Write lock not acquired after {self.timeout}s")
+    try:
+      if fcntl is not None:
+        self._flock(deadline)
+    except BaseException:
+      self._thread_lock.release()
+      raise
+    self.acquired += 1
+    self.wait_time += time.perf_counter() - started
+
+  def _flock(self, deadline):
+    delay = 0.0005
+    while True:
+      try:
+        fcntl.flock(self._lock_file(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return
+      except BlockingIOError:
+        if time.perf_counter() + delay > deadline:
+          self.timeouts += 1
+          raise WriteLockTimeout(f"Write lock not acquired after {self.timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, 0.01)
+
+  def release(self):
+    if fcntl is not None:
+      fcntl.flock(self._file, fcntl.LOCK_UN)
+    self._thread_lock.release()
+
+  def init_app(self, app):
+    app.before_request(self._before_request)
+    app.teardown_request(self._teardown_request)
+
+  def _before_request(self):
+    if request.method not in WRITE_METHODS:
+      return None
+    if getattr(current_app.view_functions.get(request.endpoint), 'holds_write_lock_itself', False):
+      return None
+    try:
+      self.acquire()
+    except WriteLockTimeout as e:
+      return jsonify({"error": str(e)}), 503
+    request.environ['lang_portal.write_lock'] = True
+    return None
+
+  def _teardown_request(self, exception=None):
+    if request.environ.pop('lang_portal.write_lock', False):
+      self.release()
+
+class WorkerStats:
+  # Each worker process publishes a small JSON snapshot to a shared directory,
+  # so any worker can answer /metrics for all of them
+  def __init__(self, directory, index, interval=5.0):
+    self.directory = directory
+    self.index = index
+    self.interval = interval
+    self.started_at = time.time()
+    self._stop = threading.Event()
+
+  @property
+  def path(self):
+    return os.path.join(self.directory, f'worker-{self.index}.json')
+
+  def start(self, app):
+    self.write(app)
+    thread = threading.Thread(target=self._run, args=(app,), name='worker-stats', daemon=True)
+    thread.start()
+
+  def stop(self):
+    self._stop.set()
+
+  def _run(self, app):
+    while not self._stop.wait(self.interval):
+      self.write(app)
+
+  def snapshot(self, app):
+    requests, errors = app.request_metrics.totals()
+    return {
+      'index': self.index,
+      'pid': os.getpid(),
+      'started_at': self.started_at,
+      'updated_at': time.time(),
+      'requests': requests,
+      'errors': errors,
+      'in_flight': app.request_metrics.in_flight,
+      'rss_bytes': rss_bytes(),
+      'pool': app.db.pool.stats(),
+      'export_pool': app.db.export_pool.stats(),
+      'cache': app.cache.stats()
+    }
+
+  def write(self, app):
+    # Write then rename, so readers never see a half-written file
+    temporary = f'{self.path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+      json.dump(self.snapshot(app), f)
+    os.replace(temporary, self.path)
+
+def rss_bytes():
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+  except (OSError, ValueError, IndexError):
+    try:
+      import resource
+    except ImportError:
+      return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def read_worker_stats(directory):
+  workers = []
+  for filename in sorted(os.listdir(directory)):
+    if filename.startswith('worker-') and filename.endswith('.json'):
+      try:
+        with open(os.path.join(directory, filename)) as f:
+          workers.append(json.load(f))
+      except (OSError, ValueError):
+        continue
+  return workers
+
+def render_worker_stats(directory):
+  workers = read_worker_stats(directory)
+  labels = lambda worker: (('worker', worker['index']), ('pid', worker['pid']))
+  lines = render_metric('worker_requests_total', 'counter', 'Requests completed by each worker process',
+                        [(labels(w), w['requests']) for w in workers])
+  lines += render_metric('worker_errors_total', 'counter', 'Requests answered with a 5xx by each worker process',
+                         [(labels(w), w['errors']) for w in workers])
+  lines += render_metric('worker_requests_in_flight', 'gauge', 'Requests in progress in each worker process',
+                         [(labels(w), w['in_flight']) for w in workers])
+  lines += render_metric('worker_resident_memory_bytes', 'gauge', 'Resident memory of each worker process',
+                         [(labels(w), w['rss_bytes']) for w in workers])
+  lines += render_metric('worker_db_connections_in_use', 'gauge', 'Pooled database connections checked out',
+                         [(labels(w), w['pool']['in_use']) for w in workers])
+  lines += render_metric('worker_cache_hits_total', 'counter', 'Response cache hits in each worker process',
+                         [(labels(w), w['cache']['hits']) for w in workers])
+  lines += render_metric('worker_uptime_seconds', 'gauge', 'Seconds since each worker process started',
+                         [(labels(w), round(w['updated_at'] - w['started_at'], 1)) for w in workers])
+  lines += render_metric('worker_last_report_timestamp_seconds', 'gauge', 'When each worker last wrote its snapshot',
+                         [(labels(w), round(w['updated_at'], 3)) for w in workers])
+
+  restarts_path = os.path.join(directory, 'master.json')
+  if os.path.exists(restarts_path):
+    with open(restarts_path) as f:
+      master = json.load(f)
+    lines += render_metric('worker_restarts_total', 'counter', 'Worker processes replaced after exiting unexpectedly',
+                           [((), master['restarts'])])
+  return lines
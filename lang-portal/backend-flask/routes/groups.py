@@ -1,10 +1,14 @@
 from flask import request, jsonify, g
-from flask_cors import cross_origin
 import json
 
+from lib.export import export_format, export_response
+from lib.pagination import decode_cursor, keyset_condition, next_cursor, wants_total
+from lib.queries import queries
+from lib.sessions import session_end_time
+
 def load(app):
   @app.route('/groups', methods=['GET'])
-  @cross_origin()
+  @app.cache.cached('groups')
   def get_groups():
     try:
       cursor = app.db.cursor()
@@ -58,8 +62,21 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  # Endpoint: GET /groups/export streams every group as NDJSON (default) or ?format=csv
+  @app.route('/groups/export', methods=['GET'])
+  def export_groups():
+    format = export_format(request.args)
+    if format is None:
+      return jsonify({"error": "Query parameter 'format' must be ndjson or csv"}), 400
+    after_id = max(0, request.args.get('after_id', 0, type=int))
+
+    try:
+      return export_response('groups/export', (after_id,), 'groups', format)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
   @app.route('/groups/<int:id>', methods=['GET'])
-  @cross_origin()
+  @app.cache.cached('groups')
   def get_group(id):
     try:
       cursor = app.db.cursor()
@@ -84,7 +101,6 @@ def load(app):
       return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/words', methods=['GET'])
-  @cross_origin()
   def get_group_words(id):
     try:
       cursor = app.db.cursor()
@@ -105,11 +121,58 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
-      # First, check if the group exists
-      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      # First, check if the group exists; its counter cache gives the total
+      cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
+      total_words = group['words_count']
+
+      # Keyset mode: ?cursor= (empty for the first page) seeks past the last row seen
+      if 'cursor' in request.args:
+        try:
+          after = decode_cursor(request.args['cursor'], sort_by, order)
+        except ValueError as e:
+          return jsonify({"error": str(e)}), 400
+
+        # The group's rows come from its word_groups range and are sorted there,
+        # so a page costs one pass over this group (words_count rows) at any depth,
+        # review-count sorts included
+        sort_columns = {
+          'french': 'w.french',
+          'english': 'w.english',
+          'correct_count': 'COALESCE(wr.correct_count, 0)',
+          'wrong_count': 'COALESCE(wr.wrong_count, 0)'
+        }
+        sort_column = sort_columns[sort_by]
+        seek = f'AND {keyset_condition(sort_column, "w.id", order)}' if after else ''
+
+        cursor.execute(f'''
+          SELECT w.id, w.french, w.english,
+                 COALESCE(wr.correct_count, 0) as correct_count,
+                 COALESCE(wr.wrong_count, 0) as wrong_count
+          FROM words w
+          JOIN word_groups wg ON w.id = wg.word_id
+          LEFT JOIN word_reviews wr ON w.id = wr.word_id
+          WHERE wg.group_id = ? {seek}
+          ORDER BY {sort_column} {order}, w.id {order}
+          LIMIT ?
+        ''', (id, *(after or ()), words_per_page + 1))
+        words = cursor.fetchall()
+
+        response = {
+          'words': [{
+            "id": word["id"],
+            "french": word["french"],
+            "english": word["english"],
+            "correct_count": word["correct_count"],
+            "wrong_count": word["wrong_count"]
+          } for word in words[:words_per_page]],
+          'next_cursor': next_cursor(words, words_per_page, sort_by, order)
+        }
+        if wants_total(request.args):
+          response['total_words'] = total_words
+        return jsonify(response)
 
       # Query to fetch words with pagination and sorting
       cursor.execute(f'''
@@ -126,13 +189,6 @@ def load(app):
       
       words = cursor.fetchall()
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
@@ -153,7 +209,6 @@ def load(app):
       return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/words/raw', methods=['GET'])
-  @cross_origin()
   def get_group_words_raw(id):
     try:
       cursor = app.db.cursor()
@@ -165,19 +220,7 @@ def load(app):
         return jsonify({"error": "Group not found"}), 404
 
       # Fetch all words for the group
-      cursor.execute('''
-        SELECT 
-          w.id,
-          w.french,
-          w.english,
-          COALESCE(wr.correct_count, 0) as correct_count,
-          COALESCE(wr.wrong_count, 0) as wrong_count
-        FROM words w
-        JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY w.french ASC
-      ''', (id,))
+      queries.execute(cursor, 'groups/group_words_raw', (id,))
       
       words = cursor.fetchall()
       
@@ -198,7 +241,6 @@ def load(app):
       return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/study_sessions', methods=['GET'])
-  @cross_origin()
   def get_group_study_sessions(id):
     try:
       cursor = app.db.cursor()
@@ -223,6 +265,8 @@ def load(app):
 
       # Use mapped sort column or default to created_at
       sort_column = sort_mapping.get(sort_by, 'created_at')
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
       # Get total count for pagination
       cursor.execute('''
@@ -233,28 +277,21 @@ def load(app):
       total_sessions = cursor.fetchone()[0]
       total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-      # Get study sessions for this group with dynamic calculations
+      # Get study sessions for this group with their pre-aggregated review summary
       cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
           s.study_activity_id,
           s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          st.last_review_at as last_activity_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          COALESCE(st.review_count, 0) as review_count
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
+        LEFT JOIN study_session_stats st ON st.study_session_id = s.id
         WHERE s.group_id = ?
         ORDER BY {sort_column} {order}
         LIMIT ? OFFSET ?
@@ -265,9 +302,7 @@ def load(app):
       
       for session in sessions:
         # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
+        end_time = session_end_time(session["start_time"], session["last_activity_time"])
         
         sessions_data.append({
           "id": session["id"],
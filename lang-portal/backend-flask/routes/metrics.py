@@ -0,0 +1,36 @@
+import hmac
+
+from flask import Response, jsonify, request
+
+from lib.workers import render_worker_stats
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def load(app):
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        lines = app.request_metrics.render()
+        if app.db.profiler is not None:
+            lines += app.db.profiler.render()
+
+        # Snapshots of every worker process when running under serve.py
+        if app.config['WORKER_METRICS_DIR']:
+            if app.worker_stats is not None:
+                app.worker_stats.write(app)
+            lines += render_worker_stats(app.config['WORKER_METRICS_DIR'])
+        return Response('\n'.join(lines) + '\n', content_type=PROMETHEUS_CONTENT_TYPE)
+
+    # Start a fresh measurement window, e.g. before a load test
+    @app.route('/metrics/reset', methods=['POST'])
+    def reset_metrics():
+        # Changes state on a public app, so only with the configured admin token
+        token = app.config['METRICS_RESET_TOKEN']
+        if not token:
+            return jsonify({"error": "Metrics reset is disabled"}), 403
+        supplied = request.headers.get('Authorization', '').encode('utf-8')
+        if not hmac.compare_digest(supplied, f'Bearer {token}'.encode('utf-8')):
+            return jsonify({"error": "Invalid admin token"}), 403
+        app.request_metrics.reset()
+        if app.db.profiler is not None:
+            app.db.profiler.reset()
+        return Response(status=204)
@@ -1,10 +1,12 @@
 from flask import jsonify, request
-from flask_cors import cross_origin
 import math
 
+from lib.queries import queries
+from lib.sessions import session_summary
+
 def load(app):
     @app.route('/api/study-activities', methods=['GET'])
-    @cross_origin()
+    @app.cache.cached('study_activities')
     def get_study_activities():
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities')
@@ -18,7 +20,6 @@ def load(app):
         } for activity in activities])
 
     @app.route('/api/study-activities/<int:id>', methods=['GET'])
-    @cross_origin()
     def get_study_activity(id):
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities WHERE id = ?', (id,))
@@ -35,7 +36,6 @@ def load(app):
         })
 
     @app.route('/api/study-activities/<int:id>/sessions', methods=['GET'])
-    @cross_origin()
     def get_study_activity_sessions(id):
         cursor = app.db.cursor()
         
@@ -59,24 +59,7 @@ def load(app):
         total_count = cursor.fetchone()['count']
 
         # Get paginated sessions
-        cursor.execute('''
-            SELECT 
-                ss.id,
-                ss.group_id,
-                g.name as group_name,
-                sa.name as activity_name,
-                ss.created_at,
-                ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
-            FROM study_sessions ss
-            JOIN groups g ON g.id = ss.group_id
-            JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-            WHERE ss.study_activity_id = ?
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
-            ORDER BY ss.created_at DESC
-            LIMIT ? OFFSET ?
-        ''', (id, per_page, offset))
+        queries.execute(cursor, 'study_activities/activity_sessions', (id, per_page, offset))
         sessions = cursor.fetchall()
 
         return jsonify({
@@ -86,9 +69,7 @@ def load(app):
                 'group_name': session['group_name'],
                 'activity_id': session['activity_id'],
                 'activity_name': session['activity_name'],
-                'start_time': session['created_at'],
-                'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
-                'review_items_count': session['review_items_count']
+                **session_summary(session)
             } for session in sessions],
             'total': total_count,
             'page': page,
@@ -97,7 +78,7 @@ def load(app):
         })
 
     @app.route('/api/study-activities/<int:id>/launch', methods=['GET'])
-    @cross_origin()
+    @app.cache.cached('study_activities', 'groups')
     def get_study_activity_launch_data(id):
         cursor = app.db.cursor()
         
@@ -1,12 +1,57 @@
 from flask import request, jsonify, g, current_app
-from flask_cors import cross_origin
-from datetime import datetime
+from datetime import datetime, timezone
 import math
 import sqlite3
 
+from lib.export import export_format, export_response
+from lib.pagination import decode_cursor, keyset_condition, next_cursor, wants_total
+from lib.queries import queries
+from lib.reviews import record_reviews, review_timestamp
+from lib.schedule import rebuild_schedule
+from lib.sessions import session_summary
+from lib.stats import record_session, reset_history
+
+MAX_REVIEW_BATCH = 500
+MAX_NEXT_WORDS = 100
+
+def parse_review_item(item):
+  # Returns the per-item result and, when valid, the (word_id, correct, created_at) to insert
+  if not isinstance(item, dict) or not all(key in item for key in ['word_id', 'correct']):
+    return {'status': 'rejected', 'error': 'Missing required fields'}, None
+
+  result = {'word_id': item['word_id']}
+  # An integer or a string of digits; int() would also truncate 2.9 to word 2
+  word_id = item['word_id']
+  if isinstance(word_id, str) and word_id.isascii() and word_id.isdigit():
+    word_id = int(word_id)
+  if not isinstance(word_id, int) or isinstance(word_id, bool):
+    result.update(status='rejected', error='Invalid word_id')
+    return result, None
+
+  if item['correct'] not in (True, False, 0, 1):
+    result.update(status='rejected', error='Invalid correct flag')
+    return result, None
+  correct = bool(item['correct'])
+
+  created_at = item.get('created_at')
+  if created_at is None:
+    created_at = review_timestamp()
+  else:
+    try:
+      parsed = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+    except ValueError:
+      result.update(status='rejected', error='Invalid created_at')
+      return result, None
+    # Store in the same UTC format as datetime('now')
+    if parsed.tzinfo is not None:
+      parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    created_at = parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+  result.update(word_id=word_id, correct=correct, created_at=created_at, status='created')
+  return result, (word_id, correct, created_at)
+
 def load(app):
   @app.route('/api/study-sessions', methods=['POST'])
-  @cross_origin()
   def create_study_session():
     cursor = None
     try:
@@ -52,24 +97,16 @@ def load(app):
       session_id = cursor.lastrowid
       
       # Fetch created session details
-      cursor.execute('''
-          SELECT 
-              ss.id,
-              ss.group_id,
-              g.name as group_name,
-              sa.id as activity_id,
-              sa.name as activity_name,
-              ss.created_at
-          FROM study_sessions ss
-          JOIN groups g ON g.id = ss.group_id
-          JOIN study_activities sa ON sa.id = ss.study_activity_id
-          WHERE ss.id = ?
-      ''', (session_id,))
+      queries.execute(cursor, 'study_sessions/created_session', (session_id,))
       
       session = cursor.fetchone()
+
+      # Count the session towards the dashboard totals and streak
+      record_session(cursor, group_id, session['created_at'])
       
       # Commit the transaction
       app.db.commit()
+      app.cache.invalidate('study_sessions')
       
       return jsonify({
           'id': session['id'],
@@ -89,7 +126,6 @@ def load(app):
       return jsonify({"error": str(e)}), 500
 
   @app.route('/api/study-sessions', methods=['GET'])
-  @cross_origin()
   def get_study_sessions():
     try:
       cursor = app.db.cursor()
@@ -99,33 +135,59 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
+      # Keyset mode: ?cursor= (empty for the first page) seeks past the last session seen
+      if 'cursor' in request.args:
+        try:
+          after = decode_cursor(request.args['cursor'], 'created_at', 'desc')
+        except ValueError as e:
+          return jsonify({"error": str(e)}), 400
+        seek = f"WHERE {keyset_condition('ss.created_at', 'ss.id', 'desc')}" if after else ''
+
+        cursor.execute(f'''
+          SELECT 
+            ss.id,
+            ss.group_id,
+            g.name as group_name,
+            sa.id as activity_id,
+            sa.name as activity_name,
+            ss.created_at,
+            COALESCE(st.review_count, 0) as review_items_count,
+            COALESCE(st.correct_count, 0) as correct_count,
+            COALESCE(st.wrong_count, 0) as wrong_count,
+            st.last_review_at
+          FROM study_sessions ss
+          JOIN groups g ON g.id = ss.group_id
+          JOIN study_activities sa ON sa.id = ss.study_activity_id
+          LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
+          {seek}
+          ORDER BY ss.created_at DESC, ss.id DESC
+          LIMIT ?
+        ''', (*(after or ()), per_page + 1))
+        sessions = cursor.fetchall()
+
+        response = {
+          'items': [{
+            'id': session['id'],
+            'group_id': session['group_id'],
+            'group_name': session['group_name'],
+            'activity_id': session['activity_id'],
+            'activity_name': session['activity_name'],
+            **session_summary(session)
+          } for session in sessions[:per_page]],
+          'per_page': per_page,
+          'next_cursor': next_cursor(sessions, per_page, 'created_at', 'desc')
+        }
+        if wants_total(request.args):
+          cursor.execute('SELECT COUNT(*) as count FROM study_sessions')
+          response['total'] = cursor.fetchone()['count']
+        return jsonify(response)
+
       # Get total count
-      cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
+      cursor.execute('SELECT COUNT(*) as count FROM study_sessions')
       total_count = cursor.fetchone()['count']
 
-      # Get paginated sessions
-      cursor.execute('''
-        SELECT 
-          ss.id,
-          ss.group_id,
-          g.name as group_name,
-          sa.id as activity_id,
-          sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        GROUP BY ss.id
-        ORDER BY ss.created_at DESC
-        LIMIT ? OFFSET ?
-      ''', (per_page, offset))
+      # Get paginated sessions, walking the created_at index newest first
+      queries.execute(cursor, 'study_sessions/list_sessions', (per_page, offset))
       sessions = cursor.fetchall()
 
       return jsonify({
@@ -135,9 +197,7 @@ def load(app):
           'group_name': session['group_name'],
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
-          'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
-          'review_items_count': session['review_items_count']
+          **session_summary(session)
         } for session in sessions],
         'total': total_count,
         'page': page,
@@ -147,29 +207,39 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  # Endpoint: GET /api/study-sessions/export streams every session as NDJSON (default) or ?format=csv
+  @app.route('/api/study-sessions/export', methods=['GET'])
+  def export_study_sessions():
+    format = export_format(request.args)
+    if format is None:
+      return jsonify({"error": "Query parameter 'format' must be ndjson or csv"}), 400
+    after_id = max(0, request.args.get('after_id', 0, type=int))
+
+    try:
+      return export_response('study_sessions/export', (after_id,), 'study_sessions', format)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /api/study-sessions/review-items/export streams the whole review history
+  @app.route('/api/study-sessions/review-items/export', methods=['GET'])
+  def export_review_items():
+    format = export_format(request.args)
+    if format is None:
+      return jsonify({"error": "Query parameter 'format' must be ndjson or csv"}), 400
+    after_id = max(0, request.args.get('after_id', 0, type=int))
+
+    try:
+      return export_response('study_sessions/export_review_items', (after_id,), 'review_items', format)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
   @app.route('/api/study-sessions/<id>', methods=['GET'])
-  @cross_origin()
   def get_study_session(id):
     try:
       cursor = app.db.cursor()
       
       # Get session details
-      cursor.execute('''
-        SELECT 
-          ss.id,
-          ss.group_id,
-          g.name as group_name,
-          sa.id as activity_id,
-          sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        WHERE ss.id = ?
-        GROUP BY ss.id
-      ''', (id,))
+      queries.execute(cursor, 'study_sessions/get_session', (id,))
       
       session = cursor.fetchone()
       if not session:
@@ -181,18 +251,7 @@ def load(app):
       offset = (page - 1) * per_page
 
       # Get the words reviewed in this session with their review status
-      cursor.execute('''
-        SELECT 
-          w.*,
-          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
-          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
-        FROM words w
-        JOIN word_review_items wri ON wri.word_id = w.id
-        WHERE wri.study_session_id = ?
-        GROUP BY w.id
-        ORDER BY w.french
-        LIMIT ? OFFSET ?
-      ''', (id, per_page, offset))
+      queries.execute(cursor, 'study_sessions/session_words', (id, per_page, offset))
       
       words = cursor.fetchall()
 
@@ -213,9 +272,7 @@ def load(app):
           'group_name': session['group_name'],
           'activity_id': session['activity_id'],
           'activity_name': session['activity_name'],
-          'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time
-          'review_items_count': session['review_items_count']
+          **session_summary(session)
         },
         'words': [{
           'id': word['id'],
@@ -232,8 +289,42 @@ def load(app):
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
+  # The words of the session's group that are most due for review, read from the due queue
+  @app.route('/api/study-sessions/<id>/next', methods=['GET'])
+  def get_next_words(id):
+    try:
+      cursor = app.db.cursor()
+      cursor.execute('SELECT id, group_id FROM study_sessions WHERE id = ?', (id,))
+      session = cursor.fetchone()
+      if not session:
+        return jsonify({"error": "Study session not found"}), 404
+
+      n = min(max(1, request.args.get('n', 20, type=int)), MAX_NEXT_WORDS)
+      queries.execute(cursor, 'study_sessions/next_words', (session['group_id'], n))
+      words = cursor.fetchall()
+
+      now = review_timestamp()
+      return jsonify({
+        'session_id': session['id'],
+        'group_id': session['group_id'],
+        'now': now,
+        'words': [{
+          'id': word['id'],
+          'french': word['french'],
+          'english': word['english'],
+          'due_at': word['due_at'],
+          'due': word['due_at'] <= now,
+          'new': word['streak'] is None,
+          'streak': word['streak'] or 0,
+          'interval_days': word['interval_days'],
+          'correct_count': word['correct_count'],
+          'wrong_count': word['wrong_count']
+        } for word in words]
+      })
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
   @app.route('/api/study-sessions/<id>/review', methods=['POST'])
-  @cross_origin()
   def create_review_item(id):
     cursor = None
     try:
@@ -265,40 +356,34 @@ def load(app):
       cursor.execute('''
         SELECT w.id 
         FROM words w
-        JOIN group_words gw ON gw.word_id = w.id
-        WHERE w.id = ? AND gw.group_id = ?
+        JOIN word_groups wg ON wg.word_id = w.id
+        WHERE w.id = ? AND wg.group_id = ?
       ''', (word_id, session['group_id']))
       if not cursor.fetchone():
         return jsonify({"error": "Word not found or not in group"}), 404
 
       # Create review item
+      created_at = review_timestamp()
       cursor.execute('''
         INSERT INTO word_review_items (
           study_session_id,
           word_id,
           correct,
           created_at
-        ) VALUES (?, ?, ?, datetime('now'))
-      ''', (id, word_id, correct))
+        ) VALUES (?, ?, ?, ?)
+      ''', (id, word_id, correct, created_at))
       
       review_id = cursor.lastrowid
+
+      # Keep the per-word counters and dashboard totals in step with the review history
+      record_reviews(cursor, session['id'], [(word_id, correct, created_at)])
       
       # Commit the transaction
       app.db.commit()
+      app.cache.invalidate('word_review_items', 'word_reviews', 'study_session_stats')
 
       # Fetch created review details
-      cursor.execute('''
-        SELECT 
-          wri.id,
-          wri.word_id,
-          w.french,
-          w.english,
-          wri.correct,
-          wri.created_at
-        FROM word_review_items wri
-        JOIN words w ON w.id = wri.word_id
-        WHERE wri.id = ?
-      ''', (review_id,))
+      queries.execute(cursor, 'study_sessions/review_details', (review_id,))
       
       review = cursor.fetchone()
       
@@ -333,8 +418,95 @@ def load(app):
         cursor.execute("ROLLBACK")
       return jsonify({"error": "An unexpected error occurred"}), 500
 
+  @app.route('/api/study-sessions/<id>/reviews', methods=['POST'])
+  def create_review_items(id):
+    connection = None
+    try:
+      # Accept either a bare array or {"reviews": [...]}
+      data = request.get_json(silent=True)
+      items = data.get('reviews') if isinstance(data, dict) else data
+      if not isinstance(items, list) or not items:
+        return jsonify({"error": "Expected a non-empty list of reviews"}), 400
+      if len(items) > MAX_REVIEW_BATCH:
+        return jsonify({"error": f"At most {MAX_REVIEW_BATCH} reviews per batch"}), 413
+
+      cursor = app.db.cursor()
+
+      # Verify study session exists and get group_id
+      cursor.execute('SELECT id, group_id FROM study_sessions WHERE id = ?', (id,))
+      session = cursor.fetchone()
+      if not session:
+        return jsonify({"error": "Study session not found"}), 404
+
+      # Validate the shape of every item before touching the database again
+      parsed = [parse_review_item(item) for item in items]
+      results = [result for result, _ in parsed]
+
+      # One set query checks group membership for the whole batch
+      word_ids = list({review[0] for _, review in parsed if review})
+      members = set()
+      if word_ids:
+        cursor.execute(f'''
+          SELECT word_id
+          FROM word_groups
+          WHERE group_id = ? AND word_id IN ({', '.join('?' for _ in word_ids)})
+        ''', (session['group_id'], *word_ids))
+        members = {row['word_id'] for row in cursor.fetchall()}
+
+      reviews = []
+      for result, review in parsed:
+        if review is None:
+          continue
+        if review[0] not in members:
+          result.update(status='rejected', error='Word not found or not in group')
+          continue
+        reviews.append(review)
+
+      if not reviews:
+        return jsonify({'created': 0, 'results': results}), 400
+
+      # Insert the whole batch in one write transaction
+      connection = app.db.get()
+      if connection.in_transaction:
+        connection.commit()
+      cursor.execute('BEGIN IMMEDIATE')
+      cursor.execute('SELECT COALESCE(MAX(id), 0) FROM word_review_items')
+      last_existing_id = cursor.fetchone()[0]
+
+      cursor.executemany('''
+        INSERT INTO word_review_items (study_session_id, word_id, correct, created_at)
+        VALUES (?, ?, ?, ?)
+      ''', [(session['id'], word_id, correct, created_at) for word_id, correct, created_at in reviews])
+
+      # The new rows are the only ones above the previous maximum, in insertion order
+      cursor.execute('SELECT id FROM word_review_items WHERE id > ? ORDER BY id', (last_existing_id,))
+      review_ids = iter(row['id'] for row in cursor.fetchall())
+
+      # Keep the per-word counters and dashboard totals in step with the review history
+      record_reviews(cursor, session['id'], reviews)
+
+      app.db.commit()
+      app.cache.invalidate('word_review_items', 'word_reviews', 'study_session_stats')
+
+      for result in results:
+        if result['status'] == 'created':
+          result['id'] = next(review_ids)
+
+      return jsonify({'created': len(reviews), 'results': results}), 201
+
+    except sqlite3.Error as e:
+      current_app.logger.error(f"Database error in create_review_items: {str(e)}")
+      if connection is not None and connection.in_transaction:
+        connection.rollback()
+      return jsonify({"error": "Database error occurred"}), 500
+
+    except Exception as e:
+      current_app.logger.error(f"Unexpected error in create_review_items: {str(e)}")
+      if connection is not None and connection.in_transaction:
+        connection.rollback()
+      return jsonify({"error": "An unexpected error occurred"}), 500
+
   @app.route('/api/study-sessions/reset', methods=['POST'])
-  @cross_origin()
   def reset_study_sessions():
     try:
       cursor = app.db.cursor()
@@ -344,8 +516,16 @@ def load(app):
       
       # Then delete all study sessions
       cursor.execute('DELETE FROM study_sessions')
+
+      # The per-word counters and dashboard totals are derived from the history that was just removed
+      cursor.execute('DELETE FROM word_reviews')
+      cursor.execute('DELETE FROM study_session_stats')
+      reset_history(cursor)
+      # With no history left every word is due again
+      rebuild_schedule(cursor)
       
       app.db.commit()
+      app.cache.invalidate('study_sessions', 'word_review_items', 'word_reviews', 'study_session_stats')
       
       return jsonify({"message": "Study history cleared successfully"}), 200
     except Exception as e:
@@ -1,11 +1,18 @@
 from flask import request, jsonify, g
-from flask_cors import cross_origin
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+import io
 import json
 
+from lib.export import export_format, export_response
+from lib.pagination import decode_cursor, keyset_condition, next_cursor, wants_total
+from lib.queries import queries
+from lib.search import match_expression
+from lib.word_import import CONFLICT_MODES, FORMATS, format_for, import_words, read_items
+from lib.workers import WriteLockTimeout, holds_write_lock_itself
+
 def load(app):
   # Endpoint: GET /words with pagination (50 words per page)
   @app.route('/words', methods=['GET'])
-  @cross_origin()
   def get_words():
     try:
       cursor = app.db.cursor()
@@ -28,6 +35,50 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
+      # Keyset mode: ?cursor= (empty for the first page) seeks past the last row seen
+      if 'cursor' in request.args:
+        # Review counts live in word_reviews, which only has rows for reviewed
+        # words, so no index orders every word by them and each page would scan
+        # and sort the whole table. Those sorts stay on page/offset.
+        sort_columns = {'french': 'w.french', 'english': 'w.english'}
+        if sort_by not in sort_columns:
+          return jsonify({"error": "Cursor pagination sorts by french or english only"}), 400
+        try:
+          after = decode_cursor(request.args['cursor'], sort_by, order)
+        except ValueError as e:
+          return jsonify({"error": str(e)}), 400
+
+        sort_column = sort_columns[sort_by]
+        where = f'WHERE {keyset_condition(sort_column, "w.id", order)}' if after else ''
+
+        cursor.execute(f'''
+          SELECT w.id, w.french, w.english, 
+              COALESCE(r.correct_count, 0) AS correct_count,
+              COALESCE(r.wrong_count, 0) AS wrong_count
+          FROM words w
+          LEFT JOIN word_reviews r ON w.id = r.word_id
+          {where}
+          ORDER BY {sort_column} {order}, w.id {order}
+          LIMIT ?
+        ''', (*(after or ()), words_per_page + 1))
+        words = cursor.fetchall()
+
+        response = {
+          "words": [{
+            "id": word["id"],
+            "french": word["french"],
+            "english": word["english"],
+            "correct_count": word["correct_count"],
+            "wrong_count": word["wrong_count"]
+          } for word in words[:words_per_page]],
+          "next_cursor": next_cursor(words, words_per_page, sort_by, order)
+        }
+        # Counting is the expensive part on big tables, so it is opt-in here
+        if wants_total(request.args):
+          cursor.execute('SELECT COUNT(*) FROM words')
+          response["total_words"] = cursor.fetchone()[0]
+        return jsonify(response)
+
       # Query to fetch words with sorting
       cursor.execute(f'''
         SELECT w.id, w.french, w.english, 
@@ -66,29 +117,109 @@ def load(app):
 
     except Exception as e:
       return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
+
+  # Endpoint: GET /words/search?q=... ranked full-text search over french, english and parts
+  @app.route('/words/search', methods=['GET'])
+  @app.cache.cached('words', 'word_reviews')
+  def search_words():
+    # Prefix matching on every term unless ?prefix=false
+    prefix = request.args.get('prefix', 'true').lower() not in ('0', 'false', 'no')
+    match = match_expression(request.args.get('q', ''), prefix=prefix)
+    if match is None:
+      return jsonify({"error": "Query parameter 'q' must contain at least one word"}), 400
+
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 20, type=int)), 100)
+    offset = (page - 1) * per_page
+
+    try:
+      cursor = app.db.cursor()
+      queries.execute(cursor, 'words/search', (match, per_page, offset))
+      words = cursor.fetchall()
+
+      queries.execute(cursor, 'words/search_count', (match,))
+      total_words = cursor.fetchone()[0]
+
+      return jsonify({
+        "words": [{
+          "id": word["id"],
+          "french": word["french"],
+          "english": word["english"],
+          "correct_count": word["correct_count"],
+          "wrong_count": word["wrong_count"]
+        } for word in words],
+        "query": request.args.get('q'),
+        "total_pages": (total_words + per_page - 1) // per_page,
+        "current_page": page,
+        "total_words": total_words
+      })
+
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: GET /words/export streams every word as NDJSON (default) or ?format=csv
+  @app.route('/words/export', methods=['GET'])
+  def export_words():
+    format = export_format(request.args)
+    if format is None:
+      return jsonify({"error": "Query parameter 'format' must be ndjson or csv"}), 400
+    # Resume an interrupted export after the last id received
+    after_id = max(0, request.args.get('after_id', 0, type=int))
+
+    try:
+      return export_response('words/export', (after_id,), 'words', format, json_columns=('parts',))
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  # Endpoint: POST /words/import bulk-loads a JSON, NDJSON or CSV upload, raw or as a multipart 'file'
+  @app.route('/words/import', methods=['POST'])
+  @holds_write_lock_itself
+  def import_words_upload():
+    # Uploads may be far larger than other request bodies; set before the body is touched
+    request.max_content_length = app.config['IMPORT_MAX_CONTENT_LENGTH']
+    try:
+      upload = request.files.get('file')
+    except RequestEntityTooLarge:
+      return jsonify({"error": "Upload too large"}), 413
+    format = request.args.get('format') or format_for(upload.filename if upload else None,
+                                                      upload.mimetype if upload else request.mimetype)
+    if format not in FORMATS:
+      return jsonify({"error": "Upload format must be json, ndjson or csv (set ?format= or the Content-Type)"}), 400
+    on_conflict = request.args.get('on_conflict', 'update')
+    if on_conflict not in CONFLICT_MODES:
+      return jsonify({"error": "Query parameter 'on_conflict' must be update or skip"}), 400
+    # Words without a group of their own go into ?group=, when given
+    group_name = request.args.get('group', '').strip() or None
+
+    # Decoded as it is read: a raw body straight from the client, a multipart
+    # file from the temporary file the form parser spooled it to
+    file = io.TextIOWrapper(upload.stream if upload else request.stream, encoding='utf-8-sig', newline='')
+    try:
+      summary = import_words(app.db.cursor(), read_items(file, format), group_name, on_conflict,
+                             write_lock=app.write_lock)
+    except ValueError as e:
+      return jsonify({"error": str(e)}), 400
+    except RequestEntityTooLarge:
+      return jsonify({"error": "Upload too large"}), 413
+    except ClientDisconnected:
+      return jsonify({"error": "Upload interrupted"}), 400
+    except WriteLockTimeout as e:
+      return jsonify({"error": str(e)}), 503
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+    app.cache.invalidate('words', 'word_groups', 'groups')
+    return jsonify(summary)
 
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/words/<int:word_id>', methods=['GET'])
-  @cross_origin()
+  @app.cache.cached('words', 'word_reviews', 'word_groups', 'groups')
   def get_word(word_id):
     try:
       cursor = app.db.cursor()
       
       # Query to fetch the word and its details
-      cursor.execute('''
-        SELECT w.id, w.french, w.english,
-               COALESCE(r.correct_count, 0) AS correct_count,
-               COALESCE(r.wrong_count, 0) AS wrong_count,
-               GROUP_CONCAT(DISTINCT g.id || '::' || g.name) as groups
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        LEFT JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN groups g ON wg.group_id = g.id
-        WHERE w.id = ?
-        GROUP BY w.id
-      ''', (word_id,))
+      queries.execute(cursor, 'words/get_word', (word_id,))
       
       word = cursor.fetchone()
       
@@ -6,6 +6,13 @@ DROP TABLE IF EXISTS study_sessions;
 DROP TABLE IF EXISTS study_activities;
 DROP TABLE IF EXISTS groups;
 DROP TABLE IF EXISTS words;
+DROP TABLE IF EXISTS dashboard_stats;
+DROP TABLE IF EXISTS study_days;
+DROP TABLE IF EXISTS study_session_stats;
+DROP TABLE IF EXISTS word_schedule;
+DROP TABLE IF EXISTS word_due_queue;
+-- Indexes live in sql/migrations and are re-applied after this reset
+DROP TABLE IF EXISTS schema_migrations;
 
 -- Create tables
 CREATE TABLE IF NOT EXISTS groups (
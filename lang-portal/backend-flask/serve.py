@@ -0,0 +1,134 @@
+"""
+Production launcher.
+
+Builds the app once in the master process (routes, named SQL, CORS origins,
+response cache), then forks worker processes that share it copy-on-write and
+accept on one listening socket. Each worker serves the ASGI adapter with
+uvicorn. Writes are serialized across workers with a file lock next to the
+database, cache invalidations are shared through shared memory, and every
+worker publishes its metrics so /metrics on any worker reports all of them.
+
+    python serve.py --workers 4 --port 5000 --database words.db
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=5, help='request threads and pooled connections per worker')
+    parser.add_argument('--database', default='words.db')
+    parser.add_argument('--reset-db', action='store_true', help='recreate the schema and test data at startup')
+    parser.add_argument('--metrics-dir', help='where workers publish their metrics (default: a temporary directory)')
+    parser.add_argument('--keep-alive', type=int, default=75, help='seconds an idle keep-alive connection stays open')
+    return parser.parse_args()
+
+def build(args):
+    from app import create_app
+    from lib.asgi import AsgiApp
+
+    database = os.path.abspath(args.database)
+    metrics_dir = args.metrics_dir or tempfile.mkdtemp(prefix='lang-portal-workers-')
+    os.makedirs(metrics_dir, exist_ok=True)
+    app = create_app({
+        'DATABASE': database,
+        'RESET_DB': args.reset_db,
+        'DB_POOL_SIZE': args.threads,
+        'WRITE_LOCK_FILE': database + '.write-lock',
+        'WORKER_METRICS_DIR': metrics_dir
+    })
+    app.cache.share_versions()
+    # No SQLite connection may be inherited by the workers
+    app.db.dispose()
+    application = AsgiApp(app, max_workers=args.threads, max_pending=app.config['ASGI_MAX_PENDING'])
+    return app, application
+
+def run_worker(index, listener, app, application, args):
+    import uvicorn
+    from lib.workers import WorkerStats
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    app.worker_stats = WorkerStats(app.config['WORKER_METRICS_DIR'], index)
+    app.worker_stats.start(app)
+    config = uvicorn.Config(
+        application,
+        fd=listener.fileno(),
+        timeout_keep_alive=args.keep_alive,
+        log_level='warning',
+        lifespan='on'
+    )
+    uvicorn.Server(config).run()
+
+def spawn(index, listener, app, application, args):
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            run_worker(index, listener, app, application, args)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+    return pid
+
+def write_master(metrics_dir, restarts):
+    path = os.path.join(metrics_dir, 'master.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'pid': os.getpid(), 'restarts': restarts}, f)
+    os.replace(path + '.tmp', path)
+
+def main():
+    args = parse_args()
+    app, application = build(args)
+    metrics_dir = app.config['WORKER_METRICS_DIR']
+
+    listener = socket.create_server((args.host, args.port), backlog=2048)
+    listener.set_inheritable(True)
+
+    workers = {spawn(i, listener, app, application, args): i for i in range(args.workers)}
+    restarts = 0
+    write_master(metrics_dir, restarts)
+    print(f'Serving on http://{args.host}:{args.port} with {args.workers} workers (metrics in {metrics_dir})', flush=True)
+
+    stopping = False
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = workers.pop(pid, None)
+        if index is None or stopping:
+            continue
+        # Replace a worker that died, backing off if it crashes right away
+        print(f'Worker {index} (pid {pid}) exited with status {status}, restarting', file=sys.stderr, flush=True)
+        time.sleep(1)
+        restarts += 1
+        write_master(metrics_dir, restarts)
+        workers[spawn(index, listener, app, application, args)] = index
+
+    listener.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+SELECT
+    ss.id,
+    ss.group_id,
+    sa.name as activity_name,
+    ss.created_at
+FROM study_sessions ss
+JOIN study_activities sa ON ss.study_activity_id = sa.id
+ORDER BY ss.created_at DESC
+LIMIT 1;
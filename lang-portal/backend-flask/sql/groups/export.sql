@@ -0,0 +1,7 @@
+SELECT
+  g.id,
+  g.name,
+  g.words_count
+FROM groups g
+WHERE g.id > ?
+ORDER BY g.id;
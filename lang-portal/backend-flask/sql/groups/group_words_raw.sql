@@ -0,0 +1,11 @@
+SELECT
+  w.id,
+  w.french,
+  w.english,
+  COALESCE(wr.correct_count, 0) as correct_count,
+  COALESCE(wr.wrong_count, 0) as wrong_count
+FROM words w
+JOIN word_groups wg ON w.id = wg.word_id
+LEFT JOIN word_reviews wr ON w.id = wr.word_id
+WHERE wg.group_id = ?
+ORDER BY w.french ASC;
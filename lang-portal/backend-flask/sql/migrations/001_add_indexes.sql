@@ -0,0 +1,21 @@
+-- Group membership lookups in both directions (/groups/:id/words and /words/:id)
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_word ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_group ON word_groups (word_id, group_id);
+
+-- Per-session review counts, correct/wrong split and last activity straight from the index
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session ON word_review_items (study_session_id, created_at, correct);
+
+-- Per-word attempt counts for the dashboard, covering the join back to study_sessions
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word ON word_review_items (word_id, study_session_id, correct);
+
+-- Session listings are newest first, overall and per group / activity
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at ON study_sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity ON study_sessions (study_activity_id, created_at);
+
+-- Review counters are joined onto every word listing
+CREATE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
+
+-- Word listings sort by either language
+CREATE INDEX IF NOT EXISTS idx_words_french ON words (french);
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english);
@@ -0,0 +1,15 @@
+-- word_reviews becomes a per-word counter table maintained on every review,
+-- so it needs exactly one row per word
+DROP INDEX IF EXISTS idx_word_reviews_word;
+DELETE FROM word_reviews;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
+
+-- Backfill from the review history recorded so far
+INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT
+  word_id,
+  SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+  MAX(created_at)
+FROM word_review_items
+GROUP BY word_id;
@@ -0,0 +1,69 @@
+-- Single-row store for the /dashboard/stats totals, updated as sessions and reviews are written
+CREATE TABLE IF NOT EXISTS dashboard_stats (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  total_vocabulary INTEGER NOT NULL DEFAULT 0,
+  total_words_studied INTEGER NOT NULL DEFAULT 0,  -- Words with at least one review
+  mastered_words INTEGER NOT NULL DEFAULT 0,  -- Words with >= 5 attempts and >= 80% correct
+  review_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  total_sessions INTEGER NOT NULL DEFAULT 0,
+  streak_days INTEGER NOT NULL DEFAULT 0  -- Study days directly following another study day, plus the first
+);
+
+-- One row per day and group with at least one session, for streaks and active groups
+CREATE TABLE IF NOT EXISTS study_days (
+  study_date TEXT NOT NULL,
+  group_id INTEGER NOT NULL,
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (study_date, group_id)
+);
+
+-- Vocabulary changes through many paths (seeding, imports), so a trigger keeps it exact
+CREATE TRIGGER IF NOT EXISTS trg_words_insert_stats AFTER INSERT ON words
+BEGIN
+  UPDATE dashboard_stats SET total_vocabulary = total_vocabulary + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_words_delete_stats AFTER DELETE ON words
+BEGIN
+  UPDATE dashboard_stats SET total_vocabulary = total_vocabulary - 1 WHERE id = 1;
+END;
+
+-- Backfill from existing history
+DELETE FROM study_days;
+INSERT INTO study_days (study_date, group_id, sessions_count)
+SELECT date(created_at), group_id, COUNT(*)
+FROM study_sessions
+GROUP BY date(created_at), group_id;
+
+INSERT OR REPLACE INTO dashboard_stats (
+  id, total_vocabulary, total_words_studied, mastered_words,
+  review_count, correct_count, total_sessions, streak_days
+)
+WITH reviews AS (
+  SELECT wri.word_id, wri.correct
+  FROM word_review_items wri
+  JOIN study_sessions ss ON wri.study_session_id = ss.id
+),
+word_stats AS (
+  SELECT
+    word_id,
+    COUNT(*) as total_attempts,
+    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
+  FROM reviews
+  GROUP BY word_id
+),
+streak_calc AS (
+  SELECT
+    julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
+  FROM (SELECT DISTINCT study_date FROM study_days)
+)
+SELECT
+  1,
+  (SELECT COUNT(*) FROM words),
+  (SELECT COUNT(*) FROM word_stats),
+  (SELECT COUNT(*) FROM word_stats WHERE total_attempts >= 5 AND success_rate >= 0.8),
+  (SELECT COUNT(*) FROM reviews),
+  (SELECT COALESCE(SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END), 0) FROM reviews),
+  (SELECT COUNT(*) FROM study_sessions),
+  (SELECT COUNT(*) FROM streak_calc WHERE days_diff = 1 OR days_diff IS NULL);
@@ -0,0 +1,26 @@
+-- Per-session review summary maintained on review insert, so session listings
+-- never have to aggregate word_review_items
+CREATE TABLE IF NOT EXISTS study_session_stats (
+  study_session_id INTEGER PRIMARY KEY,
+  review_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  first_review_at DATETIME,  -- Timestamp of the earliest review in the session
+  last_review_at DATETIME,  -- Timestamp of the latest review in the session
+  FOREIGN KEY (study_session_id) REFERENCES study_sessions(id)
+);
+
+-- Backfill from existing history
+DELETE FROM study_session_stats;
+INSERT INTO study_session_stats (
+  study_session_id, review_count, correct_count, wrong_count, first_review_at, last_review_at
+)
+SELECT
+  study_session_id,
+  COUNT(*),
+  SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+  SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+  MIN(created_at),
+  MAX(created_at)
+FROM word_review_items
+GROUP BY study_session_id;
@@ -0,0 +1,50 @@
+-- Full-text index over words for /words/search. unicode61 with
+-- remove_diacritics 2 folds case and accents, so "eleve" finds "élève";
+-- the prefix indexes keep short "abc*" queries off a full term scan.
+-- parts is indexed as the text of its JSON values, not the JSON itself.
+DROP TABLE IF EXISTS words_fts;
+CREATE VIRTUAL TABLE words_fts USING fts5(
+  french,
+  english,
+  parts,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '2 3'
+);
+
+-- rowid is the word id; the triggers keep the index in step with words
+DROP TRIGGER IF EXISTS words_fts_insert;
+CREATE TRIGGER words_fts_insert AFTER INSERT ON words BEGIN
+  INSERT INTO words_fts (rowid, french, english, parts)
+  VALUES (
+    NEW.id, NEW.french, NEW.english,
+    CASE WHEN json_valid(NEW.parts)
+      THEN (SELECT group_concat(value, ' ') FROM json_tree(NEW.parts) WHERE type = 'text')
+      ELSE NEW.parts END
+  );
+END;
+
+DROP TRIGGER IF EXISTS words_fts_delete;
+CREATE TRIGGER words_fts_delete AFTER DELETE ON words BEGIN
+  DELETE FROM words_fts WHERE rowid = OLD.id;
+END;
+
+DROP TRIGGER IF EXISTS words_fts_update;
+CREATE TRIGGER words_fts_update AFTER UPDATE OF id, french, english, parts ON words BEGIN
+  DELETE FROM words_fts WHERE rowid = OLD.id;
+  INSERT INTO words_fts (rowid, french, english, parts)
+  VALUES (
+    NEW.id, NEW.french, NEW.english,
+    CASE WHEN json_valid(NEW.parts)
+      THEN (SELECT group_concat(value, ' ') FROM json_tree(NEW.parts) WHERE type = 'text')
+      ELSE NEW.parts END
+  );
+END;
+
+-- Backfill the words stored so far
+INSERT INTO words_fts (rowid, french, english, parts)
+SELECT
+  id, french, english,
+  CASE WHEN json_valid(parts)
+    THEN (SELECT group_concat(value, ' ') FROM json_tree(words.parts) WHERE type = 'text')
+    ELSE parts END
+FROM words;
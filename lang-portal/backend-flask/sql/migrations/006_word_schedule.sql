@@ -0,0 +1,47 @@
+-- Spaced-repetition schedule per word and a due queue per (group, word), see
+-- lib/schedule.py. /api/study-sessions/:id/next reads the most due words of a
+-- group straight from idx_word_due_queue_due.
+DROP TABLE IF EXISTS word_schedule;
+CREATE TABLE word_schedule (
+  word_id INTEGER PRIMARY KEY,
+  streak INTEGER NOT NULL,  -- Correct answers since the last wrong one
+  lapses INTEGER NOT NULL,  -- Wrong answers overall
+  ease REAL NOT NULL,
+  interval_days REAL NOT NULL,
+  reviewed_at DATETIME NOT NULL,  -- Timestamp of the latest review
+  due_at DATETIME NOT NULL,
+  FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+DROP TABLE IF EXISTS word_due_queue;
+CREATE TABLE word_due_queue (
+  group_id INTEGER NOT NULL,
+  word_id INTEGER NOT NULL,
+  due_at DATETIME NOT NULL,
+  PRIMARY KEY (group_id, word_id)
+) WITHOUT ROWID;
+CREATE INDEX idx_word_due_queue_due ON word_due_queue (group_id, due_at, word_id);
+-- A review moves the word in every group it belongs to
+CREATE INDEX idx_word_due_queue_word ON word_due_queue (word_id);
+
+-- Memberships enter the queue due now, or at the word's scheduled time
+DROP TRIGGER IF EXISTS word_due_queue_insert;
+CREATE TRIGGER word_due_queue_insert AFTER INSERT ON word_groups BEGIN
+  INSERT OR IGNORE INTO word_due_queue (group_id, word_id, due_at)
+  VALUES (
+    NEW.group_id, NEW.word_id,
+    COALESCE((SELECT due_at FROM word_schedule WHERE word_id = NEW.word_id), datetime('now'))
+  );
+END;
+
+DROP TRIGGER IF EXISTS word_due_queue_delete;
+CREATE TRIGGER word_due_queue_delete AFTER DELETE ON word_groups BEGIN
+  DELETE FROM word_due_queue
+  WHERE group_id = OLD.group_id AND word_id = OLD.word_id
+    AND NOT EXISTS (SELECT 1 FROM word_groups WHERE group_id = OLD.group_id AND word_id = OLD.word_id);
+END;
+
+-- The schedule and queue are backfilled from the review history by
+-- lib/schedule.rebuild_schedule, which the migration runner calls once every
+-- pending migration is applied (lib/migrations.BACKFILLS), so the schedule
+-- rules have one copy and always run against the current schema
@@ -0,0 +1,11 @@
+-- Normalized french/english key used by /words/import to find a word that
+-- already exists. Keys are computed in Python (lib/word_import.py), which
+-- folds case and spacing the same way for every alphabet; words written by
+-- other paths start without one and are keyed at the start of the next import.
+ALTER TABLE words ADD COLUMN word_key TEXT;
+
+-- One word per key; the upsert's ON CONFLICT target
+CREATE UNIQUE INDEX IF NOT EXISTS idx_words_key ON words (word_key) WHERE word_key IS NOT NULL;
+
+-- Words still waiting for a key, found without scanning the table
+CREATE INDEX IF NOT EXISTS idx_words_unkeyed ON words (id) WHERE word_key IS NULL;
@@ -0,0 +1,23 @@
+-- groups.words_count is a counter cache of word_groups rows per group. These
+-- triggers keep it exact for every write to word_groups, so group listings
+-- and totals read the column instead of counting. Bulk loaders suspend them
+-- and recount the groups they touched once (lib/groups.py).
+DROP TRIGGER IF EXISTS word_groups_count_insert;
+CREATE TRIGGER word_groups_count_insert AFTER INSERT ON word_groups BEGIN
+  UPDATE groups SET words_count = COALESCE(words_count, 0) + 1 WHERE id = NEW.group_id;
+END;
+
+DROP TRIGGER IF EXISTS word_groups_count_delete;
+CREATE TRIGGER word_groups_count_delete AFTER DELETE ON word_groups BEGIN
+  UPDATE groups SET words_count = COALESCE(words_count, 0) - 1 WHERE id = OLD.group_id;
+END;
+
+DROP TRIGGER IF EXISTS word_groups_count_update;
+CREATE TRIGGER word_groups_count_update AFTER UPDATE OF group_id ON word_groups
+WHEN NEW.group_id IS NOT OLD.group_id BEGIN
+  UPDATE groups SET words_count = COALESCE(words_count, 0) - 1 WHERE id = OLD.group_id;
+  UPDATE groups SET words_count = COALESCE(words_count, 0) + 1 WHERE id = NEW.group_id;
+END;
+
+-- Start from the real counts; anything written before now may have drifted
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
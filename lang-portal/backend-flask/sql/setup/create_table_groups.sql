@@ -1,5 +1,5 @@
 CREATE TABLE IF NOT EXISTS groups (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   name TEXT NOT NULL,
-  words_count INTEGER DEFAULT 0  -- Counter cache for the number of words in the group
+  words_count INTEGER DEFAULT 0  -- Counter cache for the number of words in the group, see migration 008
 );
\ No newline at end of file
@@ -0,0 +1,33 @@
+-- Full recomputation of the dashboard statistics from the raw tables.
+-- Used to rebuild dashboard_stats and to check the incremental values for drift.
+WITH reviews AS (
+  SELECT wri.word_id, wri.correct
+  FROM word_review_items wri
+  JOIN study_sessions ss ON wri.study_session_id = ss.id
+),
+word_stats AS (
+  SELECT
+    word_id,
+    COUNT(*) as total_attempts,
+    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
+  FROM reviews
+  GROUP BY word_id
+),
+daily_sessions AS (
+  SELECT date(created_at) as study_date
+  FROM study_sessions
+  GROUP BY date(created_at)
+),
+streak_calc AS (
+  SELECT
+    julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
+  FROM daily_sessions
+)
+SELECT
+  (SELECT COUNT(*) FROM words) as total_vocabulary,
+  (SELECT COUNT(*) FROM word_stats) as total_words_studied,
+  (SELECT COUNT(*) FROM word_stats WHERE total_attempts >= 5 AND success_rate >= 0.8) as mastered_words,
+  (SELECT COUNT(*) FROM reviews) as review_count,
+  (SELECT COALESCE(SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END), 0) FROM reviews) as correct_count,
+  (SELECT COUNT(*) FROM study_sessions) as total_sessions,
+  (SELECT COUNT(*) FROM streak_calc WHERE days_diff = 1 OR days_diff IS NULL) as streak_days
@@ -0,0 +1 @@
+SELECT url FROM study_activities;
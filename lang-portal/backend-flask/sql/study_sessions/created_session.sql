@@ -0,0 +1,11 @@
+SELECT
+    ss.id,
+    ss.group_id,
+    g.name as group_name,
+    sa.id as activity_id,
+    sa.name as activity_name,
+    ss.created_at
+FROM study_sessions ss
+JOIN groups g ON g.id = ss.group_id
+JOIN study_activities sa ON sa.id = ss.study_activity_id
+WHERE ss.id = ?;
@@ -0,0 +1,17 @@
+SELECT
+  ss.id,
+  ss.group_id,
+  g.name as group_name,
+  sa.id as activity_id,
+  sa.name as activity_name,
+  ss.created_at,
+  COALESCE(st.review_count, 0) as review_items_count,
+  COALESCE(st.correct_count, 0) as correct_count,
+  COALESCE(st.wrong_count, 0) as wrong_count,
+  st.last_review_at
+FROM study_sessions ss
+JOIN groups g ON g.id = ss.group_id
+JOIN study_activities sa ON sa.id = ss.study_activity_id
+LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
+WHERE ss.id > ?
+ORDER BY ss.id;
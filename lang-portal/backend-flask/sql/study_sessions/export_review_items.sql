@@ -0,0 +1,12 @@
+SELECT
+  wri.id,
+  wri.study_session_id,
+  wri.word_id,
+  w.french,
+  w.english,
+  wri.correct,
+  wri.created_at
+FROM word_review_items wri
+JOIN words w ON w.id = wri.word_id
+WHERE wri.id > ?
+ORDER BY wri.id;
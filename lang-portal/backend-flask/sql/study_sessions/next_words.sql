@@ -0,0 +1,16 @@
+SELECT
+    q.word_id AS id,
+    w.french,
+    w.english,
+    q.due_at,
+    s.streak,
+    s.interval_days,
+    COALESCE(r.correct_count, 0) AS correct_count,
+    COALESCE(r.wrong_count, 0) AS wrong_count
+FROM word_due_queue q
+JOIN words w ON w.id = q.word_id
+LEFT JOIN word_schedule s ON s.word_id = q.word_id
+LEFT JOIN word_reviews r ON r.word_id = q.word_id
+WHERE q.group_id = ?
+ORDER BY q.due_at, q.word_id
+LIMIT ?;
@@ -0,0 +1,10 @@
+SELECT
+  wri.id,
+  wri.word_id,
+  w.french,
+  w.english,
+  wri.correct,
+  wri.created_at
+FROM word_review_items wri
+JOIN words w ON w.id = wri.word_id
+WHERE wri.id = ?;
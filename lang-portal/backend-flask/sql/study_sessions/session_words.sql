@@ -0,0 +1,10 @@
+SELECT
+  w.*,
+  COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
+  COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
+FROM words w
+JOIN word_review_items wri ON wri.word_id = w.id
+WHERE wri.study_session_id = ?
+GROUP BY w.id
+ORDER BY w.french
+LIMIT ? OFFSET ?;
@@ -0,0 +1,11 @@
+SELECT
+  w.id,
+  w.french,
+  w.english,
+  w.parts,
+  COALESCE(wr.correct_count, 0) as correct_count,
+  COALESCE(wr.wrong_count, 0) as wrong_count
+FROM words w
+LEFT JOIN word_reviews wr ON wr.word_id = w.id
+WHERE w.id > ?
+ORDER BY w.id;
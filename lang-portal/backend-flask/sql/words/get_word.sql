@@ -0,0 +1,10 @@
+SELECT w.id, w.french, w.english,
+       COALESCE(r.correct_count, 0) AS correct_count,
+       COALESCE(r.wrong_count, 0) AS wrong_count,
+       GROUP_CONCAT(DISTINCT g.id || '::' || g.name) as groups
+FROM words w
+LEFT JOIN word_reviews r ON w.id = r.word_id
+LEFT JOIN word_groups wg ON w.id = wg.word_id
+LEFT JOIN groups g ON wg.group_id = g.id
+WHERE w.id = ?
+GROUP BY w.id;
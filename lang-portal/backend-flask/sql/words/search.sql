@@ -0,0 +1,10 @@
+SELECT w.id, w.french, w.english,
+    COALESCE(r.correct_count, 0) AS correct_count,
+    COALESCE(r.wrong_count, 0) AS wrong_count,
+    bm25(words_fts, 10.0, 10.0, 2.0) AS rank
+FROM words_fts
+JOIN words w ON w.id = words_fts.rowid
+LEFT JOIN word_reviews r ON r.word_id = w.id
+WHERE words_fts MATCH ?
+ORDER BY rank, w.id
+LIMIT ? OFFSET ?;
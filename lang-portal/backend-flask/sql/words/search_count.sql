@@ -0,0 +1 @@
+SELECT COUNT(*) FROM words_fts WHERE words_fts MATCH ?;
@@ -6,4 +6,143 @@ def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task
+def rebuild_word_reviews(c):
+  from flask import Flask
+  from lib.reviews import rebuild_word_counters
+  app = Flask(__name__)
+  with app.app_context():
+    cursor = db.cursor()
+    count = rebuild_word_counters(cursor)
+    db.commit()
+    db.close()
+  print(f"Rebuilt review counters for {count} words.")
+
+@task
+def check_stats(c):
+  from flask import Flask
+  from lib.stats import check_stats as check_dashboard_stats
+  app = Flask(__name__)
+  with app.app_context():
+    drift = check_dashboard_stats(db.cursor())
+    db.close()
+  if not drift:
+    print("Dashboard statistics match a full recomputation.")
+  for field, (stored, actual) in drift.items():
+    print(f"{field}: stored {stored}, actual {actual}")
+
+@task
+def rebuild_stats(c):
+  from flask import Flask
+  from lib.stats import rebuild_stats as rebuild_dashboard_stats
+  app = Flask(__name__)
+  with app.app_context():
+    stats = rebuild_dashboard_stats(db.cursor())
+    db.commit()
+    db.close()
+  print(f"Rebuilt dashboard statistics: {stats}")
+
+@task
+def rebuild_session_stats(c):
+  from flask import Flask
+  from lib.sessions import rebuild_session_stats as rebuild_study_session_stats
+  app = Flask(__name__)
+  with app.app_context():
+    count = rebuild_study_session_stats(db.cursor())
+    db.commit()
+    db.close()
+  print(f"Rebuilt review summaries for {count} study sessions.")
+
+@task
+def rebuild_schedule(c):
+  from flask import Flask
+  from lib.schedule import rebuild_schedule as rebuild_word_schedule
+  app = Flask(__name__)
+  with app.app_context():
+    count = rebuild_word_schedule(db.cursor())
+    db.commit()
+    db.close()
+  print(f"Rebuilt the review schedule for {count} words.")
+
+@task
+def check_schedule(c):
+  from flask import Flask
+  from lib.schedule import check_schedule as check_word_schedule
+  app = Flask(__name__)
+  with app.app_context():
+    drift = check_word_schedule(db.cursor())
+    db.close()
+  if not drift:
+    print("The review schedule matches a full recomputation.")
+  for word_id, (stored, actual) in sorted(drift.items()):
+    print(f"word {word_id}: stored {stored}, actual {actual}")
+
+@task
+def rebuild_group_counts(c):
+  from flask import Flask
+  from lib.groups import rebuild_group_counts as recount_all_groups
+  app = Flask(__name__)
+  with app.app_context():
+    count = recount_all_groups(db.cursor())
+    db.commit()
+    db.close()
+  print(f"Recounted the words of {count} groups.")
+
+@task
+def check_group_counts(c):
+  from flask import Flask
+  from lib.groups import check_group_counts as check_counts
+  app = Flask(__name__)
+  with app.app_context():
+    drift = check_counts(db.cursor())
+    db.close()
+  if not drift:
+    print("Every group's words_count matches its word_groups rows.")
+  for group_id, (stored, actual) in sorted(drift.items()):
+    print(f"group {group_id}: stored {stored}, actual {actual}")
+
+@task(help={
+  'words': 'Number of words',
+  'groups': 'Number of groups',
+  'sessions': 'Number of study sessions',
+  'reviews': 'Number of review items',
+  'seed': 'Random seed; the same seed and end produce the same data',
+  'end': 'Unix time the generated history ends at (default 2025-01-01 00:00 UTC)',
+  'database': 'SQLite file to (re)create (default synthetic.db, so words.db is left alone)'
+})
+def generate_data(c, words=1000000, groups=200, sessions=200000, reviews=5000000, seed=42, end=1735689600,
+                  database='synthetic.db'):
+  from lib.db import connect
+  from lib.migrations import run_migrations
+  from lib.synthetic import generate
+  # Starts from the same schema as the app, replacing any existing data
+  connection = connect(database)
+  with open('schema.sql') as f:
+    connection.executescript(f.read())
+  run_migrations(connection)
+  summary = generate(connection, words, groups, sessions, reviews, seed, end=end)
+  connection.close()
+  print(f"Generated {summary['words']} words, {summary['memberships']} group memberships, "
+        f"{summary['sessions']} sessions and {summary['reviews']} review items in {database} "
+        f"({summary['rows_per_second']} rows/sec).")
+
+@task(help={
+  'path': 'JSON, NDJSON or CSV file of words with french, english and optional parts and group',
+  'group': 'Group for the words that do not name one',
+  'on_conflict': "For words already stored: 'update' their parts or 'skip' them",
+  'format': 'json, ndjson or csv; taken from the file extension by default'
+})
+def import_words(c, path, group=None, on_conflict='update', format=None):
+  from flask import Flask
+  from lib.word_import import format_for, import_words as import_word_file, read_items
+  app = Flask(__name__)
+  with app.app_context(), open(path, encoding='utf-8-sig', newline='') as file:
+    summary = import_word_file(db.cursor(), read_items(file, format or format_for(path)), group, on_conflict)
+    db.close()
+  print(f"Read {summary['received']} words from {path}: {summary['inserted']} added, {summary['updated']} updated, "
+        f"{summary['unchanged']} already known, {summary['rejected']} rejected, {summary['attached']} added to groups "
+        f"in {summary['seconds']:.2f}s ({summary['rows_per_second']} rows/sec).")
+  for error in summary['errors']:
+    print(f"line {error['line']}: {error['error']}")
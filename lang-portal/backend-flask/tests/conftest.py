@@ -7,7 +7,7 @@ import pytest
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app
-from lib.db import init_db, get_db
+from lib.db import init_db
 
 @pytest.fixture
 def app():
@@ -20,13 +20,10 @@ def app():
 
     with app.app_context():
         init_db()
-        db = get_db()
-        app.db = db
         yield app
-        
-        # Cleanup
-        db.close()
     
+    # Cleanup
+    app.db.dispose()
     os.close(db_fd)
     try:
         os.unlink(db_path)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+
+from lib.asgi import AsgiApp
+
+def call(application, method, path, body=b'', query=b'', headers=(), chunk_size=None):
+    """Run one request through the ASGI app and return (status, headers, body)"""
+    if chunk_size is None:
+        messages = [{'type': 'http.request', 'body': body[:5], 'more_body': len(body) > 5}]
+        if len(body) > 5:
+            messages.append({'type': 'http.request', 'body': body[5:], 'more_body': False})
+    else:
+        messages = [{'type': 'http.request', 'body': body[i:i + chunk_size], 'more_body': i + chunk_size < len(body)}
+                    for i in range(0, len(body), chunk_size)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query,
+        'headers': [(b'host', b'testserver')] + list(headers), 'http_version': '1.1'
+    }
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+def test_asgi_serves_flask_routes(app):
+    """Test that GET and JSON POST requests reach the Flask views through the adapter"""
+    application = AsgiApp(app, max_workers=2)
+    status, headers, body = call(application, 'GET', '/groups', query=b'page=1')
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    assert json.loads(body)['current_page'] == 1
+
+    payload = json.dumps({'group_id': 1, 'study_activity_id': 1}).encode()
+    status, _, body = call(application, 'POST', '/api/study-sessions', body=payload,
+                           headers=[(b'content-type', b'application/json')])
+    assert status == 201
+    assert json.loads(body)['group_id'] == 1
+
+    status, _, _ = call(application, 'GET', '/no-such-route')
+    assert status == 404
+
+def test_asgi_streams_unsized_responses():
+    """Test that responses without a Content-Length are forwarded chunk by chunk and closed"""
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            yield b'one,'
+            yield b''
+            yield b'two'
+        def close(self):
+            closed.append(True)
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/csv')])
+        return Body()
+
+    status, headers, body = call(AsgiApp(wsgi_app), 'GET', '/export')
+    assert status == 200 and body == b'one,two'
+    assert closed == [True]
+
+def test_asgi_sheds_load_and_limits_bodies():
+    """Test that a full queue answers 503 and oversized bodies 413 without reaching the app"""
+    def wsgi_app(environ, start_response):
+        raise AssertionError('should not be called')
+
+    busy = AsgiApp(wsgi_app, max_pending=0)
+    status, headers, _ = call(busy, 'GET', '/')
+    assert status == 503 and headers[b'retry-after'] == b'1'
+    assert busy.rejected == 1
+
+    status, _, _ = call(AsgiApp(wsgi_app, max_body_size=8), 'POST', '/', body=b'x' * 20)
+    assert status == 413
+
+def test_asgi_builds_wsgi_environ():
+    """Test the scope to environ translation, including repeated headers and the body"""
+    seen = {}
+
+    def wsgi_app(environ, start_response):
+        seen.update(environ)
+        seen['body'] = environ['wsgi.input'].read()
+        start_response('204 No Content', [('Content-Length', '0')])
+        return []
+
+    call(AsgiApp(wsgi_app), 'POST', '/mots/été', body=b'{"a": 1}', query=b'x=1',
+         headers=[(b'content-type', b'application/json'), (b'accept', b'a'), (b'accept', b'b')])
+    assert seen['PATH_INFO'].encode('latin-1').decode('utf-8') == '/mots/été'
+    assert seen['QUERY_STRING'] == 'x=1'
+    assert seen['CONTENT_TYPE'] == 'application/json'
+    assert seen['CONTENT_LENGTH'] == '8'
+    assert seen['HTTP_ACCEPT'] == 'a,b'
+    assert seen['body'] == b'{"a": 1}'
+
+def test_asgi_streams_large_bodies_to_the_app():
+    """Test that a body past buffer_size is dispatched early and read as it arrives"""
+    seen = {}
+
+    def wsgi_app(environ, start_response):
+        seen['first'] = environ['wsgi.input'].read(4)
+        seen['rest'] = environ['wsgi.input'].read()
+        seen['content_length'] = environ.get('CONTENT_LENGTH')
+        start_response('204 No Content', [('Content-Length', '0')])
+        return []
+
+    status, _, _ = call(AsgiApp(wsgi_app, buffer_size=8), 'POST', '/upload', body=b'0123456789' * 10, chunk_size=3)
+    assert status == 204
+    assert seen['first'] + seen['rest'] == b'0123456789' * 10
+    assert seen['content_length'] is None
+
+def test_asgi_large_uploads_follow_the_app_limits(app):
+    """Test that /words/import reads past MAX_CONTENT_LENGTH up to its own limit"""
+    app.config['MAX_CONTENT_LENGTH'] = 200
+    application = AsgiApp(app, max_workers=2, buffer_size=64)
+    rows = ''.join(f'mot{i},word{i}\n' for i in range(100)).encode()
+    body = b'french,english\n' + rows
+
+    status, _, response = call(application, 'POST', '/words/import', body=body, chunk_size=50,
+                               headers=[(b'content-type', b'text/csv')])
+    assert status == 200 and json.loads(response)['inserted'] == 100
+
+    app.config['IMPORT_MAX_CONTENT_LENGTH'] = 500
+    status, _, response = call(application, 'POST', '/words/import', body=body, chunk_size=50,
+                               headers=[(b'content-type', b'text/csv')])
+    assert status == 413 and json.loads(response)['error'] == 'Upload too large'
+
+def test_asgi_shutdown_drains_streams_off_the_loop():
+    """Test that shutdown lets an in-flight stream finish and refuses new requests meanwhile"""
+    release = threading.Event()
+
+    def wsgi_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        def body():
+            yield b'first,'
+            release.wait(5)
+            yield b'last'
+        return body()
+
+    application = AsgiApp(wsgi_app, max_workers=2)
+    streamed, lifespan_sent = [], []
+
+    async def main():
+        async def stream_receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def stream_send(message):
+            streamed.append(message)
+
+        lifespan_messages = [{'type': 'lifespan.shutdown'}]
+
+        async def lifespan_receive():
+            return lifespan_messages.pop(0)
+
+        async def lifespan_send(message):
+            lifespan_sent.append(message['type'])
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/', 'query_string': b'', 'headers': []}
+        stream = asyncio.create_task(application(scope, stream_receive, stream_send))
+        while len(streamed) < 2:
+            await asyncio.sleep(0.01)
+        shutdown = asyncio.create_task(application({'type': 'lifespan'}, lifespan_receive, lifespan_send))
+        await asyncio.sleep(0.05)
+
+        # The loop is still free: a new request is answered, with a refusal
+        refused = []
+        async def refused_send(message):
+            refused.append(message)
+        await application(scope, stream_receive, refused_send)
+        assert refused[0]['status'] == 503
+        assert lifespan_sent == []
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(stream, shutdown), 5)
+
+    asyncio.run(main())
+    assert b''.join(m.get('body', b'') for m in streamed[1:]) == b'first,last'
+    assert lifespan_sent == ['lifespan.shutdown.complete']
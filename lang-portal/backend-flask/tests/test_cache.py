@@ -0,0 +1,69 @@
+import time
+
+from lib.cache import ResponseCache
+
+def test_lru_evicts_by_entries_and_bytes():
+    """Test that the least recently used entries go first when either bound is hit"""
+    cache = ResponseCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.put('a', b'aaaa', 'application/json')
+    cache.put('b', b'bbbb', 'application/json')
+    assert cache.get('a') is not None  # a is now most recently used
+    cache.put('c', b'cccc', 'application/json')
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+
+    cache.put('d', b'dddddddd', 'application/json')
+    assert cache.stats()['bytes'] <= 10
+    assert cache.get('d') is not None
+    assert cache.stats()['evictions'] >= 2
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl=0.01)
+    cache.put('a', b'{}', 'application/json')
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+def test_cached_endpoint_supports_etags(client):
+    """Test that repeat requests are served from cache and revalidate with 304"""
+    first = client.get('/groups')
+    assert first.status_code == 200
+    assert first.headers['X-Cache'] == 'MISS'
+    etag = first.headers['ETag']
+
+    second = client.get('/groups')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    not_modified = client.get('/groups', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    # Query args are part of the key
+    assert client.get('/groups?page=2').headers['X-Cache'] == 'MISS'
+
+def test_review_write_invalidates_word_details(client, app):
+    """Test that posting a review bumps word_reviews so /words/<id> is rebuilt"""
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('chat', 'cat', '[]')")
+    word_id = cursor.lastrowid
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (word_id,))
+    app.db.commit()
+
+    before = client.get(f'/words/{word_id}')
+    assert before.get_json()['word']['correct_count'] == 0
+    assert client.get(f'/words/{word_id}').headers['X-Cache'] == 'HIT'
+
+    session = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1}).get_json()
+    client.post(f"/api/study-sessions/{session['id']}/review", json={'word_id': word_id, 'correct': True})
+
+    after = client.get(f'/words/{word_id}', headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.headers['X-Cache'] == 'MISS'
+    assert after.get_json()['word']['correct_count'] == 1
+
+def test_errors_are_not_cached(client):
+    assert client.get('/groups/999999').status_code == 404
+    response = client.get('/groups/999999')
+    assert response.status_code == 404
+    assert 'X-Cache' not in response.headers
@@ -0,0 +1,67 @@
+from lib.cors import origin_of
+
+def test_origin_of_normalizes_urls():
+    """Test that activity URLs reduce to the origin a browser would send"""
+    assert origin_of('http://localhost:8080/app?x=1') == 'http://localhost:8080'
+    assert origin_of('HTTPS://Example.com:443/path') == 'https://example.com'
+    assert origin_of('http://[::1]:3000') == 'http://[::1]:3000'
+    assert origin_of('/relative/path') is None
+
+def test_preflight_from_activity_origin(client):
+    """Test that a preflight from a study activity origin is answered by the app"""
+    response = client.options('/dashboard/stats', headers={
+        'Origin': 'http://localhost:8080',
+        'Access-Control-Request-Method': 'GET'
+    })
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8080'
+    assert 'POST' in response.headers['Access-Control-Allow-Methods']
+    assert response.headers['Access-Control-Allow-Headers'] == 'Content-Type, Authorization'
+    assert 'Origin' in response.headers['Vary']
+
+def test_unknown_origin_gets_no_cors_headers(client):
+    """Test that an origin outside the allowed set gets no CORS headers"""
+    response = client.get('/metrics', headers={'Origin': 'http://evil.example'})
+    assert response.status_code == 200
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+def test_api_routes_follow_the_allowed_origins(client):
+    """Test that API routes answer allowed origins only, with no per-route wildcard"""
+    for url in ('/words', '/groups', '/dashboard/stats', '/api/study-sessions'):
+        response = client.get(url, headers={'Origin': 'http://evil.example'})
+        assert response.status_code == 200, url
+        assert 'Access-Control-Allow-Origin' not in response.headers, url
+        response = client.get(url, headers={'Origin': 'http://localhost:8080'})
+        assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8080', url
+
+def test_frontend_origin_allowed_by_default(client):
+    """Test that the React frontend's origin is allowed through CORS_EXTRA_ORIGINS"""
+    response = client.get('/words', headers={'Origin': 'http://localhost:5173'})
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:5173'
+
+def test_new_activity_origin_allowed_without_restart(app, client):
+    """Test that origins are re-read once study_activities is invalidated"""
+    headers = {'Origin': 'http://quiz.example:9000'}
+    assert 'Access-Control-Allow-Origin' not in client.get('/metrics', headers=headers).headers
+    refreshes = app.cors.refreshes
+
+    db = app.db.get()
+    db.execute("INSERT INTO study_activities (name, url) VALUES ('Quiz', 'http://quiz.example:9000/play')")
+    db.commit()
+    # Unchanged version: still served from the cached set
+    assert 'Access-Control-Allow-Origin' not in client.get('/metrics', headers=headers).headers
+    assert app.cors.refreshes == refreshes
+
+    app.cache.invalidate('study_activities')
+    response = client.get('/metrics', headers=headers)
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://quiz.example:9000'
+    assert app.cors.refreshes == refreshes + 1
+
+def test_no_activities_allows_every_origin(app, client):
+    """Test that every origin is allowed while no study activity names one"""
+    db = app.db.get()
+    db.execute('DELETE FROM study_activities')
+    db.commit()
+    app.cache.invalidate('study_activities')
+    response = client.get('/metrics', headers={'Origin': 'http://anywhere.example'})
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://anywhere.example'
@@ -0,0 +1,69 @@
+import random
+
+from lib.reviews import record_reviews
+from lib.stats import check_stats, record_session
+
+def add_session(cursor, created_at, group_id=1):
+    cursor.execute('''
+        INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+        VALUES (?, 1, ?)
+    ''', (group_id, created_at))
+    record_session(cursor, group_id, created_at)
+    return cursor.lastrowid
+
+def add_reviews(cursor, session_id, reviews):
+    cursor.executemany('''
+        INSERT INTO word_review_items (study_session_id, word_id, correct, created_at)
+        VALUES (?, ?, ?, ?)
+    ''', [(session_id, word_id, correct, created_at) for word_id, correct, created_at in reviews])
+    record_reviews(cursor, session_id, reviews)
+
+def test_stats_endpoint_reads_maintained_totals(client, app):
+    cursor = app.db.cursor()
+    cursor.executemany('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)',
+                       [(f'mot{i}', f'word{i}', '[]') for i in range(3)])
+    session_id = add_session(cursor, '2025-03-01 09:00:00')
+    # Word 1 is mastered (5/5), word 2 is not (1/2)
+    add_reviews(cursor, session_id, [(1, True, '2025-03-01 09:01:00')] * 5)
+    add_reviews(cursor, session_id, [(2, True, '2025-03-01 09:02:00'), (2, False, '2025-03-01 09:03:00')])
+    app.db.commit()
+
+    data = client.get('/dashboard/stats').get_json()
+    assert data['total_vocabulary'] == 3
+    assert data['total_words_studied'] == 2
+    assert data['mastered_words'] == 1
+    assert data['success_rate'] == 6 / 7
+    assert data['total_sessions'] == 1
+    assert data['current_streak'] == 1
+    assert check_stats(cursor) == {}
+
+def test_incremental_stats_match_full_recomputation(client, app):
+    cursor = app.db.cursor()
+    cursor.executemany('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)',
+                       [(f'mot{i}', f'word{i}', '[]') for i in range(20)])
+
+    # Sessions arrive out of date order with gaps, so streak links get rewired
+    rng = random.Random(8)
+    days = [f'2025-04-{day:02d} 10:00:00' for day in (5, 1, 2, 9, 3, 7, 8, 2, 12, 11, 4)]
+    for created_at in days:
+        session_id = add_session(cursor, created_at, group_id=rng.choice([1, 2]))
+        add_reviews(cursor, session_id, [
+            (rng.randint(1, 20), rng.random() < 0.8, created_at) for _ in range(rng.randint(0, 12))
+        ])
+        assert check_stats(cursor) == {}
+    app.db.commit()
+
+    cursor.execute('DELETE FROM words WHERE id = 20')
+    assert check_stats(cursor) == {}
+
+def test_reset_clears_history_stats(client, app):
+    client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+    assert client.get('/dashboard/stats').get_json()['total_sessions'] == 1
+    assert client.get('/dashboard/stats').get_json()['active_groups'] == 1
+
+    client.post('/api/study-sessions/reset')
+    data = client.get('/dashboard/stats').get_json()
+    assert data['total_sessions'] == 0
+    assert data['current_streak'] == 0
+    assert data['active_groups'] == 0
+    assert check_stats(app.db.cursor()) == {}
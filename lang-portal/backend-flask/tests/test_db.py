@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import threading
+import pytest
+
+from app import create_app
+from lib.db import connect
+from lib.migrations import run_migrations
+from lib.pool import ConnectionPool, PoolExhausted
+
+def make_pool(tmp_path, **kwargs):
+    def connect():
+        return sqlite3.connect(str(tmp_path / 'pool.db'), check_same_thread=False)
+    return ConnectionPool(connect, **kwargs)
+
+def test_pool_reuses_released_connections(tmp_path):
+    """Test that a released connection is handed out again instead of reopened"""
+    pool = make_pool(tmp_path, size=2)
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    assert second is first
+
+    stats = pool.stats()
+    assert stats['open'] == 1
+    assert stats['in_use'] == 1
+    assert stats['checkouts'] == 2
+    pool.release(second)
+    pool.close()
+
+def test_pool_exhaustion_times_out(tmp_path):
+    """Test that checkout fails once every connection is held"""
+    pool = make_pool(tmp_path, size=1, timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(PoolExhausted):
+        pool.acquire()
+    assert pool.stats()['exhausted'] == 1
+    pool.release(held)
+    pool.close()
+
+def test_pool_waiter_gets_released_connection(tmp_path):
+    """Test that a waiting thread is woken when a connection comes back"""
+    pool = make_pool(tmp_path, size=1, timeout=5)
+    held = pool.acquire()
+    result = {}
+
+    def worker():
+        result['connection'] = pool.acquire()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    pool.release(held)
+    thread.join(timeout=5)
+
+    assert result['connection'] is held
+    assert pool.stats()['wait_time'] > 0
+    pool.release(result['connection'])
+    pool.close()
+
+def test_pool_release_rolls_back_open_transaction(tmp_path):
+    """Test that uncommitted work is not leaked to the next checkout"""
+    pool = make_pool(tmp_path, size=1)
+    connection = pool.acquire()
+    connection.execute('CREATE TABLE t (x INTEGER)')
+    connection.commit()
+    connection.execute('INSERT INTO t VALUES (1)')
+    pool.release(connection)
+
+    connection = pool.acquire()
+    assert not connection.in_transaction
+    assert connection.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 0
+    pool.release(connection)
+    pool.close()
+
+def test_pool_replaces_dead_connection(tmp_path):
+    """Test that a connection failing its health check is replaced"""
+    pool = make_pool(tmp_path, size=1, health_check_interval=0)
+    connection = pool.acquire()
+    pool.release(connection)
+    connection.close()
+
+    replacement = pool.acquire()
+    assert replacement is not connection
+    assert replacement.execute('SELECT 1').fetchone()[0] == 1
+    assert pool.stats()['health_check_failures'] == 1
+    assert pool.stats()['open'] == 1
+    pool.release(replacement)
+    pool.close()
+
+def test_app_teardown_returns_connection_to_pool(tmp_path):
+    """Test that each app context checks out one connection and returns it on teardown"""
+    app = create_app({'TESTING': True, 'DATABASE': str(tmp_path / 'app.db'), 'DB_POOL_SIZE': 1})
+
+    with app.app_context():
+        first = app.db.get()
+        assert app.db.cursor().connection is first
+    assert app.db.pool.stats()['in_use'] == 0
+
+    with app.app_context():
+        assert app.db.get() is first
+    assert app.db.pool.stats()['in_use'] == 0
+    app.db.dispose()
+
+def test_app_keeps_existing_data_without_reset(tmp_path):
+    """Test that RESET_DB=False serves an existing database instead of recreating it"""
+    path = str(tmp_path / 'app.db')
+    app = create_app({'TESTING': True, 'DATABASE': path})
+    with app.app_context():
+        app.db.get().execute("INSERT INTO groups (name) VALUES ('Kept')")
+        app.db.commit()
+    app.db.dispose()
+
+    app = create_app({'TESTING': True, 'DATABASE': path, 'RESET_DB': False})
+    with app.app_context():
+        names = [row['name'] for row in app.db.get().execute('SELECT name FROM groups')]
+    assert 'Kept' in names
+    app.db.dispose()
+
+def test_connect_applies_wal_profile(tmp_path):
+    """Test that the wal profile switches journal mode and tunes the connection"""
+    connection = connect(str(tmp_path / 'wal.db'), 'wal')
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert connection.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert connection.execute('PRAGMA temp_store').fetchone()[0] == 2  # MEMORY
+    assert connection.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    connection.close()
+
+def test_connect_rejects_unknown_profile(tmp_path):
+    """Test that a typo in DB_PROFILE fails loudly instead of using defaults"""
+    with pytest.raises(ValueError):
+        connect(str(tmp_path / 'x.db'), 'turbo')
+
+def test_app_uses_configured_profile(app):
+    """Test that pooled connections get the profile from app config"""
+    assert app.db.profile == 'wal'
+    assert app.db.get().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_import_word_json_bulk(app, tmp_path):
+    """Test that a bulk import links every word to its group and sets the counter"""
+    words = [{
+        'french': f'mot{i}',
+        'english': f'word{i}',
+        'parts': [{'french': f'mot{i}', 'english': [f'word{i}']}]
+    } for i in range(2500)]
+    path = tmp_path / 'words.json'
+    path.write_text(json.dumps(words))
+
+    cursor = app.db.cursor()
+    assert app.db.import_word_json(cursor, 'Bulk Words', str(path)) == 2500
+
+    cursor.execute('SELECT id, words_count FROM groups WHERE name = ?', ('Bulk Words',))
+    group = cursor.fetchone()
+    assert group['words_count'] == 2500
+    cursor.execute('SELECT COUNT(*) FROM word_groups WHERE group_id = ?', (group['id'],))
+    assert cursor.fetchone()[0] == 2500
+    cursor.execute('''
+        SELECT w.french FROM words w
+        JOIN word_groups wg ON wg.word_id = w.id
+        WHERE wg.group_id = ? ORDER BY w.id LIMIT 1
+    ''', (group['id'],))
+    assert cursor.fetchone()['french'] == 'mot0'
+
+def test_import_word_json_rolls_back_on_bad_row(app, tmp_path):
+    """Test that a malformed word leaves neither the group nor any words behind"""
+    path = tmp_path / 'words.json'
+    path.write_text(json.dumps([
+        {'french': 'un', 'english': 'one', 'parts': []},
+        {'french': 'deux', 'parts': []}
+    ]))
+
+    cursor = app.db.cursor()
+    cursor.execute('SELECT COUNT(*) FROM words')
+    words_before = cursor.fetchone()[0]
+    with pytest.raises(KeyError):
+        app.db.import_word_json(cursor, 'Broken', str(path))
+
+    cursor.execute('SELECT COUNT(*) FROM groups WHERE name = ?', ('Broken',))
+    assert cursor.fetchone()[0] == 0
+    cursor.execute('SELECT COUNT(*) FROM words')
+    assert cursor.fetchone()[0] == words_before
+
+def test_migrations_are_recorded_and_not_rerun(app):
+    """Test that app startup applies the index migrations exactly once"""
+    connection = app.db.get()
+    versions = [row[0] for row in connection.execute('SELECT version FROM schema_migrations')]
+    assert '001_add_indexes' in versions
+    assert run_migrations(connection) == []
+
+    indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_word_groups_group_word', 'idx_word_review_items_session', 'idx_study_sessions_group'} <= indexes
+
+def test_backfills_run_after_every_pending_migration(tmp_path):
+    """Test that a backfill sees the schema of later migrations, and one that failed runs again"""
+    migrations_dir = tmp_path / 'migrations'
+    migrations_dir.mkdir()
+    (migrations_dir / '001_things.sql').write_text('CREATE TABLE things (id INTEGER PRIMARY KEY);')
+    (migrations_dir / '002_thing_names.sql').write_text('ALTER TABLE things ADD COLUMN name TEXT;')
+    calls = []
+    def backfill(cursor):
+        # Written against the latest schema, which 001 alone does not have
+        cursor.execute("INSERT INTO things (name) VALUES ('first')")
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('backfill failed')
+
+    connection = connect(str(tmp_path / 'app.db'))
+    with pytest.raises(RuntimeError):
+        run_migrations(connection, str(migrations_dir), backfills={'001_things': backfill})
+    # Both migrations are in, the failed backfill left nothing behind
+    versions = {row[0] for row in connection.execute('SELECT version FROM schema_migrations')}
+    assert versions == {'001_things', '002_thing_names'}
+    assert connection.execute('SELECT COUNT(*) FROM things').fetchone()[0] == 0
+
+    assert run_migrations(connection, str(migrations_dir), backfills={'001_things': backfill}) == []
+    assert [row[0] for row in connection.execute('SELECT name FROM things')] == ['first']
+    # Recorded, so it never runs again
+    assert run_migrations(connection, str(migrations_dir), backfills={'001_things': backfill}) == []
+    assert len(calls) == 2
+    connection.close()
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+
+import pytest
+
+from lib.export import csv_chunks, ndjson_chunks
+from lib.queries import queries
+
+EXPORT_QUERIES = ['words/export', 'groups/export', 'study_sessions/export', 'study_sessions/export_review_items']
+
+@pytest.fixture
+def history(client, app):
+    cursor = app.db.cursor()
+    cursor.executemany('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)', [
+        ('bonjour', 'hello', json.dumps([{'french': 'bon'}, {'french': 'jour'}])),
+        ('élève', 'student, pupil', '[]'),
+        ('oui', 'yes', '[]')
+    ])
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, 1 FROM words')
+    app.db.commit()
+    session = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1}).get_json()
+    client.post(f"/api/study-sessions/{session['id']}/reviews", json=[
+        {'word_id': 1, 'correct': True},
+        {'word_id': 2, 'correct': False},
+        {'word_id': 1, 'correct': True}
+    ])
+    return session['id']
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_words_export_ndjson(client, history):
+    """Test that every word is streamed as one JSON line with parts nested"""
+    response = client.get('/words/export')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    words = ndjson(response)
+    assert [w['french'] for w in words] == ['bonjour', 'élève', 'oui']
+    assert words[0]['parts'] == [{'french': 'bon'}, {'french': 'jour'}]
+    assert words[0]['correct_count'] == 2 and words[1]['wrong_count'] == 1
+
+def test_review_items_export_csv(client, history):
+    response = client.get('/api/study-sessions/review-items/export?format=csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'review_items.csv' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [(r['french'], r['correct']) for r in rows] == [('bonjour', '1'), ('élève', '0'), ('bonjour', '1')]
+    assert all(r['study_session_id'] == str(history) for r in rows)
+
+def test_export_resumes_after_id(client, history):
+    """Test that after_id skips the rows already received"""
+    first = ndjson(client.get('/words/export'))
+    rest = ndjson(client.get(f"/words/export?after_id={first[0]['id']}"))
+    assert rest == first[1:]
+    sessions = ndjson(client.get('/api/study-sessions/export'))
+    assert sessions[-1]['id'] == history and sessions[-1]['review_items_count'] == 3
+    groups = ndjson(client.get('/groups/export'))
+    assert [g['id'] for g in groups] == [1] and ndjson(client.get('/groups/export?after_id=1')) == []
+
+def test_export_rejects_unknown_format(client):
+    assert client.get('/words/export?format=xml').status_code == 400
+
+def test_chunks_hold_a_bounded_number_of_rows(app, history):
+    """Test that rows are read and written a chunk at a time"""
+    cursor = app.db.cursor()
+    queries.execute(cursor, 'words/export', (0,))
+    chunks = list(csv_chunks(cursor, chunk_size=2))
+    assert [chunk.decode().count('\n') for chunk in chunks] == [3, 1]  # header + 2 rows, then 1 row
+    queries.execute(cursor, 'words/export', (0,))
+    assert len(list(ndjson_chunks(cursor, chunk_size=2))) == 2
+
+def test_export_queries_never_sort(app):
+    """Test that exports read in index order, so nothing is sorted in memory before the first row"""
+    cursor = app.db.cursor()
+    for name in EXPORT_QUERIES:
+        cursor.execute('EXPLAIN QUERY PLAN ' + queries.get(name), (0,))
+        details = [row['detail'] for row in cursor.fetchall()]
+        assert not [d for d in details if 'TEMP B-TREE' in d], (name, details)
+
+def test_group_words_raw_returns_every_word(client, history):
+    response = client.get('/groups/1/words/raw')
+    assert response.content_length is not None
+    words = response.get_json()['words']
+    assert [w['french'] for w in words] == ['bonjour', 'oui', 'élève']
+    assert words[0] == {'id': 1, 'french': 'bonjour', 'english': 'hello', 'correct_count': 2, 'wrong_count': 0}
+
+def test_stream_keeps_its_connection_until_the_body_is_done(client, app, history):
+    """Test that the export connection is held until the body is done, and never one of the request pool's"""
+    in_use = lambda pool: pool.stats()['in_use']
+    # A fresh app context, so the request checks its connection out of the pool
+    with app.app_context():
+        response = client.get('/api/study-sessions/review-items/export', buffered=False)
+        assert in_use(app.db.export_pool) == 1
+        assert in_use(app.db.pool) == 0
+        assert len(ndjson(response)) == 3
+        response.close()
+        assert in_use(app.db.export_pool) == 0
+
+def test_exports_beyond_the_export_pool_are_refused(client, app, history):
+    """Test that slow export readers get a 503 once the export pool is full while other requests carry on"""
+    with app.app_context():
+        streams = [client.get('/words/export', buffered=False) for _ in range(app.db.export_pool.size)]
+        response = client.get('/groups/export')
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+        assert client.get('/words/1').status_code == 200
+        for stream in streams:
+            stream.close()
+        assert client.get('/groups/export').status_code == 200
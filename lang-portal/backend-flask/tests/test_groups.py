@@ -1,7 +1,11 @@
+import json
+
 import pytest
 from flask import g
 import sqlite3
 
+from lib.groups import check_group_counts, rebuild_group_counts
+
 def test_get_group_words_raw_success(client, app):
     """Test successful retrieval of raw words for a group"""
     with app.app_context():
@@ -66,4 +70,85 @@ def test_get_group_words_raw_error(client, app, mocker):
         assert response.status_code == 500
         data = response.get_json()
         assert 'error' in data
-        assert 'Database error' in str(data['error']) 
\ No newline at end of file
+        assert 'Database error' in str(data['error']) 
+
+def test_get_group_study_sessions_end_times(client, app):
+    """Test that end times come from the session summary, falling back to start + 30 minutes"""
+    reviewed = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1}).get_json()
+    cursor = app.db.cursor()
+    cursor.execute('''
+        INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+        VALUES (1, 1, '2025-01-01 23:45:00')
+    ''')
+    idle_id = cursor.lastrowid
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('oui', 'yes', '[]')")
+    word_id = cursor.lastrowid
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (word_id,))
+    app.db.commit()
+
+    client.post(f"/api/study-sessions/{reviewed['id']}/reviews", json=[
+        {'word_id': word_id, 'correct': True, 'created_at': '2030-01-01 10:00:00'},
+        {'word_id': word_id, 'correct': False, 'created_at': '2030-01-01 10:05:00'}
+    ])
+
+    response = client.get('/groups/1/study_sessions?sort_by=reviewItemsCount&order=desc')
+    assert response.status_code == 200
+    sessions = {s['id']: s for s in response.get_json()['study_sessions']}
+    assert response.get_json()['study_sessions'][0]['id'] == reviewed['id']
+
+    assert sessions[reviewed['id']]['review_items_count'] == 2
+    assert sessions[reviewed['id']]['end_time'] == '2030-01-01 10:05:00'
+    assert sessions[idle_id]['review_items_count'] == 0
+    assert sessions[idle_id]['end_time'] == '2025-01-02 00:15:00'
+
+def test_get_group_study_sessions_rejects_bad_order(client):
+    """Test that the order parameter cannot be injected into the ORDER BY clause"""
+    response = client.get('/groups/1/study_sessions?order=desc;DROP TABLE groups')
+    assert response.status_code == 200
+    assert client.get('/groups/1').status_code == 200
+
+def words_counts(app):
+    cursor = app.db.cursor()
+    cursor.execute('SELECT id, words_count FROM groups ORDER BY id')
+    return dict(cursor.fetchall())
+
+def test_words_count_follows_word_groups(client, app):
+    """Test that the triggers keep words_count exact through inserts, deletes and moves"""
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO groups (name) VALUES ('Other')")
+    other = cursor.lastrowid
+    cursor.executemany("INSERT INTO words (french, english, parts) VALUES (?, ?, '[]')",
+                       [('un', 'one'), ('deux', 'two'), ('trois', 'three')])
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, 1 FROM words')
+    assert words_counts(app) == {1: 3, other: 0}
+
+    cursor.execute("DELETE FROM word_groups WHERE word_id = (SELECT id FROM words WHERE french = 'un')")
+    cursor.execute("UPDATE word_groups SET group_id = ? WHERE word_id = (SELECT id FROM words WHERE french = 'deux')", (other,))
+    app.db.commit()
+    assert words_counts(app) == {1: 1, other: 1}
+    assert check_group_counts(cursor) == {}
+
+    # Totals come from the counter, not from counting memberships
+    response = client.get(f'/groups/{other}/words?cursor=&include_total=true')
+    assert response.get_json()['total_words'] == 1
+
+def test_check_and_rebuild_group_counts(app):
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('chat', 'cat', '[]')")
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (cursor.lastrowid,))
+    cursor.execute('UPDATE groups SET words_count = 7 WHERE id = 1')
+    assert check_group_counts(cursor) == {1: (7, 1)}
+    rebuild_group_counts(cursor)
+    app.db.commit()
+    assert check_group_counts(cursor) == {}
+
+def test_bulk_import_restores_count_triggers(app, tmp_path):
+    """Test that the seed import counts its group once and leaves the triggers in place"""
+    path = tmp_path / 'seed.json'
+    path.write_text(json.dumps([{'french': 'rouge', 'english': 'red', 'parts': []},
+                                {'french': 'bleu', 'english': 'blue', 'parts': []}]))
+    cursor = app.db.cursor()
+    app.db.import_word_json(cursor, 'Colours', str(path))
+    assert check_group_counts(cursor) == {}
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'word_groups_count_%'")
+    assert cursor.fetchone()[0] == 3
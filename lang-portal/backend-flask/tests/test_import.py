@@ -0,0 +1,112 @@
+import io
+import json
+
+import pytest
+
+import lib.word_import
+from lib.groups import check_group_counts
+from lib.word_import import word_key
+
+def upload(client, body, content_type='application/json', **params):
+    response = client.post('/words/import', query_string=params, data=body, content_type=content_type)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def stored_words(app):
+    cursor = app.db.cursor()
+    cursor.execute('SELECT id, french, english, parts FROM words ORDER BY id')
+    return [tuple(row) for row in cursor.fetchall()]
+
+def test_word_key_folds_case_and_spacing_only():
+    assert word_key(' École  normale', 'SCHOOL') == word_key('école normale', 'school')
+    assert word_key('élève', 'pupil') != word_key('eleve', 'pupil')
+
+def test_import_json_deduplicates_and_attaches(client, app):
+    """Test that repeats in the upload and words already stored are matched on the normalized key"""
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('École', 'school', '[]')")
+    app.db.commit()
+
+    summary = upload(client, json.dumps([
+        {'french': 'bonjour', 'english': 'hello', 'parts': [{'french': 'bon'}]},
+        {'french': ' Bonjour ', 'english': 'HELLO', 'parts': [{'french': 'jour'}]},
+        {'french': 'école', 'english': 'School'},
+        {'english': 'missing french'},
+        {'french': 'oui', 'english': 'yes', 'group': 'Basics'}
+    ]), group='Greetings')
+    assert (summary['received'], summary['rejected'], summary['inserted'], summary['unchanged']) == (5, 1, 2, 1)
+    assert summary['errors'] == [{'line': 4, 'error': 'Missing french or english'}]
+    assert {g['name']: g['words_count'] for g in summary['groups']} == {'Greetings': 2, 'Basics': 1}
+
+    words = stored_words(app)
+    assert [w[1] for w in words] == ['École', 'bonjour', 'oui']
+    # The first spelling is kept, the last parts win
+    assert json.loads(words[1][3]) == [{'french': 'jour'}]
+
+def test_reimport_updates_or_skips(client, app):
+    """Test both conflict modes and that updated parts reach the search index"""
+    upload(client, json.dumps([{'french': 'chat', 'english': 'cat', 'parts': [{'french': 'ch'}]}]))
+    changed = json.dumps([{'french': 'Chat', 'english': 'cat', 'parts': [{'french': 'minou'}]}])
+
+    summary = upload(client, changed, on_conflict='skip')
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (0, 0, 1)
+    assert client.get('/words/search?q=minou').get_json()['total_words'] == 0
+
+    summary = upload(client, changed)
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (0, 1, 0)
+    assert [w['french'] for w in client.get('/words/search?q=minou').get_json()['words']] == ['chat']
+    assert len(stored_words(app)) == 1
+
+    cursor = app.db.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'words_fts_%'")
+    assert cursor.fetchone()[0] == 3
+
+def test_import_csv_and_ndjson(client, app):
+    summary = upload(client, 'french,english,parts,group\nmerci,thanks,"[{""french"": ""merci""}]",Basics\nnon,no,,\n',
+                     content_type='text/csv')
+    assert summary['inserted'] == 2 and summary['attached'] == 1
+
+    data = {'file': (io.BytesIO(b'{"french": "si", "english": "yes"}\nnot json\n\n'), 'words.ndjson')}
+    response = client.post('/words/import?group=Basics', data=data, content_type='multipart/form-data')
+    summary = response.get_json()
+    assert (summary['received'], summary['inserted'], summary['rejected']) == (2, 1, 1)
+    assert summary['groups'][0]['words_count'] == 2
+
+def test_import_attaches_existing_words_once(client, app):
+    upload(client, json.dumps([{'french': 'pain', 'english': 'bread'}]), group='Food')
+    summary = upload(client, json.dumps([{'french': 'pain', 'english': 'bread'}]), group='Food')
+    assert summary['attached'] == 0 and summary['groups'][0]['words_count'] == 1
+
+def test_malformed_upload_writes_nothing(client, app):
+    """Test that a broken JSON array aborts the import before the merge"""
+    before = stored_words(app)
+    response = client.post('/words/import', data='[{"french": "a", "english": "b"}, {"french"', content_type='application/json')
+    assert response.status_code == 400
+    assert stored_words(app) == before
+
+def test_import_requires_a_format(client):
+    assert client.post('/words/import', data='x', content_type='text/plain').status_code == 400
+    assert client.post('/words/import?format=csv&on_conflict=merge', data='x').status_code == 400
+
+def schema_version(app):
+    cursor = app.db.cursor()
+    cursor.execute('PRAGMA schema_version')
+    return cursor.fetchone()[0]
+
+@pytest.mark.parametrize('threshold, schema_changes', [(1000, False), (1, True)])
+def test_only_large_imports_drop_triggers(client, app, monkeypatch, threshold, schema_changes):
+    """Test that small imports keep the triggers, so prepared statements stay valid, and both paths agree"""
+    monkeypatch.setattr(lib.word_import, 'SUSPEND_TRIGGERS_ROWS', threshold)
+    upload(client, json.dumps([{'french': 'vache', 'english': 'cow', 'parts': [{'french': 'va'}]}]), group='Farm')
+    before = schema_version(app)
+
+    summary = upload(client, json.dumps([
+        {'french': 'vache', 'english': 'cow', 'parts': [{'french': 'meuh'}]},
+        {'french': 'cheval', 'english': 'horse'}
+    ]), group='Farm')
+    assert (summary['inserted'], summary['updated'], summary['attached']) == (1, 1, 1)
+    assert (schema_version(app) != before) == schema_changes
+
+    assert check_group_counts(app.db.cursor()) == {}
+    assert [w['french'] for w in client.get('/words/search?q=meuh').get_json()['words']] == ['vache']
+    assert client.get('/words/search?q=cheval').get_json()['total_words'] == 1
@@ -0,0 +1,73 @@
+import io
+import json
+import tracemalloc
+import pytest
+
+from lib.json_stream import iter_json_array
+
+SAMPLE = [
+    {'french': 'payer', 'english': 'to pay', 'parts': [{'french': 'pa', 'english': ['p', 'a']}]},
+    {'french': 'aller', 'english': 'to go', 'parts': []},
+    12345,
+    1.5,
+    -0.25,
+    6.02e23,
+    1e-07,
+    'chaîne',
+    [1, [2, 3]],
+    None
+]
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 4, 5, 7, 64, 65536])
+def test_iter_json_array_matches_json_load(chunk_size):
+    """Test that streaming yields the same items as json.load for any chunk size"""
+    text = json.dumps(SAMPLE, indent=2, ensure_ascii=False)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == SAMPLE
+
+@pytest.mark.parametrize('chunk_size', range(1, 12))
+def test_iter_json_array_numbers_split_across_chunks(chunk_size):
+    """Test that a number cut before its fraction or exponent is read whole"""
+    text = '[1.5, 2e3, -0.25, 6.02E+23, 7e-1, 10]'
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+def test_iter_json_array_empty():
+    """Test that an empty array yields nothing"""
+    assert list(iter_json_array(io.StringIO('  [ ]  '))) == []
+
+@pytest.mark.parametrize('text', ['{"a": 1}', '[1, 2', '[1 2]', '[1,]', ''])
+def test_iter_json_array_rejects_malformed_input(text):
+    """Test that malformed input raises instead of silently truncating"""
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 4))
+
+def write_seed(path, count):
+    # Write the seed item by item so the test itself never holds the whole list
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for i in range(count):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps({
+                'french': f'mot{i}',
+                'english': f'word number {i}',
+                'parts': [{'french': f'm{i}', 'english': ['w', 'o', 'r', 'd']}]
+            }))
+        f.write(']')
+
+def test_import_word_json_memory_is_bounded(app, tmp_path):
+    """Test that importing a large seed keeps Python heap usage flat"""
+    path = tmp_path / 'large_seed.json'
+    write_seed(path, 60000)
+    assert path.stat().st_size > 6 * 1024 * 1024
+
+    cursor = app.db.cursor()
+    tracemalloc.start()
+    try:
+        imported = app.db.import_word_json(cursor, 'Large Seed', str(path))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert imported == 60000
+    # json.load on this file needs over 50 MB of Python objects
+    assert peak < 4 * 1024 * 1024
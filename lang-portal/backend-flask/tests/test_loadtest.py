@@ -0,0 +1,28 @@
+import importlib.util
+import os
+import random
+
+BENCHMARKS = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+def load_loadtest():
+    spec = importlib.util.spec_from_file_location('loadtest', os.path.join(BENCHMARKS, 'loadtest.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_loadtest_drives_every_route(app):
+    """Test that every route but the documented exclusions has a load test scenario"""
+    loadtest = load_loadtest()
+    sizes = {'words': 5000, 'groups': 10, 'sessions': 2000, 'reviews': 20000}
+    adapter = app.url_map.bind('localhost')
+    rng = random.Random(1)
+
+    driven = set()
+    for name, scenario in loadtest.endpoints(sizes).items():
+        method, path, _ = scenario(rng)
+        endpoint, _ = adapter.match(path.split('?', 1)[0], method=method)
+        driven.add(endpoint)
+
+    routes = {rule.endpoint for rule in app.url_map.iter_rules()}
+    assert driven == routes - set(loadtest.EXCLUDED)
+    assert set(loadtest.EXCLUDED) <= routes
@@ -0,0 +1,151 @@
+import logging
+
+from lib.db import connect
+from lib.metrics import Histogram, render_histogram
+from lib.profiling import ProfiledCursor, QueryProfiler, fingerprint, normalize_sql
+
+def test_histogram_buckets_and_quantiles():
+    """Test that observations land in fixed buckets and quantiles interpolate within them"""
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 4 + [3.0]:
+        histogram.observe(value)
+
+    assert histogram.counts == [50, 45, 4, 1]
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) == 0.01
+    assert 0.01 < histogram.quantile(0.95) <= 0.1
+    assert 0.1 < histogram.quantile(0.99) <= 1.0
+    assert Histogram().quantile(0.5) == 0.0
+
+    lines = render_histogram('latency_seconds', 'Latency', [((('route', 'a'),), histogram)])
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 95' in lines
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 100' in lines
+    assert 'latency_seconds_count{route="a"} 100' in lines
+
+def test_fingerprint_ignores_literals_and_whitespace():
+    """Test that statements differing only in literals share a fingerprint"""
+    assert normalize_sql("SELECT * FROM words WHERE id IN (?, ?, ?)\n  AND french = 'chat'") == \
+        'SELECT * FROM words WHERE id IN (?) AND french = ?'
+    assert fingerprint('SELECT * FROM words LIMIT 10') == fingerprint('SELECT *  FROM words LIMIT 50;')
+    assert fingerprint('SELECT * FROM words') != fingerprint('SELECT * FROM groups')
+    # Numbered parameters are kept as written, not read as literals
+    assert normalize_sql('SELECT * FROM words WHERE id = ?1 OR id = ?12 LIMIT 5') == \
+        'SELECT * FROM words WHERE id = ?1 OR id = ?12 LIMIT ?'
+    assert fingerprint('SELECT ?1, ?2') != fingerprint('SELECT ?2, ?1')
+
+def test_profiled_cursor_records_rows_and_time(tmp_path):
+    """Test that a statement is recorded once its rows are exhausted or the next one starts"""
+    connection = connect(str(tmp_path / 'test.db'))
+    profiler = QueryProfiler(slow_query_ms=None)
+    cursor = ProfiledCursor(connection.cursor(), profiler)
+    cursor.execute('CREATE TABLE t (x INTEGER)')
+    cursor.executemany('INSERT INTO t VALUES (?)', [(i,) for i in range(10)])
+    assert cursor.rowcount == 10
+
+    rows = list(cursor.execute('SELECT x FROM t'))
+    assert len(rows) == 10
+    cursor.execute('SELECT x FROM t WHERE x = ?', (3,))
+    assert cursor.fetchone()['x'] == 3
+    cursor.close()
+
+    stats = profiler.stats()
+    assert stats[(fingerprint('SELECT x FROM t'), 'none')]['rows'] == 10
+    lookup = stats[(fingerprint('SELECT x FROM t WHERE x = ?'), 'none')]
+    assert lookup['calls'] == 1 and lookup['rows'] == 1
+    connection.close()
+
+def test_slow_queries_are_logged_with_plan(tmp_path, caplog):
+    """Test that queries above the threshold are logged with EXPLAIN QUERY PLAN output"""
+    connection = connect(str(tmp_path / 'test.db'))
+    connection.execute('CREATE TABLE t (x INTEGER)')
+    profiler = QueryProfiler(slow_query_ms=0)
+    cursor = ProfiledCursor(connection.cursor(), profiler)
+
+    with caplog.at_level(logging.WARNING, logger='lang_portal.slow_queries'):
+        cursor.execute('SELECT x FROM t WHERE x = ?', (1,)).fetchall()
+
+    assert profiler.slow_queries == 1
+    assert 'SCAN t' in caplog.text
+    connection.close()
+
+def test_slow_query_plan_is_read_before_the_connection_is_released(tmp_path, caplog):
+    """Test that an unexhausted statement is recorded later without touching its connection"""
+    connection = connect(str(tmp_path / 'test.db'))
+    connection.execute('CREATE TABLE t (x INTEGER)')
+    connection.executemany('INSERT INTO t VALUES (?)', [(1,), (2,)])
+    profiler = QueryProfiler(slow_query_ms=0)
+    cursor = ProfiledCursor(connection.cursor(), profiler)
+    cursor.execute('SELECT x FROM t').fetchone()
+    connection.close()
+
+    with caplog.at_level(logging.WARNING, logger='lang_portal.slow_queries'):
+        cursor.flush()
+    assert profiler.slow_queries == 1
+    assert 'SCAN t' in caplog.text
+
+def test_teardown_flushes_pending_samples(app):
+    """Test that statements left unexhausted are recorded when the connection goes back to the pool"""
+    app.db.profiler.reset()
+    with app.app_context(), app.test_request_context('/words'):
+        cursor = app.db.cursor()
+        cursor.execute('SELECT id FROM groups').fetchone()
+        app.db.close()
+        assert profiler_calls(app, 'SELECT id FROM groups') == 1
+        cursor.flush()
+    assert profiler_calls(app, 'SELECT id FROM groups') == 1
+
+def profiler_calls(app, sql):
+    return sum(stats['calls'] for (key, _), stats in app.db.profiler.stats().items() if key == fingerprint(sql))
+
+def test_metrics_endpoint_exports_query_histograms(client):
+    """Test that /metrics reports per-query histograms labelled with the calling route"""
+    client.application.db.profiler.reset()
+    assert client.get('/groups').status_code == 200
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert '# TYPE sql_query_duration_seconds histogram' in body
+    assert 'endpoint="get_groups"' in body
+    assert 'sql_named_query_calls_total' not in body  # one timing series per statement
+
+def test_request_metrics_track_latency_status_and_size(client):
+    """Test that every request is counted by endpoint and status with its latency and size"""
+    client.application.config['METRICS_RESET_TOKEN'] = 'secret'
+    assert client.post('/metrics/reset', headers={'Authorization': 'Bearer secret'}).status_code == 204
+    for _ in range(3):
+        assert client.get('/groups').status_code == 200
+    assert client.get('/groups/999999').status_code == 404
+    assert client.get('/no-such-route').status_code == 404
+
+    metrics = client.application.request_metrics
+    assert metrics.in_flight == 0
+    percentiles = metrics.percentiles('get_groups')
+    assert 0 < percentiles[0.5] <= percentiles[0.95] <= percentiles[0.99]
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_requests_total{endpoint="get_groups",method="GET",status="200"} 3' in body
+    assert 'http_requests_total{endpoint="get_group",method="GET",status="404"} 1' in body
+    assert 'http_requests_total{endpoint="unmatched",method="GET",status="404"} 1' in body
+    assert 'http_request_duration_seconds_count{endpoint="get_groups"} 3' in body
+    assert 'http_request_duration_quantile_seconds{endpoint="get_groups",quantile="0.99"}' in body
+    assert 'http_response_size_bytes_count{endpoint="get_groups"} 3' in body
+    assert 'http_requests_in_flight 1' in body  # the /metrics request itself
+
+def test_metrics_reset_clears_counters(client):
+    """Test that resetting starts a fresh measurement window"""
+    client.application.config['METRICS_RESET_TOKEN'] = 'secret'
+    client.get('/groups')
+    assert client.post('/metrics/reset', headers={'Authorization': 'Bearer secret'}).status_code == 204
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'endpoint="get_groups"' not in body
+
+def test_metrics_reset_needs_the_admin_token(client):
+    """Test that metrics cannot be reset without the configured token"""
+    client.get('/groups')
+    assert client.post('/metrics/reset').status_code == 403
+    client.application.config['METRICS_RESET_TOKEN'] = 'secret'
+    assert client.post('/metrics/reset').status_code == 403
+    assert client.post('/metrics/reset', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert 'endpoint="get_groups"' in client.get('/metrics').get_data(as_text=True)
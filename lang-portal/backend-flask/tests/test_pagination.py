@@ -0,0 +1,106 @@
+import pytest
+
+from lib.pagination import decode_cursor, encode_cursor
+
+@pytest.fixture
+def words(app):
+    cursor = app.db.cursor()
+    cursor.execute('DELETE FROM word_groups')
+    cursor.execute('DELETE FROM words')
+    # Duplicate french values make sure ties are broken by id
+    rows = [(f'mot{i % 40:03d}', f'word{i:03d}', '[]') for i in range(120)]
+    cursor.executemany('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)', rows)
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) SELECT id, 1 FROM words')
+    app.db.commit()
+    return rows
+
+def walk(client, url, key):
+    items = []
+    cursor = ''
+    while cursor is not None:
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}cursor={cursor}')
+        assert response.status_code == 200
+        data = response.get_json()
+        items.extend(data[key])
+        cursor = data['next_cursor']
+    return items
+
+def test_cursor_round_trip():
+    """Test that cursors decode to what was encoded and are bound to their sort"""
+    token = encode_cursor('french', 'asc', ['été', 7])
+    assert decode_cursor(token, 'french', 'asc') == ['été', 7]
+    assert decode_cursor('', 'french', 'asc') is None
+    with pytest.raises(ValueError):
+        decode_cursor(token, 'english', 'asc')
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor!', 'french', 'asc')
+
+def test_words_keyset_matches_full_ordering(client, words):
+    """Test that walking /words by cursor visits every word once, in sort order"""
+    for order in ('asc', 'desc'):
+        items = walk(client, f'/words?sort_by=french&order={order}', 'words')
+        keys = [(item['french'], item['id']) for item in items]
+        assert len(keys) == len(words)
+        assert keys == sorted(keys, reverse=(order == 'desc'))
+
+def test_words_keyset_total_is_opt_in(client, words):
+    """Test that the count query only runs when include_total is requested"""
+    data = client.get('/words?cursor=').get_json()
+    assert 'total_words' not in data
+    assert len(data['words']) == 50
+
+    data = client.get('/words?cursor=&include_total=true').get_json()
+    assert data['total_words'] == len(words)
+
+def test_words_keyset_rejects_bad_cursor(client, words):
+    """Test that a cursor from another sort order is refused"""
+    token = client.get('/words?cursor=&sort_by=english').get_json()['next_cursor']
+    response = client.get(f'/words?cursor={token}&sort_by=french')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+@pytest.mark.parametrize('values', [[{}, []], ['bonjour', '7'], ['bonjour', 7.5], [True, 7], ['bonjour', None]])
+def test_keyset_rejects_tampered_cursor_values(client, words, values):
+    """Test that a cursor whose values cannot be bound is refused instead of reaching SQLite"""
+    with pytest.raises(ValueError, match='Malformed cursor'):
+        decode_cursor(encode_cursor('french', 'asc', values), 'french', 'asc')
+    urls = [
+        f"/words?cursor={encode_cursor('french', 'asc', values)}",
+        f"/groups/1/words?cursor={encode_cursor('french', 'asc', values)}",
+        f"/api/study-sessions?cursor={encode_cursor('created_at', 'desc', values)}"
+    ]
+    for url in urls:
+        response = client.get(url)
+        assert response.status_code == 400, url
+        assert response.get_json()['error'] == 'Malformed cursor'
+
+def test_words_keyset_refuses_review_count_sorts(client, words):
+    """Test that cursors are only offered for sorts an index can seek"""
+    for sort_by in ('correct_count', 'wrong_count'):
+        assert client.get(f'/words?cursor=&sort_by={sort_by}').status_code == 400
+        assert client.get(f'/words?page=2&sort_by={sort_by}').status_code == 200
+
+def test_group_words_keyset(client, words):
+    """Test cursor pagination over a single group's words"""
+    items = walk(client, '/groups/1/words?sort_by=english&order=desc', 'words')
+    english = [item['english'] for item in items]
+    assert english == sorted(english, reverse=True)
+    assert len(english) == len(words)
+
+    items = walk(client, '/groups/1/words?sort_by=correct_count', 'words')
+    assert [item['id'] for item in items] == sorted(item['id'] for item in items)
+
+def test_study_sessions_keyset(client, app):
+    """Test that sessions sharing a timestamp are neither skipped nor repeated"""
+    cursor = app.db.cursor()
+    cursor.executemany(
+        'INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, ?)',
+        [(f'2025-01-{1 + i // 3:02d} 10:00:00',) for i in range(25)]
+    )
+    app.db.commit()
+
+    items = walk(client, '/api/study-sessions?per_page=4', 'items')
+    keys = [(item['start_time'], item['id']) for item in items]
+    assert len(keys) == 25
+    assert keys == sorted(keys, reverse=True)
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from lib.db import Db, connect
+from lib.profiling import fingerprint
+from lib.queries import QueryRegistry, queries
+
+def test_registry_reads_sql_files_once(tmp_path):
+    """Test that named queries are served from memory after the first load"""
+    (tmp_path / 'words').mkdir()
+    query_file = tmp_path / 'words' / 'count.sql'
+    query_file.write_text('SELECT COUNT(*) FROM words')
+
+    registry = QueryRegistry(str(tmp_path)).load()
+    query_file.write_text('SELECT 1')
+
+    assert registry.names() == ['words/count']
+    assert registry.get('words/count') == 'SELECT COUNT(*) FROM words'
+    assert registry.get('words/count.sql') == 'SELECT COUNT(*) FROM words'
+    with pytest.raises(KeyError):
+        registry.get('words/missing')
+
+def test_registry_names_its_statements(tmp_path):
+    """Test that a statement's text maps back to its name, and inline SQL to none"""
+    (tmp_path / 'one.sql').write_text('SELECT ?')
+    registry = QueryRegistry(str(tmp_path)).load()
+    assert registry.name_of('SELECT ?') == 'one'
+    assert registry.name_of('SELECT 1') is None
+
+def test_connect_sets_statement_cache_size(tmp_path, mocker):
+    """Test that the statement cache size reaches sqlite3.connect, from connect() and from the app's pool"""
+    sqlite_connect = mocker.patch('lib.db.sqlite3.connect', wraps=sqlite3.connect)
+    connect(str(tmp_path / 'test.db'), cached_statements=2).close()
+    assert sqlite_connect.call_args.kwargs['cached_statements'] == 2
+
+    db = Db(str(tmp_path / 'test.db'), cached_statements=7)
+    db.connect().close()
+    assert sqlite_connect.call_args.kwargs['cached_statements'] == 7
+
+def test_routes_use_named_queries(client):
+    """Test that the route SQL moved to sql/ is loaded and timed under its name"""
+    profiler = client.application.db.profiler
+    profiler.reset()
+    assert client.get('/words/1').status_code in (200, 404)
+    assert client.get('/dashboard/recent-session').status_code == 200
+    assert client.get('/api/study-sessions').status_code == 200
+
+    stats = profiler.stats()
+    body = client.get('/metrics').get_data(as_text=True)
+    for name in ('words/get_word', 'dashboard/recent_session', 'study_sessions/list_sessions'):
+        key = fingerprint(queries.get(name))
+        assert sum(s['calls'] for (k, _), s in stats.items() if k == key) == 1
+        assert f'fingerprint="{key}",query="{name}"' in body
@@ -0,0 +1,90 @@
+import re
+import pytest
+
+from lib.pagination import encode_cursor
+
+# Tables that grow with usage, keyed by every alias the route queries give them
+LARGE_TABLES = {
+    'words': 'words', 'w': 'words',
+    'word_groups': 'word_groups', 'wg': 'word_groups',
+    'word_review_items': 'word_review_items', 'wri': 'word_review_items',
+    'word_reviews': 'word_reviews', 'r': 'word_reviews', 'wr': 'word_reviews',
+    'study_sessions': 'study_sessions', 'ss': 'study_sessions', 's': 'study_sessions',
+    'word_due_queue': 'word_due_queue', 'q': 'word_due_queue'
+}
+
+ROUTES = [
+    '/words',
+    '/words?sort_by=english&order=desc',
+    '/words?cursor=',
+    '/words?cursor=' + encode_cursor('french', 'asc', ['bonjour', 1]),
+    '/words?sort_by=english&order=desc&cursor=' + encode_cursor('english', 'desc', ['hello', 1]),
+    '/words/1',
+    '/groups',
+    '/groups/1',
+    '/groups/1/words',
+    '/groups/1/words?cursor=' + encode_cursor('french', 'asc', ['bonjour', 1]),
+    '/groups/1/words?sort_by=wrong_count&cursor=' + encode_cursor('wrong_count', 'asc', [0, 1]),
+    '/groups/1/words/raw',
+    '/groups/1/study_sessions',
+    '/api/study-sessions',
+    '/api/study-sessions?cursor=' + encode_cursor('created_at', 'desc', ['2025-01-01 00:00:00', 1]),
+    '/api/study-sessions/1',
+    '/api/study-sessions/1/next',
+    '/api/study-activities',
+    '/api/study-activities/1',
+    '/api/study-activities/1/sessions',
+    '/api/study-activities/1/launch',
+    '/dashboard/recent-session',
+    '/dashboard/stats'
+]
+
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+@pytest.fixture
+def route_queries(client, app):
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('bonjour', 'hello', '[]')")
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (1, 1)')
+    cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+    cursor.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1)')
+    app.db.commit()
+
+    # Record every statement the routes send to SQLite
+    statements = []
+    connection = app.db.get()
+    connection.set_trace_callback(statements.append)
+    try:
+        for url in ROUTES:
+            response = client.get(url)
+            assert response.status_code == 200, url
+    finally:
+        connection.set_trace_callback(None)
+
+    return [sql for sql in dict.fromkeys(statements) if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+def test_route_queries_do_not_scan_large_tables(app, route_queries):
+    """Test that no route query falls back to a full scan of a table that grows with usage"""
+    assert route_queries
+
+    cursor = app.db.cursor()
+    offenders = []
+    for sql in route_queries:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        for row in cursor.fetchall():
+            match = FULL_SCAN.match(row['detail'])
+            if match and match.group(1) in LARGE_TABLES:
+                offenders.append(f"{row['detail']}\n{sql.strip()}")
+
+    assert not offenders, '\n\n'.join(offenders)
+
+def test_words_keyset_seeks_without_sorting(app, route_queries):
+    """Test that every /words cursor page is an index range read, not a sort of the whole table"""
+    keyset = [sql for sql in route_queries if re.search(r'WHERE \(w\.\w+, w\.id\) [<>]', sql)]
+    assert len(keyset) == 2
+
+    cursor = app.db.cursor()
+    for sql in keyset:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        details = [row['detail'] for row in cursor.fetchall()]
+        assert not any('TEMP B-TREE' in detail for detail in details), (details, sql)
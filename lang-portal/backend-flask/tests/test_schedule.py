@@ -0,0 +1,111 @@
+import random
+
+from lib.migrations import run_migrations
+from lib.schedule import check_schedule, rebuild_schedule, review
+
+def create_session(app, count):
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO groups (name) VALUES ('Schedule')")
+    group_id = cursor.lastrowid
+    word_ids = []
+    for i in range(count):
+        cursor.execute('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)', (f'mot{i}', f'word{i}', '[]'))
+        word_ids.append(cursor.lastrowid)
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (cursor.lastrowid, group_id))
+    cursor.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, datetime('now'))",
+                   (group_id,))
+    session_id = cursor.lastrowid
+    app.db.commit()
+    return session_id, word_ids
+
+def test_review_follows_sm2_intervals():
+    """Test interval growth on a correct streak and the reset after a lapse"""
+    state, intervals = None, []
+    for correct in (True, True, True, True, False, True):
+        state, ease, due_at = review(state, correct, '2025-01-01 00:00:00')
+        intervals.append(state[2])
+    assert intervals == [1.0, 6.0, 15.0, 37.5, 1.0, 1.0]
+    assert ease == 2.3 and state == (1, 1, 1.0)
+    assert due_at == '2025-01-02 00:00:00'
+
+def test_next_returns_most_due_words(client, app):
+    """Test that new words come in order and a reviewed word moves back in the queue"""
+    session_id, word_ids = create_session(app, 4)
+    response = client.get(f'/api/study-sessions/{session_id}/next?n=3')
+    assert response.status_code == 200
+    words = response.get_json()['words']
+    assert [w['id'] for w in words] == word_ids[:3]
+    assert all(w['due'] and w['new'] for w in words)
+
+    client.post(f'/api/study-sessions/{session_id}/review', json={'word_id': word_ids[0], 'correct': True})
+    words = client.get(f'/api/study-sessions/{session_id}/next').get_json()['words']
+    assert [w['id'] for w in words] == word_ids[1:] + word_ids[:1]
+    assert words[-1]['due'] is False and words[-1]['streak'] == 1 and words[-1]['interval_days'] == 1.0
+
+def test_next_for_unknown_session(client):
+    assert client.get('/api/study-sessions/999999/next').status_code == 404
+
+def test_incremental_schedule_matches_rebuild(client, app):
+    """Test that reviews recorded one by one give the same schedule as replaying the history"""
+    session_id, word_ids = create_session(app, 5)
+    rng = random.Random(4)
+    reviews = [{'word_id': rng.choice(word_ids), 'correct': rng.random() < 0.75,
+                'created_at': f'2025-03-01T10:{minute:02d}:00Z'} for minute in range(40)]
+    # A long streak reaches the interval cap
+    reviews += [{'word_id': word_ids[0], 'correct': True, 'created_at': f'2025-03-01T11:{minute:02d}:00Z'}
+                for minute in range(25)]
+    for start in range(0, len(reviews), 7):
+        response = client.post(f'/api/study-sessions/{session_id}/reviews', json=reviews[start:start + 7])
+        assert response.status_code == 201
+
+    cursor = app.db.cursor()
+    cursor.execute('SELECT interval_days FROM word_schedule WHERE word_id = ?', (word_ids[0],))
+    assert cursor.fetchone()[0] == 365.0
+    assert check_schedule(cursor) == {}
+    cursor.execute('SELECT word_id, due_at FROM word_due_queue ORDER BY word_id')
+    incremental = cursor.fetchall()
+    rebuild_schedule(cursor)
+    app.db.commit()
+    cursor.execute('SELECT word_id, due_at FROM word_due_queue ORDER BY word_id')
+    assert [tuple(row) for row in cursor.fetchall()] == [tuple(row) for row in incremental]
+
+def test_migration_backfills_with_the_python_rules(app):
+    """Test that the schedule of existing history is backfilled through rebuild_schedule"""
+    session_id, word_ids = create_session(app, 3)
+    cursor = app.db.cursor()
+    cursor.executemany('INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)',
+                       [(word_ids[i % 3], session_id, i % 4 != 0, f'2025-03-01 10:{i:02d}:00') for i in range(12)])
+    # As on a database migrated before the backfill ran
+    cursor.execute('DELETE FROM word_schedule')
+    cursor.execute("DELETE FROM schema_migrations WHERE version = 'backfill:006_word_schedule'")
+    app.db.commit()
+
+    assert run_migrations(app.db.get()) == []
+    cursor.execute('SELECT COUNT(*) FROM word_schedule')
+    assert cursor.fetchone()[0] == 3
+    assert check_schedule(cursor) == {}
+
+def test_queue_follows_group_membership(app):
+    """Test that the word_groups triggers add and remove queue entries"""
+    session_id, word_ids = create_session(app, 2)
+    cursor = app.db.cursor()
+    cursor.execute('SELECT group_id FROM study_sessions WHERE id = ?', (session_id,))
+    group_id = cursor.fetchone()[0]
+    cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (word_ids[0], group_id))
+    cursor.execute('DELETE FROM word_groups WHERE word_id = ? AND rowid = (SELECT MAX(rowid) FROM word_groups)', (word_ids[0],))
+    cursor.execute('SELECT COUNT(*) FROM word_due_queue WHERE group_id = ?', (group_id,))
+    assert cursor.fetchone()[0] == 2  # one duplicate membership remains
+    cursor.execute('DELETE FROM word_groups WHERE word_id = ?', (word_ids[1],))
+    cursor.execute('SELECT word_id FROM word_due_queue WHERE group_id = ?', (group_id,))
+    assert [row[0] for row in cursor.fetchall()] == [word_ids[0]]
+    app.db.commit()
+
+def test_reset_makes_every_word_due(client, app):
+    session_id, word_ids = create_session(app, 2)
+    client.post(f'/api/study-sessions/{session_id}/review', json={'word_id': word_ids[0], 'correct': True})
+    client.post('/api/study-sessions/reset')
+    cursor = app.db.cursor()
+    cursor.execute('SELECT COUNT(*) FROM word_schedule')
+    assert cursor.fetchone()[0] == 0
+    cursor.execute("SELECT COUNT(*) FROM word_due_queue WHERE due_at > datetime('now')")
+    assert cursor.fetchone()[0] == 0
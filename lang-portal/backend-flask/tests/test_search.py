@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from lib.search import match_expression
+
+@pytest.fixture
+def words(app):
+    cursor = app.db.cursor()
+    cursor.executemany('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)', [
+        ('élève', 'student', json.dumps([{'french': 'é'}, {'french': 'lève'}])),
+        ('éléphant', 'elephant', json.dumps([{'french': 'é'}, {'french': 'lé'}, {'french': 'phant'}])),
+        ('bonjour', 'hello', json.dumps([{'french': 'bon'}, {'french': 'jour'}])),
+        ('journal', 'newspaper', '[]'),
+        ('le jour', 'the day', '[]')
+    ])
+    app.db.commit()
+
+def search(client, query, **params):
+    response = client.get('/words/search', query_string={'q': query, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_match_expression_quotes_terms():
+    """Test that user input cannot inject FTS5 syntax"""
+    assert match_expression('jour') == '"jour"*'
+    assert match_expression('le jour', prefix=False) == '"le" "jour"'
+    assert match_expression('french:NEAR(a "b") OR') == '"french"* "NEAR"* "a"* "b"* "OR"*'
+    assert match_expression(' - ') is None
+
+def test_search_is_accent_insensitive(client, words):
+    assert [w['french'] for w in search(client, 'eleve')['words']] == ['élève']
+    assert [w['french'] for w in search(client, 'ÉLÈVE')['words']] == ['élève']
+
+def test_search_matches_prefixes_and_parts(client, words):
+    """Test prefix matching across french, english and the flattened parts"""
+    assert {w['french'] for w in search(client, 'ele')['words']} == {'élève', 'éléphant'}
+    assert {w['french'] for w in search(client, 'jour')['words']} == {'bonjour', 'journal', 'le jour'}
+    assert {w['french'] for w in search(client, 'jour', prefix='false')['words']} == {'bonjour', 'le jour'}
+    assert [w['french'] for w in search(client, 'newsp')['words']] == ['journal']
+
+def test_search_ranks_and_paginates(client, words):
+    """Test that exact column matches outrank part matches and pages are disjoint"""
+    # 'le jour' matches the french column; 'bonjour' only through its parts
+    result = search(client, 'jour', prefix='false')
+    assert [w['french'] for w in result['words']] == ['le jour', 'bonjour']
+
+    first = search(client, 'jour', per_page=2)
+    second = search(client, 'jour', per_page=2, page=2)
+    assert first['total_words'] == 3 and first['total_pages'] == 2
+    assert len(first['words']) == 2 and len(second['words']) == 1
+    assert not {w['id'] for w in first['words']} & {w['id'] for w in second['words']}
+
+def test_index_follows_word_changes(app, client, words):
+    """Test that the triggers keep the index in step with updates and deletes"""
+    db = app.db.get()
+    db.execute("UPDATE words SET english = 'pupil' WHERE french = 'élève'")
+    db.execute("DELETE FROM words WHERE french = 'journal'")
+    db.commit()
+    app.cache.invalidate('words')
+    assert [w['french'] for w in search(client, 'pupil')['words']] == ['élève']
+    assert search(client, 'student')['total_words'] == 0
+    assert search(client, 'newspaper')['total_words'] == 0
+
+def test_bulk_import_is_indexed(app, tmp_path):
+    """Test that words loaded with the triggers suspended are still searchable"""
+    path = tmp_path / 'seed.json'
+    path.write_text(json.dumps([{'french': 'fromage', 'english': 'cheese', 'parts': [{'french': 'fro'}]}]))
+    cursor = app.db.cursor()
+    app.db.import_word_json(cursor, 'Food', str(path))
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'words_fts_%'")
+    assert cursor.fetchone()[0] == 3
+    cursor.execute("SELECT rowid FROM words_fts WHERE words_fts MATCH 'chees*'")
+    assert len(cursor.fetchall()) == 1
+
+def test_search_requires_a_query(client):
+    assert client.get('/words/search').status_code == 400
+    assert client.get('/words/search?q=%20%2A').status_code == 400
@@ -157,4 +157,166 @@ def test_create_review_item_invalid_data_types(client):
         }
     )
     assert response.status_code == 400
-    assert 'error' in response.get_json() 
\ No newline at end of file
+    assert 'error' in response.get_json() 
+
+def create_session_with_words(app, count=2):
+    cursor = app.db.cursor()
+    word_ids = []
+    for i in range(count):
+        cursor.execute('INSERT INTO words (french, english, parts) VALUES (?, ?, ?)',
+                       (f'mot{i}', f'word{i}', '[]'))
+        word_ids.append(cursor.lastrowid)
+        cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (cursor.lastrowid,))
+    cursor.execute('''
+        INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+        VALUES (1, 1, datetime('now'))
+    ''')
+    session_id = cursor.lastrowid
+    app.db.commit()
+    return session_id, word_ids
+
+def word_counters(app, word_id):
+    cursor = app.db.cursor()
+    cursor.execute('SELECT correct_count, wrong_count, last_reviewed FROM word_reviews WHERE word_id = ?', (word_id,))
+    return cursor.fetchone()
+
+def test_create_review_item_updates_word_counters(client, app):
+    session_id, (word_id, other_id) = create_session_with_words(app)
+
+    for correct in (True, True, False):
+        response = client.post(f'/api/study-sessions/{session_id}/review',
+                               json={'word_id': word_id, 'correct': correct})
+        assert response.status_code == 201
+
+    counters = word_counters(app, word_id)
+    assert counters['correct_count'] == 2
+    assert counters['wrong_count'] == 1
+    assert counters['last_reviewed'] is not None
+    assert word_counters(app, other_id) is None
+
+    response = client.get(f'/words/{word_id}')
+    assert response.get_json()['word']['correct_count'] == 2
+
+def test_rebuild_word_counters_matches_incremental(client, app):
+    from lib.reviews import rebuild_word_counters
+
+    session_id, word_ids = create_session_with_words(app, 3)
+    for i in range(10):
+        client.post(f'/api/study-sessions/{session_id}/review',
+                    json={'word_id': word_ids[i % 3], 'correct': i % 4 != 0})
+    incremental = {w: tuple(word_counters(app, w)[:2]) for w in word_ids}
+
+    cursor = app.db.cursor()
+    assert rebuild_word_counters(cursor) == 3
+    app.db.commit()
+    assert {w: tuple(word_counters(app, w)[:2]) for w in word_ids} == incremental
+
+def test_reset_clears_word_counters(client, app):
+    session_id, (word_id, _) = create_session_with_words(app)
+    client.post(f'/api/study-sessions/{session_id}/review', json={'word_id': word_id, 'correct': True})
+
+    response = client.post('/api/study-sessions/reset')
+    assert response.status_code == 200
+    assert word_counters(app, word_id) is None
+
+def test_create_review_items_batch(client, app):
+    session_id, (word_id, other_id) = create_session_with_words(app)
+    cursor = app.db.cursor()
+    cursor.execute("INSERT INTO words (french, english, parts) VALUES ('hors', 'outside', '[]')")
+    outsider_id = cursor.lastrowid
+    app.db.commit()
+
+    response = client.post(f'/api/study-sessions/{session_id}/reviews', json={'reviews': [
+        {'word_id': word_id, 'correct': True, 'created_at': '2025-05-01T10:00:00Z'},
+        {'word_id': other_id, 'correct': False},
+        {'word_id': outsider_id, 'correct': True},
+        {'word_id': 'abc', 'correct': True},
+        {'word_id': word_id, 'correct': 'yes'},
+        {'word_id': word_id, 'correct': True}
+    ]})
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data['created'] == 3
+    statuses = [result['status'] for result in data['results']]
+    assert statuses == ['created', 'created', 'rejected', 'rejected', 'rejected', 'created']
+    assert data['results'][0]['created_at'] == '2025-05-01 10:00:00'
+    assert data['results'][2]['error'] == 'Word not found or not in group'
+
+    # Returned ids point at the rows that were inserted for each item
+    created = [result for result in data['results'] if result['status'] == 'created']
+    for result in created:
+        cursor.execute('SELECT word_id, correct FROM word_review_items WHERE id = ?', (result['id'],))
+        row = cursor.fetchone()
+        assert (row['word_id'], bool(row['correct'])) == (result['word_id'], result['correct'])
+
+    assert tuple(word_counters(app, word_id))[:2] == (2, 0)
+    assert tuple(word_counters(app, other_id))[:2] == (0, 1)
+
+def test_create_review_items_word_id_must_be_whole(client, app):
+    """Test that only integers and digit strings are accepted as word_id"""
+    session_id, (word_id, _) = create_session_with_words(app)
+    response = client.post(f'/api/study-sessions/{session_id}/reviews', json=[
+        {'word_id': str(word_id), 'correct': True},
+        {'word_id': word_id + 0.9, 'correct': True},
+        {'word_id': float(word_id), 'correct': True},
+        {'word_id': True, 'correct': True},
+        {'word_id': f'-{word_id}', 'correct': True},
+        {'word_id': f'{word_id}.0', 'correct': True}
+    ])
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['created'] + ['rejected'] * 5
+    assert {result.get('error') for result in results[1:]} == {'Invalid word_id'}
+    assert tuple(word_counters(app, word_id))[:2] == (1, 0)
+
+def test_create_review_items_all_invalid(client, app):
+    session_id, _ = create_session_with_words(app)
+    response = client.post(f'/api/study-sessions/{session_id}/reviews',
+                           json=[{'word_id': 999999, 'correct': True}])
+    assert response.status_code == 400
+    assert response.get_json()['created'] == 0
+
+def test_create_review_items_rejects_bad_payloads(client, app):
+    session_id, _ = create_session_with_words(app)
+    assert client.post(f'/api/study-sessions/{session_id}/reviews', json={'reviews': []}).status_code == 400
+    assert client.post('/api/study-sessions/999999/reviews',
+                       json=[{'word_id': 1, 'correct': True}]).status_code == 404
+    too_many = [{'word_id': 1, 'correct': True}] * 501
+    assert client.post(f'/api/study-sessions/{session_id}/reviews', json=too_many).status_code == 413
+
+def test_study_session_listings_use_review_summary(client, app):
+    session_id, (word_id, other_id) = create_session_with_words(app)
+    client.post(f'/api/study-sessions/{session_id}/reviews', json=[
+        {'word_id': word_id, 'correct': True, 'created_at': '2030-06-01 10:00:00'},
+        {'word_id': other_id, 'correct': False, 'created_at': '2030-06-01 10:02:30'},
+        {'word_id': word_id, 'correct': True, 'created_at': '2030-06-01 10:01:00'}
+    ])
+
+    listed = [s for s in client.get('/api/study-sessions?per_page=100').get_json()['items'] if s['id'] == session_id][0]
+    detail = client.get(f'/api/study-sessions/{session_id}').get_json()['session']
+    by_activity = [s for s in client.get('/api/study-activities/1/sessions?per_page=100').get_json()['items']
+                   if s['id'] == session_id][0]
+    recent = client.get('/dashboard/recent-session').get_json()
+
+    for session in (listed, detail, by_activity):
+        assert session['review_items_count'] == 3
+        assert session['correct_count'] == 2
+        assert session['wrong_count'] == 1
+        assert session['end_time'] == '2030-06-01 10:02:30'
+    assert recent['id'] == session_id
+    assert (recent['correct_count'], recent['wrong_count']) == (2, 1)
+
+def test_rebuild_session_stats_matches_incremental(client, app):
+    from lib.sessions import rebuild_session_stats
+
+    session_id, word_ids = create_session_with_words(app, 3)
+    for i in range(6):
+        client.post(f'/api/study-sessions/{session_id}/review', json={'word_id': word_ids[i % 3], 'correct': i % 2 == 0})
+
+    def summary():
+        cursor = app.db.cursor()
+        cursor.execute('SELECT * FROM study_session_stats ORDER BY study_session_id')
+        return [tuple(row) for row in cursor.fetchall()]
+
+    incremental = summary()
+    assert rebuild_session_stats(app.db.cursor()) == 1
+    assert summary() == incremental
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from lib.db import connect
+from lib.groups import check_group_counts
+from lib.migrations import run_migrations
+from lib.schedule import check_schedule
+from lib.stats import check_stats
+from lib.synthetic import generate, group_of, word_in_group
+
+END = 1735689600  # 2025-01-01 00:00 UTC
+
+def make_db(path):
+    connection = connect(str(path))
+    with open('schema.sql') as f:
+        connection.executescript(f.read())
+    run_migrations(connection)
+    return connection
+
+def dump(connection):
+    return [
+        connection.execute(f'SELECT * FROM {table} ORDER BY 1, 2').fetchall()
+        for table in ('words', 'word_groups', 'study_sessions', 'word_review_items', 'groups', 'word_due_queue')
+    ]
+
+def test_generate_is_deterministic(tmp_path):
+    """Test that the same seed produces the same rows and another seed does not"""
+    first, second, other = make_db(tmp_path / 'a.db'), make_db(tmp_path / 'b.db'), make_db(tmp_path / 'c.db')
+    generate(first, words=300, groups=7, sessions=40, reviews=900, seed=1, end=END)
+    generate(second, words=300, groups=7, sessions=40, reviews=900, seed=1, end=END)
+    generate(other, words=300, groups=7, sessions=40, reviews=900, seed=2, end=END)
+
+    assert [list(map(tuple, rows)) for rows in dump(first)] == [list(map(tuple, rows)) for rows in dump(second)]
+    assert [list(map(tuple, rows)) for rows in dump(first)] != [list(map(tuple, rows)) for rows in dump(other)]
+    # Words never reviewed fall due at the end of the history, whatever the day it runs
+    unreviewed = first.execute('''
+        SELECT DISTINCT due_at FROM word_due_queue
+        WHERE word_id NOT IN (SELECT word_id FROM word_schedule)
+    ''').fetchall()
+    assert [row[0] for row in unreviewed] == ['2025-01-01 00:00:00']
+
+def test_generate_layout_and_derived_tables(tmp_path):
+    """Test that the documented layout holds and maintained counters match the data"""
+    connection = make_db(tmp_path / 'test.db')
+    indexes = connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name").fetchall()
+    triggers = connection.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name").fetchall()
+    summary = generate(connection, words=500, groups=9, sessions=60, reviews=1200, seed=3, end=END)
+
+    assert summary['words'] == connection.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 500
+    assert summary['reviews'] == connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 1200
+    assert len({row[0] for row in connection.execute('SELECT french FROM words')}) == 500
+
+    # Every review belongs to a word of its session's group, in chronological order
+    assert connection.execute('''
+        SELECT COUNT(*) FROM word_review_items wri
+        JOIN study_sessions ss ON ss.id = wri.study_session_id
+        LEFT JOIN word_groups wg ON wg.word_id = wri.word_id AND wg.group_id = ss.group_id
+        WHERE wg.word_id IS NULL OR wri.created_at < ss.created_at
+    ''').fetchone()[0] == 0
+    assert all(row[1] == group_of(row[0], 9) for row in connection.execute('SELECT id, group_id FROM study_sessions'))
+    assert connection.execute('SELECT MAX(created_at) FROM study_sessions').fetchone()[0] < '2025-01-01'
+
+    assert check_stats(connection.cursor()) == {}
+    assert check_schedule(connection.cursor()) == {}
+    assert check_group_counts(connection.cursor()) == {}
+    assert connection.execute('SELECT COUNT(*) FROM word_due_queue').fetchone()[0] == \
+        connection.execute('SELECT COUNT(*) FROM (SELECT DISTINCT group_id, word_id FROM word_groups)').fetchone()[0]
+    assert connection.execute('SELECT SUM(review_count) FROM study_session_stats').fetchone()[0] == 1200
+    assert connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name").fetchall() == indexes
+    assert connection.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name").fetchall() == triggers
+
+def test_word_in_group_stays_in_group():
+    """Test that sampled words belong to the requested group and exist"""
+    rng = random.Random(0)
+    for group_id in range(1, 8):
+        for _ in range(200):
+            word_id = word_in_group(rng, group_id, 100, 7)
+            assert 1 <= word_id <= 100 and group_of(word_id, 7) == group_id
+
+def test_generate_needs_a_word_per_group(tmp_path):
+    """Test that impossible layouts are rejected before anything is written"""
+    with pytest.raises(ValueError):
+        generate(make_db(tmp_path / 'test.db'), words=3, groups=5)
@@ -0,0 +1,148 @@
+import io
+import json
+import os
+import threading
+
+import pytest
+
+import lib.workers
+from app import create_app
+from lib.cache import SharedTableVersions
+from lib.workers import ProcessWriteLock, WorkerStats, WriteLockTimeout, read_worker_stats
+
+# Forked workers only exist where serve.py runs, i.e. not on Windows
+needs_fork = pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+
+def in_child(fn):
+    """Run fn in a forked process and return its exit status"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fn()
+            os._exit(0)
+        except BaseException:
+            os._exit(1)
+    return os.waitpid(pid, 0)[1]
+
+@needs_fork
+def test_shared_versions_are_seen_across_processes():
+    """Test that a table bumped in a child process is bumped in the parent too"""
+    versions = SharedTableVersions()
+    before = versions.get(('words', 'groups'))
+    assert in_child(lambda: versions.bump('words')) == 0
+    after = versions.get(('words', 'groups'))
+    assert after == (before[0] + 1, before[1])
+
+@needs_fork
+def test_write_lock_excludes_other_processes(tmp_path):
+    """Test that another process times out while the write lock is held"""
+    lock = ProcessWriteLock(str(tmp_path / 'db.write-lock'), timeout=0.05)
+    lock.acquire()
+    try:
+        def contend():
+            with pytest.raises(WriteLockTimeout):
+                lock.acquire()
+        assert in_child(contend) == 0
+    finally:
+        lock.release()
+
+    def take():
+        lock.acquire()
+        lock.release()
+    assert in_child(take) == 0
+
+def test_write_lock_without_fcntl_excludes_threads(tmp_path, monkeypatch):
+    """Test that the lock falls back to the thread lock where fcntl is missing"""
+    monkeypatch.setattr(lib.workers, 'fcntl', None)
+    lock = ProcessWriteLock(str(tmp_path / 'db.write-lock'), timeout=0.05)
+    lock.acquire()
+    errors = []
+    def contend():
+        try:
+            lock.acquire()
+        except WriteLockTimeout as e:
+            errors.append(e)
+    thread = threading.Thread(target=contend)
+    thread.start()
+    thread.join()
+    lock.release()
+    assert len(errors) == 1
+    lock.acquire()
+    lock.release()
+    assert lock.acquired == 2
+    assert not os.path.exists(tmp_path / 'db.write-lock')
+
+def test_write_requests_hold_the_lock(tmp_path):
+    """Test that writes take the lock, reads do not, and timeouts answer 503"""
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'app.db'),
+        'WRITE_LOCK_FILE': str(tmp_path / 'app.db.write-lock'),
+        'WRITE_LOCK_TIMEOUT': 0.05
+    })
+    client = app.test_client()
+    payload = {'group_id': 1, 'study_activity_id': 1}
+
+    assert client.get('/groups').status_code == 200
+    assert app.write_lock.acquired == 0
+    assert client.post('/api/study-sessions', json=payload).status_code == 201
+    # Released at teardown, so the next write gets it again
+    assert client.post('/api/study-sessions', json=payload).status_code == 201
+    assert app.write_lock.acquired == 2
+
+    app.write_lock.acquire()
+    try:
+        response = client.post('/api/study-sessions', json=payload)
+    finally:
+        app.write_lock.release()
+    assert response.status_code == 503
+    assert app.write_lock.timeouts == 1
+    app.db.dispose()
+
+def test_import_holds_the_lock_for_its_merge_only(tmp_path):
+    """Test that an upload is received and staged without the lock, which is taken for the merge"""
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'app.db'),
+        'WRITE_LOCK_FILE': str(tmp_path / 'app.db.write-lock')
+    })
+    held_while_reading = []
+
+    class Upload(io.BytesIO):
+        def readinto(self, buffer):
+            held_while_reading.append(app.write_lock._thread_lock.locked())
+            return super().readinto(buffer)
+
+        def read(self, *args):
+            held_while_reading.append(app.write_lock._thread_lock.locked())
+            return super().read(*args)
+
+    body = b'french,english\nchat,cat\nchien,dog\n'
+    response = app.test_client().post('/words/import', input_stream=Upload(body), content_type='text/csv',
+                                      headers={'Content-Length': str(len(body))})
+    assert response.status_code == 200 and response.get_json()['inserted'] == 2
+    assert held_while_reading and not any(held_while_reading)
+    assert app.write_lock.acquired == 1 and not app.write_lock._thread_lock.locked()
+    app.db.dispose()
+
+def test_metrics_include_every_worker(tmp_path):
+    """Test that /metrics renders the snapshots of all workers and the restart count"""
+    metrics_dir = tmp_path / 'metrics'
+    metrics_dir.mkdir()
+    (metrics_dir / 'master.json').write_text(json.dumps({'pid': 1, 'restarts': 2}))
+    app = create_app({
+        'TESTING': True,
+        'DATABASE': str(tmp_path / 'app.db'),
+        'WORKER_METRICS_DIR': str(metrics_dir)
+    })
+    app.worker_stats = WorkerStats(str(metrics_dir), 0)
+    WorkerStats(str(metrics_dir), 1).write(app)
+    client = app.test_client()
+    client.get('/groups')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert f'worker_requests_total{{worker="0",pid="{os.getpid()}"}} 1' in body
+    assert 'worker_resident_memory_bytes{worker="1"' in body
+    assert 'worker_restarts_total 2' in body
+    assert [worker['index'] for worker in read_worker_stats(str(metrics_dir))] == [0, 1]
+    app.db.dispose()